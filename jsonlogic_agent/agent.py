@@ -1,10 +1,17 @@
+import json
+
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools import FunctionTool
 from google.adk.planners import PlanReActPlanner
 from google.genai import types
 
-from tools.jsonlogic import create_jsonlogic_from_intent, validate_fields_from_jsonlogic, get_available_fields_from_schema
-from prompt import SYSTEM_PROMPT
+from tools.jsonlogic import (create_jsonlogic_from_intent, create_validated_jsonlogic_from_intent,
+                             validate_fields_from_jsonlogic, get_available_fields_from_schema)
+from prompt import SYSTEM_PROMPT, FAST_PATH_PROMPT, AVAILABLE_FIELDS_HEADER, FIELDS_NOT_LOADED
+from utils.field_index import usable_fields
+from utils.schema_registry import schema_registry
+from utils.session_policy import trim_history
 
 root_agent = Agent(
     name="jsonlogic_agent",
@@ -14,9 +21,41 @@ root_agent = Agent(
         temperature=0 # More deterministic output
     ),
     planner=PlanReActPlanner(),
+    before_model_callback=trim_history,
     tools=[
         FunctionTool(func=create_jsonlogic_from_intent),
         FunctionTool(func=validate_fields_from_jsonlogic),
         FunctionTool(func=get_available_fields_from_schema),
     ],
-)
\ No newline at end of file
+)
+
+def fast_path_instruction(context: ReadonlyContext) -> str:
+    """
+    Instruction of the fast-path agent, with the usable fields of the session schema appended.
+
+    The fields are looked up by the `schema_hash` in the session state, so the
+    schema must be registered in the schema registry before the first request
+    (the CLI does this). Otherwise the model is told to get the fields with the tool.
+    """
+    digest = context.state.get("schema_hash")
+    field_index = schema_registry.get(digest) if digest else None
+    if field_index is None:
+        return FAST_PATH_PROMPT + FIELDS_NOT_LOADED
+    return FAST_PATH_PROMPT + AVAILABLE_FIELDS_HEADER + json.dumps(usable_fields(field_index)) + "\n"
+
+def create_fast_path_agent() -> Agent:
+    """
+    Create the fast-path agent: same model and planner as `root_agent`, but the fields are
+    in the instruction and validated by the tool that creates the rule, so a rule takes one
+    model turn, or two when a field has to be corrected.
+
+    It is created on request rather than on import, so importing this module does not build it.
+    """
+    return root_agent.clone(update={
+        "name": "jsonlogic_fast_path_agent",
+        "instruction": fast_path_instruction,
+        "tools": [
+            FunctionTool(func=create_validated_jsonlogic_from_intent),
+            FunctionTool(func=get_available_fields_from_schema),
+        ],
+    })
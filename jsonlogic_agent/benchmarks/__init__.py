@@ -0,0 +1 @@
+"""Benchmarks for the JSONLogic Generator, run from the jsonlogic_agent folder with `python -m benchmarks.<name>`."""
@@ -0,0 +1,48 @@
+"""
+Compare `json_logic.jsonLogic` with `compile_rule` on synthetic records.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.compile_rule --data survey --records 100000
+"""
+
+import argparse
+
+import json_logic
+
+from benchmarks.intents import get_rules
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from utils.jsonlogic_compiler import compile_rule
+
+def run(data_type: str, record_count: int, repeat: int):
+    records = load_records(data_type, record_count)
+    rules = get_rules(data_type)
+
+    print(f"{record_count} {data_type} records, best of {repeat} runs")
+    print(f"{'interpreted/s':>14} {'compiled/s':>14} {'speedup':>8}  description")
+
+    for description, rule in rules.items():
+        compiled = compile_rule(rule)
+
+        expected = [json_logic.jsonLogic(rule, record) for record in records]
+        actual = [compiled(record) for record in records]
+        if actual != expected:
+            raise AssertionError(f"Compiled rule results differ from json_logic for: {description}")
+
+        interpreted_time = best_time(lambda: [json_logic.jsonLogic(rule, record) for record in records], repeat)
+        compiled_time = best_time(lambda: [compiled(record) for record in records], repeat)
+
+        print(f"{record_count / interpreted_time:>14,.0f} {record_count / compiled_time:>14,.0f} "
+              f"{interpreted_time / compiled_time:>7.1f}x  {description}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled JSONLogic rules")
+    parser.add_argument('--data', choices=["userdata", "survey"], default="userdata", help='Test data type to scale up')
+    parser.add_argument('--records', type=int, default=100_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule, the best is reported')
+    args = parser.parse_args()
+
+    run(args.data, args.records, args.repeat)
+
+if __name__ == "__main__":
+    main()
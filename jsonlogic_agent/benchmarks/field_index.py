@@ -0,0 +1,72 @@
+"""
+Benchmark the field index against the previous quadratic usable-field filter.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.field_index --properties 50000
+"""
+
+import argparse
+import json
+
+from benchmarks.synthetic import generate_schema
+from benchmarks.timing import best_time
+from tools.jsonlogic import _extract_field_info
+from utils.field_index import build_field_index, usable_fields, children_of, is_array
+
+# The quadratic filter takes minutes beyond this many fields
+LEGACY_FIELD_LIMIT = 10_000
+
+def legacy_usable_fields(field_info):
+    """The filter `get_available_fields_from_schema` used before the field index, kept for comparison."""
+    usable = []
+    for field in field_info:
+        if field.get("type") == "object" and not any(k in field for k in ["values", "range"]):
+            continue
+        if ".*" in field.get("name", ""):
+            continue
+        is_parent_path = False
+        for other_field in field_info:
+            if other_field["name"] != field["name"] and other_field["name"].startswith(field["name"] + "."):
+                is_parent_path = True
+                break
+        if not is_parent_path:
+            usable.append(field)
+    return usable
+
+def run(property_count: int, repeat: int):
+    schema = json.dumps(generate_schema(property_count))
+    field_info = _extract_field_info(schema)
+    print(f"Schema with {property_count} properties, {len(field_info)} fields, best of {repeat} runs")
+
+    field_index = build_field_index(field_info)
+    names = [field["name"] for field in field_info]
+
+    build_time = best_time(lambda: build_field_index(field_info), repeat)
+    usable_time = best_time(lambda: usable_fields(field_index), repeat)
+    children_time = best_time(lambda: [children_of(field_index, name) for name in names], repeat)
+    array_time = best_time(lambda: [is_array(field_index, name) for name in names], repeat)
+
+    print(f"  build index:          {build_time * 1000:10.2f} ms (once per schema)")
+    print(f"  usable fields:        {usable_time * 1000:10.2f} ms ({len(field_index['usable'])} fields)")
+    print(f"  children of path:     {children_time / len(names) * 1e6:10.2f} us per path")
+    print(f"  is array:             {array_time / len(names) * 1e6:10.2f} us per path")
+
+    if len(field_info) <= LEGACY_FIELD_LIMIT:
+        if legacy_usable_fields(field_info) != usable_fields(field_index):
+            raise AssertionError("Field index and legacy filter disagree on usable fields")
+        legacy_time = best_time(lambda: legacy_usable_fields(field_info), 1)
+        print(f"  legacy quadratic filter: {legacy_time * 1000:7.2f} ms per tool call")
+    else:
+        print(f"  legacy quadratic filter: skipped above {LEGACY_FIELD_LIMIT} fields")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the schema field index")
+    parser.add_argument('--properties', type=int, nargs='+', default=[1_000, 5_000, 50_000], help='Schema sizes to generate')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per operation, the best is reported')
+    args = parser.parse_args()
+
+    for property_count in args.properties:
+        run(property_count, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Hand-written intents for the bundled rule descriptions.
+
+These are the intents the agent is expected to produce for the `descriptions` in
+`data/userdata.json` and `data/survey.json`. Benchmarks convert them with
+`create_jsonlogic_from_intent` to get realistic rules without calling the LLM.
+"""
+
+from typing import Dict, Any
+
+from tools.jsonlogic import intent_to_jsonlogic
+from utils.jsonlogic_optimizer import optimize_rule
+
+SURVEY_QUESTIONS = {
+    "productUsage": ["usageFrequency", "usageContext", "usageDuration", "completedOnboarding", "abandonedFeatures"],
+    "satisfaction": ["overallSatisfaction", "easeOfUse", "features", "valueForMoney", "likeliestFeature",
+                     "painPoints", "wouldRecommend", "npsScore"],
+    "feedback": ["improvementSuggestions", "missingFeatures", "competitorComparison", "contactForFollowUp",
+                 "participateInUserResearch"],
+}
+
+INTENTS = {
+    "userdata": {
+        "Find active users over 30 years old": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "user.isActive", "operator": "equals", "value": True},
+                {"field": "user.age", "operator": "greaterThan", "value": 30},
+            ]
+        },
+        "Find users between 25 and 40 years old": {
+            "field": "user.age", "operator": "between", "value": [25, 40]
+        },
+        "Find users from the US with an active premium subscription": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "user.address.country", "operator": "equals", "value": "US"},
+                {"field": "subscription.plan", "operator": "equals", "value": "premium"},
+                {"field": "subscription.isActive", "operator": "equals", "value": True},
+            ]
+        },
+        "Find users with a subscription price between 50 and 100 dollars inclusive": {
+            "field": "subscription.price", "operator": "betweenOrEqual", "value": [50, 100]
+        },
+        "Find users with no tags": {
+            "field": "user.tags", "operator": "empty"
+        },
+        "Find users who have at least one tag": {
+            "field": "user.tags", "operator": "lengthGreaterThan", "value": 0
+        },
+        "Find users where second tag is 'premium'": {
+            "field": "user.tags.1", "operator": "equals", "value": "premium"
+        },
+        "Find users who have the tag 'beta'": {
+            "field": "user.tags", "operator": "contains", "value": "beta"
+        },
+        "Find users who logged in more than 5 times and have the tag 'developer'": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "loginCount", "operator": "greaterThan", "value": 5},
+                {"field": "user.tags", "operator": "contains", "value": "developer"},
+            ]
+        },
+    },
+    "survey": {
+        "Find highly satisfied customers (overall satisfaction of 4 or 5) who use the product daily": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "questions.satisfaction.overallSatisfaction.response", "operator": "betweenOrEqual", "value": [4, 5]},
+                {"field": "questions.productUsage.usageFrequency.response", "operator": "equals", "value": "daily"},
+            ]
+        },
+        "Find responses from mobile devices where the user reported pain points related to mobile experience": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "metadata.device", "operator": "equals", "value": "mobile"},
+                {"field": "questions.satisfaction.painPoints.response", "operator": "contains", "value": "mobile_experience"},
+            ]
+        },
+        "Find customers who would recommend the product but rated value for money as 3 or lower": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "questions.satisfaction.wouldRecommend.response", "operator": "equals", "value": True},
+                {"field": "questions.satisfaction.valueForMoney.response", "operator": "lessOrEqual", "value": 3},
+            ]
+        },
+        "Find customers who have been using the product for more than 6 months and want to participate in user research": {
+            "operation": "AND",
+            "conditions": [
+                {
+                    "operation": "OR",
+                    "conditions": [
+                        {"field": "questions.productUsage.usageDuration.response", "operator": "equals", "value": "6-12 months"},
+                        {"field": "questions.productUsage.usageDuration.response", "operator": "equals", "value": "more than 1 year"},
+                    ]
+                },
+                {"field": "questions.feedback.participateInUserResearch.response", "operator": "equals", "value": True},
+            ]
+        },
+        "Find customers who are not subscribers but gave an NPS score of 8 or higher": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "customerInfo.isSubscriber", "operator": "equals", "value": False},
+                {"field": "questions.satisfaction.npsScore.response", "operator": "greaterOrEqual", "value": 8},
+            ]
+        },
+        "Find responses where the user skipped at least one question": {
+            "operation": "OR",
+            "conditions": [
+                {"field": f"questions.{section}.{question}.skipped", "operator": "equals", "value": True}
+                for section, questions in SURVEY_QUESTIONS.items()
+                for question in questions
+            ]
+        },
+        "Find customers who completed the survey in less than 5 minutes (300 seconds) and reported at least one pain point": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "metadata.timeSpent", "operator": "lessThan", "value": 300},
+                {"field": "questions.satisfaction.painPoints.response", "operator": "lengthGreaterThan", "value": 0},
+            ]
+        },
+        "Find customers who reported missing features related to integration or API access": {
+            "operation": "OR",
+            "conditions": [
+                {"field": "questions.feedback.missingFeatures.response", "operator": "contains", "value": "integration"},
+                {"field": "questions.feedback.missingFeatures.response", "operator": "contains", "value": "API"},
+            ]
+        },
+        "Find customers who use the product professionally and mention competitors in their feedback": {
+            "operation": "AND",
+            "conditions": [
+                {"field": "questions.productUsage.usageContext.response", "operator": "equals", "value": "professional"},
+                {"field": "questions.feedback.competitorComparison.response", "operator": "contains", "value": "competitor"},
+            ]
+        },
+    },
+}
+
+def get_rules(data_type: str, operator_mode: str = "portable") -> Dict[str, Dict[str, Any]]:
+    """Get the JSONLogic rule `create_jsonlogic_from_intent` produces for each bundled description of a data type."""
+    return {
+        description: optimize_rule(intent_to_jsonlogic(intent, operator_mode))
+        for description, intent in INTENTS[data_type].items()
+    }
@@ -0,0 +1,76 @@
+"""
+Compare portable and extended operator mode rules.
+
+Length checks are generated as a `reduce` over the array in portable mode and
+as the native `length` operation in extended mode. This benchmark times both
+forms on arrays of increasing size, interpreted and compiled, and times the
+bundled descriptions whose rules differ between the modes.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.operators --sizes 10 1000 100000
+"""
+
+import argparse
+
+import json_logic
+from json_logic.builtins import to_bool
+
+from benchmarks.intents import get_rules
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from tools.jsonlogic import intent_to_jsonlogic
+from utils.jsonlogic_compiler import compile_rule
+from utils.jsonlogic_operations import OPERATIONS
+
+def length_checks(sizes, repeat: int):
+    intent = {"field": "items", "operator": "lengthGreaterThan", "value": 5}
+    portable = intent_to_jsonlogic(intent, "portable")
+    extended = intent_to_jsonlogic(intent, "extended")
+
+    print(f"Length check on one record, best of {repeat} runs")
+    print(f"{'items':>10} {'portable':>12} {'extended':>12} {'portable':>12} {'extended':>12}")
+    print(f"{'':>10} {'interpreted':>12} {'interpreted':>12} {'compiled':>12} {'compiled':>12}")
+
+    for size in sizes:
+        record = {"items": list(range(size))}
+        timings = []
+        for rule in (portable, extended):
+            timings.append(best_time(lambda: json_logic.jsonLogic(rule, record, OPERATIONS), repeat))
+        for rule in (portable, extended):
+            compiled = compile_rule(rule)
+            timings.append(best_time(lambda: compiled(record), repeat))
+        print(f"{size:>10} " + " ".join(f"{timing * 1e6:>10.1f}us" for timing in timings))
+
+def bundled_rules(data_type: str, record_count: int, repeat: int):
+    records = load_records(data_type, record_count)
+    portable_rules = get_rules(data_type, "portable")
+    extended_rules = get_rules(data_type, "extended")
+
+    print(f"{record_count} {data_type} records, interpreted, best of {repeat} runs")
+    for description, portable in portable_rules.items():
+        extended = extended_rules[description]
+        if extended == portable:
+            continue
+
+        agree = sum(
+            to_bool(json_logic.jsonLogic(portable, record, OPERATIONS)) == to_bool(json_logic.jsonLogic(extended, record, OPERATIONS))
+            for record in records
+        )
+        portable_time = best_time(lambda: [json_logic.jsonLogic(portable, record, OPERATIONS) for record in records], repeat)
+        extended_time = best_time(lambda: [json_logic.jsonLogic(extended, record, OPERATIONS) for record in records], repeat)
+        print(f"  {portable_time * 1000:8.1f}ms {extended_time * 1000:8.1f}ms {portable_time / extended_time:6.2f}x "
+              f"agree {agree / len(records):6.1%}  {description}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark portable and extended operator rules")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1_000, 100_000], help='Array sizes for the length check')
+    parser.add_argument('--records', type=int, default=20_000, help='Number of synthetic records for the bundled rules')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule, the best is reported')
+    args = parser.parse_args()
+
+    length_checks(args.sizes, args.repeat)
+    for data_type in ("userdata", "survey"):
+        bundled_rules(data_type, args.records, args.repeat)
+
+if __name__ == "__main__":
+    main()
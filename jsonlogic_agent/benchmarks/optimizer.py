@@ -0,0 +1,70 @@
+"""
+Compare rules as translated from the intent with their optimized form.
+
+Reports the estimated cost and the measured evaluation time of every bundled
+description before and after `optimize_rule`, and checks that both rules return
+the same value for every synthetic record.
+
+With `--reverse`, the conditions of every intent are listed in reverse order,
+as the agent may produce them, to show the effect of cost ordering.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.optimizer --data survey --records 20000 --reverse
+"""
+
+import argparse
+from typing import Any, Dict
+
+import json_logic
+
+from benchmarks.intents import INTENTS
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from tools.jsonlogic import intent_to_jsonlogic
+from utils.jsonlogic_optimizer import optimize_rule, estimate_cost
+
+def reverse_conditions(intent: Dict[str, Any]) -> Dict[str, Any]:
+    """Reverse the order of the conditions at every level of an intent."""
+    if "conditions" not in intent:
+        return intent
+    return {**intent, "conditions": [reverse_conditions(condition) for condition in reversed(intent["conditions"])]}
+
+def run(data_type: str, record_count: int, repeat: int, reverse: bool):
+    records = load_records(data_type, record_count)
+
+    print(f"{record_count} {data_type} records, best of {repeat} runs")
+    print(f"{'cost before':>12} {'cost after':>11} {'time before':>12} {'time after':>11} {'speedup':>8}  description")
+
+    total_before = total_after = 0.0
+    for description, intent in INTENTS[data_type].items():
+        rule = intent_to_jsonlogic(reverse_conditions(intent) if reverse else intent)
+        optimized = optimize_rule(rule)
+
+        expected = [json_logic.jsonLogic(rule, record) for record in records]
+        actual = [json_logic.jsonLogic(optimized, record) for record in records]
+        if actual != expected:
+            raise AssertionError(f"Optimized rule results differ for: {description}")
+
+        before = best_time(lambda: [json_logic.jsonLogic(rule, record) for record in records], repeat)
+        after = best_time(lambda: [json_logic.jsonLogic(optimized, record) for record in records], repeat)
+        total_before += before
+        total_after += after
+
+        print(f"{estimate_cost(rule):>12.1f} {estimate_cost(optimized):>11.1f} "
+              f"{before * 1000:>10.1f}ms {after * 1000:>9.1f}ms {before / after:>7.2f}x  {description}")
+
+    print(f"{'':>12} {'':>11} {total_before * 1000:>10.1f}ms {total_after * 1000:>9.1f}ms "
+          f"{total_before / total_after:>7.2f}x  all descriptions")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSONLogic rule optimizer")
+    parser.add_argument('--data', choices=["userdata", "survey"], default="userdata", help='Test data type to scale up')
+    parser.add_argument('--records', type=int, default=20_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule, the best is reported')
+    parser.add_argument('--reverse', action='store_true', help='Reverse the order of the conditions in each intent')
+    args = parser.parse_args()
+
+    run(args.data, args.records, args.repeat, args.reverse)
+
+if __name__ == "__main__":
+    main()
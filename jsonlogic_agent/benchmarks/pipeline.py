@@ -0,0 +1,182 @@
+"""
+Time each stage of the rule generation pipeline and compare with a baseline.
+
+Stages that depend on the schema run on the bundled schema scaled up to each of
+`--fields` fields, and rule testing runs on each of `--records` synthetic records.
+Every stage is reported in seconds per call (per record for rule testing), so
+results of runs with different sizes or repeat counts can be compared.
+
+Results are written as JSON with `--output`. With `--baseline`, each stage is
+compared with the same stage in an earlier results file, and the exit status is 1
+if any stage is slower than the baseline by more than `--threshold`.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.pipeline --fields 10 1000 100000 --records 1 1000 100000 --output results.json
+    python -m benchmarks.pipeline --output current.json --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+
+from google.genai import types
+
+from benchmarks.intents import INTENTS, get_rules
+from benchmarks.synthetic import load_records, scale_schema
+from benchmarks.timing import best_async_time, best_time
+from tools.jsonlogic import (_extract_field_info, create_jsonlogic_from_intent, get_available_fields_from_schema,
+                             validate_fields_from_jsonlogic)
+from utils.event_processing import extract_json_from_response
+from utils.jsonlogic_utils import JSONLogicUtils
+
+# Records above this count are generated and tested one chunk at a time
+RECORD_CHUNK = 100_000
+# Number of field names validated per call, like a rule with many conditions
+VALIDATED_FIELDS = 20
+
+class BenchmarkToolContext:
+    """The parts of an ADK tool context the tools use: the session state and the schema artifact."""
+
+    def __init__(self, schema_text: str, operator_mode: str = "portable"):
+        self.state: Dict[str, Any] = {"operator_mode": operator_mode}
+        self.schema_artifact = types.Part(text=schema_text)
+
+    async def load_artifact(self, filename: str):
+        return self.schema_artifact if filename == "schema.json" else None
+
+def response_texts(rules: List[Any]) -> List[str]:
+    """Agent responses in the formats `extract_json_from_response` handles: plain JSON, a code block, and a final answer marker."""
+    texts = []
+    for rule in rules:
+        rule_text = json.dumps(rule, indent=2)
+        texts.append(rule_text)
+        texts.append(f"Here is the rule:\n```json\n{rule_text}\n```")
+        texts.append(f"/*PLANNING*/\nFind the fields.\n/*ACTION*/\n/*FINAL_ANSWER*/\n{rule_text}")
+    return texts
+
+def schema_stages(data_type: str, field_count: int, repeat: int) -> Dict[str, float]:
+    schema_text = json.dumps(scale_schema(data_type, field_count))
+    field_info = _extract_field_info(schema_text)
+    names = [field["name"] for field in field_info]
+    step = max(1, len(names) // VALIDATED_FIELDS)
+    # Every other field is misspelled, so validation also computes suggestions
+    fields = [name if index % 2 else name[:-1] + "x" for index, name in enumerate(names[::step][:VALIDATED_FIELDS])]
+
+    session = BenchmarkToolContext(schema_text)
+    asyncio.run(get_available_fields_from_schema(session))
+
+    return {
+        "extract_field_info": best_time(lambda: _extract_field_info(schema_text), repeat),
+        # A new session hashes the schema artifact to find its field index in the registry
+        "get_available_fields_from_schema (new session)": best_async_time(
+            lambda: get_available_fields_from_schema(BenchmarkToolContext(schema_text)), repeat),
+        "get_available_fields_from_schema": best_async_time(lambda: get_available_fields_from_schema(session), repeat),
+        "validate_fields_from_jsonlogic": best_async_time(lambda: validate_fields_from_jsonlogic(fields, session), repeat),
+    }
+
+def rule_stages(data_type: str, repeat: int) -> Dict[str, float]:
+    intents = list(INTENTS[data_type].values())
+    texts = response_texts(list(get_rules(data_type).values()))
+    tool_context = BenchmarkToolContext("{}")
+
+    async def parse_all():
+        for text in texts:
+            await extract_json_from_response(text)
+
+    loop = asyncio.new_event_loop()
+    try:
+        parse_time = best_time(lambda: loop.run_until_complete(parse_all()), repeat)
+    finally:
+        loop.close()
+
+    create_time = best_time(lambda: [create_jsonlogic_from_intent(intent, tool_context) for intent in intents], repeat)
+    return {
+        "create_jsonlogic_from_intent": create_time / len(intents),
+        "extract_json_from_response": parse_time / len(texts),
+    }
+
+def test_rule_stage(data_type: str, record_count: int, repeat: int) -> float:
+    """Seconds per record to test all bundled rules with `JSONLogicUtils.test_rule`."""
+    rules = list(get_rules(data_type).values())
+    elapsed = 0.0
+    for start in range(0, record_count, RECORD_CHUNK):
+        records = load_records(data_type, min(RECORD_CHUNK, record_count - start), seed=start)
+        # Large counts are timed once, chunk by chunk, instead of keeping every record in memory
+        elapsed += best_time(lambda: [JSONLogicUtils.test_rule(rule, record) for record in records for rule in rules],
+                             repeat if record_count <= RECORD_CHUNK else 1)
+    return elapsed / record_count
+
+def run(data_type: str, field_counts: List[int], record_counts: List[int], repeat: int) -> Dict[str, float]:
+    results = {}
+    for field_count in field_counts:
+        for stage, seconds in schema_stages(data_type, field_count, repeat).items():
+            results[f"{stage} [{data_type}, {field_count} fields]"] = seconds
+    for stage, seconds in rule_stages(data_type, repeat).items():
+        results[f"{stage} [{data_type}]"] = seconds
+    for record_count in record_counts:
+        results[f"test_rule [{data_type}, {record_count} records]"] = test_rule_stage(data_type, record_count, repeat)
+    return results
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Print each stage next to its baseline.
+
+    Returns:
+        The stages slower than the baseline by more than `threshold`, e.g. 0.2 for 20%
+    """
+    regressions = []
+    print(f"\n{'stage':<72} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for stage, seconds in results.items():
+        if stage not in baseline:
+            print(f"{stage:<72} {'-':>12} {seconds * 1e6:>10.2f}us")
+            continue
+        ratio = seconds / baseline[stage] if baseline[stage] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(stage)
+            flag = "  REGRESSION"
+        print(f"{stage:<72} {baseline[stage] * 1e6:>10.2f}us {seconds * 1e6:>10.2f}us {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the rule generation pipeline")
+    parser.add_argument('--data', choices=list(INTENTS.keys()), nargs='+', default=list(INTENTS.keys()), help='Data types to benchmark')
+    parser.add_argument('--fields', type=int, nargs='+', default=[10, 1_000, 10_000], help='Schema sizes, scaled from the bundled schema')
+    parser.add_argument('--records', type=int, nargs='+', default=[1, 1_000, 10_000], help='Numbers of synthetic records to test rules on')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per stage, the best is reported')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with the results in this JSON file, written by --output')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Slowdown over the baseline reported as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for data_type in args.data:
+        data_results = run(data_type, args.fields, args.records, args.repeat)
+        for stage, seconds in data_results.items():
+            print(f"{stage:<72} {seconds * 1e6:>12.2f}us")
+        results.update(data_results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "created": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "arguments": vars(args),
+                "seconds": results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["seconds"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stages slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
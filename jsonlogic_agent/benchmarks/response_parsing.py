@@ -0,0 +1,92 @@
+"""
+Benchmark rule extraction from agent responses against the previous regex cascade.
+
+Responses are PlanReAct transcripts of increasing size: planning and reasoning
+text that mentions intents and braces, followed by the rule as a final answer
+with trailing text, in a code fence, or inline in the prose.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.response_parsing --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import re
+
+from benchmarks.intents import get_rules
+from benchmarks.timing import best_time
+from utils.json_extract import extract_json
+
+def legacy_extract_json(response: str):
+    """The regex cascade `extract_json_from_response` used before `utils.json_extract`, kept for comparison."""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response)
+        if json_match:
+            return json.loads(json_match.group(1))
+
+        final_answer_match = re.search(r'/\*FINAL_ANSWER\*/\s*([\s\S]*?)\s*(?:/\*END\*/|$)', response)
+        if final_answer_match:
+            return json.loads(final_answer_match.group(1))
+
+        json_match = re.search(r'({[\s\S]*?})', response)
+        if json_match:
+            return json.loads(json_match.group(1))
+
+        raise ValueError("No valid JSON found in response")
+
+def transcript(rule, size: int, style: str) -> str:
+    """A PlanReAct response of about `size` characters ending with `rule` in the given style."""
+    step = ("/*REASONING*/\nThe description mentions a condition, so the intent is "
+            '{"field": "user.age", "operator": "greaterThan", "value": 30} and the {var} lookups '
+            "must match the schema. Fields like \"user.tags\" hold arrays.\n/*ACTION*/\n")
+    planning = "/*PLANNING*/\n1. Get the fields.\n2. Build the intent.\n/*ACTION*/\n"
+    planning += step * max(1, (size - len(planning)) // len(step))
+    rule_text = json.dumps(rule, indent=2)
+
+    if style == "final answer":
+        return f"{planning}/*FINAL_ANSWER*/\n{rule_text}\n\nThis rule selects the matching records."
+    if style == "code fence":
+        return f"{planning}/*FINAL_ANSWER*/\nHere is the rule:\n```json\n{rule_text}\n```\nIt selects the matching records."
+    return f"{planning}The rule is {json.dumps(rule)} and it selects the matching records."
+
+def run(sizes, repeat: int):
+    rules = [rule for data_type in ("userdata", "survey") for rule in get_rules(data_type).values()]
+
+    print(f"{len(rules)} bundled rules per style and size, best of {repeat} runs")
+    print(f"{'style':<14} {'chars':>8} {'legacy':>10} {'scanner':>10} {'legacy ok':>10} {'scanner ok':>11}")
+    for style in ("final answer", "code fence", "inline"):
+        for size in sizes:
+            responses = [transcript(rule, size, style) for rule in rules]
+            legacy_ok = scanner_ok = 0
+            for rule, response in zip(rules, responses):
+                try:
+                    legacy_ok += legacy_extract_json(response) == rule
+                except (ValueError, json.JSONDecodeError):
+                    pass
+                scanner_ok += extract_json(response) == rule
+
+            def legacy_all():
+                for response in responses:
+                    try:
+                        legacy_extract_json(response)
+                    except (ValueError, json.JSONDecodeError):
+                        pass
+
+            legacy_time = best_time(legacy_all, repeat) / len(responses)
+            scanner_time = best_time(lambda: [extract_json(response) for response in responses], repeat) / len(responses)
+            average = sum(len(response) for response in responses) // len(responses)
+            print(f"{style:<14} {average:>8} {legacy_time * 1e6:>8.1f}us {scanner_time * 1e6:>8.1f}us "
+                  f"{legacy_ok:>4}/{len(rules):<5} {scanner_ok:>5}/{len(rules):<5}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule extraction from agent responses")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='Approximate response sizes in characters')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per size, the best is reported')
+    args = parser.parse_args()
+
+    run(args.sizes, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare finding the matching rules for each record by brute force and with a `RuleIndex`.
+
+Uses the generated userdata segment rules of `benchmarks.ruleset`. Brute force
+evaluates every compiled rule on every record, the index only evaluates the
+candidate rules of each record. Both must select the same rules.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.rule_index --rules 100 1000 10000 --records 1000
+"""
+
+import argparse
+
+from json_logic.builtins import to_bool
+
+from benchmarks.ruleset import generate_rules
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from utils.jsonlogic_compiler import compile_rule
+from utils.jsonlogic_rule_index import RuleIndex
+from utils.jsonlogic_ruleset import RuleSet
+
+def run(rule_counts, record_count: int, repeat: int):
+    records = load_records("userdata", record_count)
+
+    print(f"{record_count} userdata records, best of {repeat} runs, records per second")
+    print(f"{'rules':>6} {'compiled':>10} {'rule set':>10} {'index':>10} {'speedup':>8} {'candidates':>11} {'matches':>8}")
+
+    for count in rule_counts:
+        rules = generate_rules(count)
+        compiled = [(name, compile_rule(rule)) for name, rule in rules.items()]
+        rule_set = RuleSet(rules)
+        index = RuleIndex(rules)
+
+        def brute_force(record):
+            return [name for name, rule in compiled if to_bool(rule(record))]
+
+        candidates = matches = 0
+        for record in records:
+            expected = brute_force(record)
+            if index.matching(record) != expected:
+                raise AssertionError(f"RuleIndex results differ for record: {record}")
+            candidates += len(index.candidates(record))
+            matches += len(expected)
+
+        compiled_time = best_time(lambda: [brute_force(record) for record in records], repeat)
+        rule_set_time = best_time(lambda: [rule_set.matching(record) for record in records], repeat)
+        index_time = best_time(lambda: [index.matching(record) for record in records], repeat)
+
+        print(f"{count:>6} {record_count / compiled_time:>10,.0f} {record_count / rule_set_time:>10,.0f} "
+              f"{record_count / index_time:>10,.0f} {compiled_time / index_time:>7.2f}x "
+              f"{candidates / record_count:>11.1f} {matches / record_count:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matching records against indexed rules")
+    parser.add_argument('--rules', type=int, nargs='+', default=[100, 1_000, 10_000], help='Numbers of rules to match against')
+    parser.add_argument('--records', type=int, default=1_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule count, the best is reported')
+    args = parser.parse_args()
+
+    run(args.rules, args.records, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare evaluating many rules one by one with evaluating them as a `RuleSet`.
+
+Generates segment rules over the userdata fields from random intents, the way
+the agent would translate a batch of descriptions, and times three ways of
+getting every rule's result for every record: the interpreter
+(`JSONLogicUtils.test_rule`), one compiled closure per rule, and one `RuleSet`.
+All three must agree for every record.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.ruleset --rules 10 100 1000 --records 2000
+"""
+
+import argparse
+import random
+from typing import Any, Dict
+
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from tools.jsonlogic import intent_to_jsonlogic
+from utils.jsonlogic_compiler import compile_rule
+from utils.jsonlogic_optimizer import optimize_rule
+from utils.jsonlogic_ruleset import RuleSet
+from utils.jsonlogic_utils import JSONLogicUtils
+
+# Conditions segment rules are built from, as (field, operator, candidate values)
+CONDITIONS = [
+    ("user.age", "greaterThan", [18, 21, 25, 30, 40, 50, 65]),
+    ("user.age", "lessThan", [25, 30, 40, 50]),
+    ("user.age", "between", [[18, 30], [25, 40], [30, 50], [40, 65]]),
+    ("user.isActive", "equals", [True, False]),
+    ("user.address.country", "equals", ["US", "UK", "CA", "DE"]),
+    ("user.address.city", "equals", ["New York", "London", "Toronto"]),
+    ("user.tags", "contains", ["beta", "premium", "developer", "early-adopter"]),
+    ("user.tags", "lengthGreaterThan", [0, 1, 2]),
+    ("subscription.plan", "equals", ["basic", "premium", "enterprise"]),
+    ("subscription.isActive", "equals", [True, False]),
+    ("subscription.price", "betweenOrEqual", [[0, 50], [50, 100], [100, 200]]),
+    ("loginCount", "greaterThan", [0, 5, 10, 50, 100]),
+]
+
+def random_intent(rng: random.Random) -> Dict[str, Any]:
+    """Build an AND of one to four distinct conditions."""
+    conditions = [
+        {"field": field, "operator": operator, "value": rng.choice(values)}
+        for field, operator, values in rng.sample(CONDITIONS, rng.randint(1, 4))
+    ]
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"operation": "AND", "conditions": conditions}
+
+def generate_rules(count: int, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {f"segment {index}": optimize_rule(intent_to_jsonlogic(random_intent(rng))) for index in range(count)}
+
+def run(rule_counts, record_count: int, repeat: int):
+    records = load_records("userdata", record_count)
+
+    print(f"{record_count} userdata records, best of {repeat} runs, records per second")
+    print(f"{'rules':>6} {'interpreted':>12} {'compiled':>12} {'rule set':>12} {'speedup':>8} {'shared':>7} {'reused':>7}")
+
+    for count in rule_counts:
+        rules = generate_rules(count)
+        compiled = {name: compile_rule(rule) for name, rule in rules.items()}
+        rule_set = RuleSet(rules)
+
+        for record in records:
+            expected = {name: JSONLogicUtils.test_rule(rule, record) for name, rule in rules.items()}
+            if rule_set.evaluate(record) != expected:
+                raise AssertionError(f"RuleSet results differ for record: {record}")
+
+        interpreted_time = best_time(
+            lambda: [{name: JSONLogicUtils.test_rule(rule, record) for name, rule in rules.items()} for record in records],
+            repeat)
+        compiled_time = best_time(
+            lambda: [{name: rule(record) for name, rule in compiled.items()} for record in records], repeat)
+        rule_set_time = best_time(lambda: [rule_set.evaluate(record) for record in records], repeat)
+
+        print(f"{count:>6} {record_count / interpreted_time:>12,.0f} {record_count / compiled_time:>12,.0f} "
+              f"{record_count / rule_set_time:>12,.0f} {compiled_time / rule_set_time:>7.2f}x "
+              f"{rule_set.shared_count:>7} {rule_set.reused_count:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark evaluating many rules as a RuleSet")
+    parser.add_argument('--rules', type=int, nargs='+', default=[10, 100, 1_000], help='Numbers of rules to evaluate together')
+    parser.add_argument('--records', type=int, default=2_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule count, the best is reported')
+    args = parser.parse_args()
+
+    run(args.rules, args.records, args.repeat)
+
+if __name__ == "__main__":
+    main()
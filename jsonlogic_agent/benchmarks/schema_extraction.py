@@ -0,0 +1,151 @@
+"""
+Benchmark schema field extraction against the previous recursive extractor.
+
+Covers a large schema read from a file, a schema that reuses `$ref` definitions,
+and a schema nested deeper than the recursive extractor can walk.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.schema_extraction --properties 200000
+"""
+
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.synthetic import generate_schema
+from benchmarks.timing import best_time
+from utils.schema_fields import extract_field_info
+
+def legacy_extract_field_info(schema: str):
+    """The recursive extractor `_extract_field_info` used before `utils.schema_fields`, kept for comparison."""
+    field_info = []
+
+    def extract_fields(schema, path=""):
+        if not isinstance(schema, dict):
+            return
+        field_data = {"name": path}
+        if "description" in schema:
+            field_data["description"] = schema["description"]
+        if "type" in schema:
+            field_data["type"] = schema["type"]
+        if "enum" in schema:
+            field_data["values"] = schema["enum"]
+        if "minimum" in schema and "maximum" in schema:
+            field_data["range"] = [schema["minimum"], schema["maximum"]]
+        if path:
+            field_info.append(field_data)
+        if "properties" in schema:
+            for prop_name, prop_schema in schema["properties"].items():
+                field_path = f"{path}.{prop_name}" if path else prop_name
+                extract_fields(prop_schema, field_path)
+        if schema.get("type") == "object" and "properties" not in schema:
+            field_info.append({
+                "name": f"{path}.*",
+                "description": "Dynamic object with arbitrary properties",
+                "type": "object"
+            })
+        if schema.get("type") == "array" and "items" in schema:
+            field_data["type"] = "array"
+            if isinstance(schema["items"], dict):
+                if "properties" in schema["items"]:
+                    extract_fields(schema["items"], f"{path}.*")
+
+    extract_fields(json.loads(schema))
+    return sorted(field_info, key=lambda x: x["name"])
+
+def peak_memory(fn) -> int:
+    """Run a function once and return the peak traced memory in bytes."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def large_schema(property_count: int, repeat: int):
+    schema = generate_schema(property_count)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(schema, f, indent=2)
+    path = Path(f.name)
+    del schema
+
+    try:
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"Schema with {property_count} properties ({size_mb:.1f} MB on disk), best of {repeat} runs")
+
+        legacy = lambda: legacy_extract_field_info(path.read_text())
+        fields = extract_field_info(path)
+        if legacy() != fields:
+            raise AssertionError("Iterative and legacy extraction disagree")
+
+        for label, fn in [("legacy recursive (text)", legacy),
+                          ("iterative (text)", lambda: extract_field_info(path.read_text())),
+                          ("iterative (stream)", lambda: extract_field_info(path))]:
+            elapsed = best_time(fn, repeat)
+            peak = peak_memory(fn)
+            print(f"  {label:24} {elapsed * 1000:10.1f} ms  peak {peak / 1e6:8.1f} MB")
+    finally:
+        path.unlink()
+
+def ref_schema(definition_count: int, definition_size: int, reference_count: int, repeat: int):
+    definitions = {
+        f"Def{i}": generate_schema(definition_size, seed=i)
+        for i in range(definition_count)
+    }
+    properties = {
+        f"ref{i}": {"$ref": f"#/definitions/Def{i % definition_count}", "description": f"Reference {i}"}
+        for i in range(reference_count)
+    }
+    schema = {"type": "object", "definitions": definitions, "properties": properties}
+
+    # The same schema with every reference replaced by a copy of its definition
+    inlined = {"type": "object", "properties": {
+        name: {**copy.deepcopy(definitions[prop["$ref"].rsplit("/", 1)[1]]), "description": prop["description"]}
+        for name, prop in properties.items()
+    }}
+
+    fields = extract_field_info(schema)
+    if fields != extract_field_info(inlined):
+        raise AssertionError("Resolved references disagree with inlined definitions")
+
+    print(f"Schema with {reference_count} references to {definition_count} definitions "
+          f"of {definition_size} properties ({len(fields)} fields), best of {repeat} runs")
+    print(f"  {'inlined definitions':24} {best_time(lambda: extract_field_info(inlined), repeat) * 1000:10.1f} ms")
+    print(f"  {'memoized references':24} {best_time(lambda: extract_field_info(schema), repeat) * 1000:10.1f} ms")
+
+def deep_schema(depth: int):
+    # Serialized by hand, json.dumps is recursive too
+    text = '{"type": "object", "properties": {"level": ' * depth + '{"type": "string"}' + "}}" * depth
+
+    print(f"Schema nested {depth} levels deep")
+    try:
+        legacy_extract_field_info(text)
+        print(f"  {'legacy recursive':24} ok")
+    except RecursionError:
+        print(f"  {'legacy recursive':24} RecursionError")
+
+    start = time.perf_counter()
+    fields = extract_field_info(text)
+    print(f"  {'iterative':24} {(time.perf_counter() - start) * 1000:10.1f} ms ({len(fields)} fields)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schema field extraction")
+    parser.add_argument('--properties', type=int, default=200_000, help='Size of the large generated schema')
+    parser.add_argument('--definitions', type=int, default=20, help='Number of shared $ref definitions')
+    parser.add_argument('--definition-size', type=int, default=500, help='Properties per shared definition')
+    parser.add_argument('--references', type=int, default=1_000, help='Number of $ref properties')
+    parser.add_argument('--depth', type=int, default=5_000, help='Nesting depth of the deep schema')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per operation, the best is reported')
+    args = parser.parse_args()
+
+    large_schema(args.properties, args.repeat)
+    ref_schema(args.definitions, args.definition_size, args.references, args.repeat)
+    deep_schema(args.depth)
+
+if __name__ == "__main__":
+    main()
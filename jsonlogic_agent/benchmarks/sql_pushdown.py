@@ -0,0 +1,121 @@
+"""
+Verify and time filtering records in SQLite with rules translated by `rule_to_sql`.
+
+Loads the bundled sample record and synthetic records into a SQLite table as
+JSON, translates every bundled description in both operator modes, and checks
+that the query selects exactly the records the compiled rule matches in Python.
+Python time includes reading and parsing the rows, as it would for records kept
+in the database.
+
+With `--columns`, scalar fields used by the rules are also stored in indexed
+columns and the rules read them from there.
+
+Usage (from the jsonlogic_agent folder):
+    python -m benchmarks.sql_pushdown --data userdata --records 100000 --columns
+"""
+
+import argparse
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.intents import get_rules
+from benchmarks.synthetic import load_records
+from benchmarks.timing import best_time
+from utils.data_loader import get_sample_data
+from utils.jsonlogic_compiler import compile_rule, split_operation
+from utils.jsonlogic_sql import json_path, quote_identifier, rule_to_sql
+
+def var_paths(logic: Any) -> Iterator[str]:
+    """Yield the constant `var` paths of a rule."""
+    if isinstance(logic, list):
+        for item in logic:
+            yield from var_paths(item)
+    elif isinstance(logic, dict) and len(logic) == 1:
+        op, args = split_operation(logic)
+        if op == "var" and args and isinstance(args[0], str) and args[0]:
+            yield args[0]
+        for arg in args:
+            yield from var_paths(arg)
+
+def scalar_columns(rules: List[Any], records: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Pick a column name for every path of the rules that holds a scalar in every record."""
+    columns = {}
+    for path in sorted({path for rule in rules for path in var_paths(rule)}):
+        values = [compile_rule({"var": path})(record) for record in records]
+        if all(not isinstance(value, (list, dict)) for value in values):
+            columns[path] = "field_" + path.replace(".", "_")
+    return columns
+
+def build_database(records: List[Dict[str, Any]], columns: Dict[str, str], path: str = ":memory:") -> sqlite3.Connection:
+    definitions = ["id INTEGER PRIMARY KEY", "data TEXT NOT NULL"]
+    for field, column in columns.items():
+        definitions.append(f"{quote_identifier(column)} GENERATED ALWAYS AS "
+                           f"(json_extract(data, '{json_path(field)}')) STORED")
+
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE IF EXISTS records")
+    connection.execute(f"CREATE TABLE records ({', '.join(definitions)})")
+    connection.executemany("INSERT INTO records (id, data) VALUES (?, ?)",
+                           ((index, json.dumps(record)) for index, record in enumerate(records)))
+    for column in columns.values():
+        connection.execute(f"CREATE INDEX {quote_identifier('index_' + column)} ON records ({quote_identifier(column)})")
+    connection.commit()
+    return connection
+
+def python_filter(connection: sqlite3.Connection, rule: Any) -> List[int]:
+    matches = compile_rule(rule)
+    return [row_id for row_id, data in connection.execute("SELECT id, data FROM records ORDER BY id")
+            if matches(json.loads(data))]
+
+def sql_filter(connection: sqlite3.Connection, where: str, params: Dict[str, Any]) -> List[int]:
+    return [row_id for row_id, in connection.execute(f"SELECT id FROM records WHERE {where} ORDER BY id", params)]
+
+def run(data_type: str, record_count: int, repeat: int, use_columns: bool, database: str):
+    records = [get_sample_data(data_type)] + load_records(data_type, record_count)
+    rules = {mode: get_rules(data_type, mode) for mode in ("portable", "extended")}
+    all_rules = [rule for mode_rules in rules.values() for rule in mode_rules.values()]
+    columns = scalar_columns(all_rules, records) if use_columns else {}
+    connection = build_database(records, columns, database)
+
+    print(f"{len(records)} {data_type} records in SQLite{', fields in indexed columns' if columns else ''}, best of {repeat} runs")
+    print(f"{'python':>10} {'sql':>10} {'speedup':>8} {'matches':>8}  {'mode':<9} description")
+
+    mismatches = 0
+    for mode, mode_rules in rules.items():
+        for description, rule in mode_rules.items():
+            try:
+                where, params = rule_to_sql(rule, columns=columns)
+            except ValueError as error:
+                print(f"{'':>10} {'':>10} {'':>8} {'':>8}  {mode:<9} {description} (not translated: {error})")
+                continue
+
+            expected = python_filter(connection, rule)
+            actual = sql_filter(connection, where, params)
+            if actual != expected:
+                mismatches += 1
+                print(f"MISMATCH {mode} {description}: {len(expected)} expected, {len(actual)} selected")
+                continue
+
+            python_time = best_time(lambda: python_filter(connection, rule), repeat)
+            sql_time = best_time(lambda: sql_filter(connection, where, params), repeat)
+            print(f"{python_time * 1000:>8.1f}ms {sql_time * 1000:>8.1f}ms {python_time / sql_time:>7.2f}x "
+                  f"{len(expected):>8}  {mode:<9} {description}")
+
+    connection.close()
+    if mismatches:
+        raise AssertionError(f"{mismatches} rules selected different records in SQL")
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and benchmark rules translated to SQL")
+    parser.add_argument('--data', choices=["userdata", "survey"], default="userdata", help='Test data type to scale up')
+    parser.add_argument('--records', type=int, default=20_000, help='Number of synthetic records')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per rule, the best is reported')
+    parser.add_argument('--columns', action='store_true', help='Store scalar fields in indexed columns')
+    parser.add_argument('--db', default=":memory:", help='SQLite database file, in memory by default')
+    args = parser.parse_args()
+
+    run(args.data, args.records, args.repeat, args.columns, args.db)
+
+if __name__ == "__main__":
+    main()
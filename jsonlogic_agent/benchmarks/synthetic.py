@@ -0,0 +1,147 @@
+"""
+Synthetic records scaled up from the bundled test data.
+
+Records are generated by walking `sample_data.primary` alongside the schema and
+randomizing each value within what the schema allows, so generated rules match
+some records and not others.
+"""
+
+import random
+from typing import Dict, Any, Iterator, List, Optional
+
+from tools.jsonlogic import _extract_field_info
+from utils.data_loader import get_schema, get_sample_data
+
+def generate_records(data_type: str, count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Generate records shaped like the sample data of a data type.
+
+    Args:
+        data_type: The type of data to scale up (e.g., "userdata", "survey")
+        count: Number of records to generate
+        seed: Seed for the random generator, the same seed yields the same records
+
+    Returns:
+        An iterator over generated records
+    """
+    schema = get_schema(data_type)
+    sample = get_sample_data(data_type)
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        yield _vary(sample, schema, rng)
+
+def load_records(data_type: str, count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate records into a list, for benchmarks that iterate them more than once."""
+    return list(generate_records(data_type, count, seed))
+
+def generate_schema(property_count: int, fanout: int = 10, nesting: float = 0.2, max_depth: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a JSON schema with roughly `property_count` properties.
+
+    The schema mixes nested objects, enums, numeric ranges, booleans and arrays
+    (including arrays of objects) like the bundled schemas, at any size.
+
+    Args:
+        property_count: Total number of properties to generate across all levels
+        fanout: Maximum number of properties of a nested object
+        nesting: Probability that a property is a nested object
+        max_depth: Maximum nesting depth of objects
+        seed: Seed for the random generator
+
+    Returns:
+        The generated schema as a dictionary
+    """
+    rng = random.Random(seed)
+    remaining = [property_count]
+
+    def make_properties(depth: int, limit: Optional[int]) -> Dict[str, Any]:
+        properties = {}
+        while remaining[0] > 0 and (limit is None or len(properties) < limit):
+            remaining[0] -= 1
+            name = f"field{property_count - remaining[0]}"
+            roll = rng.random() if depth < max_depth else 1.0
+            if roll < nesting:
+                properties[name] = {"type": "object", "description": f"Group {name}", "properties": make_properties(depth + 1, fanout)}
+            elif roll < nesting + 0.02:
+                properties[name] = {"type": "array", "items": {"type": "object", "properties": make_properties(depth + 1, fanout)}}
+            else:
+                properties[name] = _leaf_schema(rng)
+        return properties
+
+    return {"type": "object", "properties": make_properties(0, None)}
+
+def scale_schema(data_type: str, field_count: int) -> Dict[str, Any]:
+    """
+    Scale the schema of a data type to roughly `field_count` fields.
+
+    Top-level properties of the bundled schema are added in order, repeated
+    with a numbered suffix (`user_2`, `subscription_2`, ...) until the schema
+    has at least `field_count` fields, so small counts take a prefix of the
+    bundled schema.
+
+    Args:
+        data_type: The type of data whose schema is scaled (e.g., "userdata", "survey")
+        field_count: Number of fields the scaled schema should have
+
+    Returns:
+        The scaled schema as a dictionary
+    """
+    schema = get_schema(data_type)
+    properties = list(schema.get("properties", {}).items())
+    sizes = [len(_extract_field_info({"type": "object", "properties": {name: value}})) for name, value in properties]
+
+    scaled = {}
+    fields = 0
+    copy = 1
+    while fields < field_count:
+        for (name, value), size in zip(properties, sizes):
+            if fields >= field_count:
+                break
+            scaled[name if copy == 1 else f"{name}_{copy}"] = value
+            fields += size
+        copy += 1
+
+    return dict(schema, properties=scaled)
+
+def _leaf_schema(rng: random.Random) -> Dict[str, Any]:
+    kind = rng.randrange(5)
+    if kind == 0:
+        return {"type": "number", "minimum": 0, "maximum": rng.choice([5, 10, 100])}
+    if kind == 1:
+        return {"type": "string", "enum": [f"value{i}" for i in range(rng.randint(2, 8))]}
+    if kind == 2:
+        return {"type": "boolean"}
+    if kind == 3:
+        return {"type": "array", "items": {"type": "string"}}
+    return {"type": "string", "description": "Free text"}
+
+def _vary(value: Any, schema: Dict[str, Any], rng: random.Random) -> Any:
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    schema_type = schema.get("type")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        return {key: _vary(item, properties.get(key, {}), rng) for key, item in value.items()}
+
+    if isinstance(value, list):
+        pool = schema.get("items", {}).get("enum") or value
+        return rng.sample(pool, rng.randint(0, len(pool)))
+
+    if schema_type == "boolean" or isinstance(value, bool):
+        return rng.random() < 0.5
+
+    if schema_type == "number" or isinstance(value, (int, float)):
+        if "minimum" in schema and "maximum" in schema:
+            return rng.randint(schema["minimum"], schema["maximum"])
+        if isinstance(value, int):
+            return rng.randint(0, max(1, value * 2))
+        return round(rng.uniform(0, value * 2), 2)
+
+    if isinstance(value, str) and value and rng.random() < 0.5:
+        # Scramble the sample string so equality and substring checks only match some records
+        return "".join(rng.sample(value, len(value)))
+
+    return value
@@ -0,0 +1,25 @@
+"""Timing helpers shared by the benchmarks."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+def best_time(fn: Callable[[], Any], repeat: int = 3) -> float:
+    """Run `fn` `repeat` times and return the fastest wall-clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def best_async_time(fn: Callable[[], Awaitable[Any]], repeat: int = 3) -> float:
+    """Like `best_time` for a coroutine function, timed inside one event loop so starting the loop is not counted."""
+    async def timed():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+    return asyncio.run(timed())
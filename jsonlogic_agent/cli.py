@@ -1,12 +1,24 @@
+import sys
 import json
+import time
 import asyncio
 import argparse
 import importlib
-from agent import root_agent
+from agent import root_agent, create_fast_path_agent
+from tools.jsonlogic import _extract_field_info
 from utils.jsonlogic_utils import JSONLogicUtils
 from utils.event_processing import process_agent_response, extract_json_from_response
+from utils.event_sinks import EventPipeline, ConsoleSink, JsonlSink, print_record, text_record
 from utils.logging import setup_logging
-from utils.data_loader import get_schema, get_sample_data, get_descriptions, get_expected_results
+from utils.data_loader import get_schema, get_sample_data, get_descriptions, get_expected_results, SampleSet
+from utils.bulk_evaluation import evaluate_jsonl
+from utils.rule_cache import RuleCache, schema_hash, DEFAULT_CACHE_PATH
+from utils.jsonlogic_operations import OPERATOR_MODES
+from utils.session_policy import SESSION_POLICIES, DEFAULT_HISTORY_TURNS
+from utils.agent_metrics import RequestMetrics, MetricsRecorder
+from utils.model_replay import RecordingLlm, ReplayLlm
+from utils.schema_registry import schema_registry
+from utils.line_reader import AsyncLineReader
 
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.sessions import InMemorySessionService
@@ -21,84 +33,340 @@ TEST_DATA_MODULES = {
     "survey": "test_data_survey"
 }
 
-async def process_descriptions(agent, session, session_service, artifact_service, descriptions, sample_data, expected_results=None):
-    """Process a list of descriptions and generate JSONLogic rules for each."""
-    success_count = 0
-    total_count = 0
-    
+def rule_cache_model(agent, session):
+    """Model name used in rule cache keys. Rules generated with extended operators are cached separately."""
+    operator_mode = session.state.get("operator_mode", "portable")
+    model = agent.canonical_model.model
+    return model if operator_mode == "portable" else f"{model}+{operator_mode}"
+
+async def create_request_session(session_service, artifact_service, session):
+    """Create a new session with the state and schema artifact of `session`, so a request runs without its history."""
+    request_session = await session_service.create_session(
+        app_name=session.app_name,
+        user_id=session.user_id,
+        state=dict(session.state)
+    )
+    schema = await artifact_service.load_artifact(
+        app_name=session.app_name,
+        user_id=session.user_id,
+        session_id=session.id,
+        filename="schema.json"
+    )
+    await artifact_service.save_artifact(
+        app_name=session.app_name,
+        user_id=session.user_id,
+        session_id=request_session.id,
+        filename="schema.json",
+        artifact=schema
+    )
+    return request_session
+
+async def extract_rule(response_text):
+    """Parse the rule in an agent response, raising ValueError unless it is a JSONLogic object or a boolean."""
+    rule = await extract_json_from_response(response_text)
+    if not isinstance(rule, (dict, bool)):
+        raise ValueError(f"Agent response is not a JSONLogic rule: {json.dumps(rule)}")
+    return rule
+
+async def test_sample_set(rule, sample_set, write):
+    """Write how many records of `sample_set` match the rule, if a sample set is given."""
+    if sample_set is None:
+        return
+    try:
+        # A large sample set is evaluated in a thread, so other runs and the output keep going meanwhile
+        matches, total = await asyncio.to_thread(JSONLogicUtils.count_matches, rule, sample_set)
+        write(f"Matches {matches} of {total} records in {sample_set.path}")
+    except Exception as e:
+        write(f"Error testing rule against {sample_set.path}: {e}")
+
+async def process_description(runner, agent, session, description, sample_data, expected_results=None, rule_cache=None, schema_digest=None, emit=print_record, metrics=None, streaming=False, sample_set=None):
+    """
+    Generate the rule for one description and test it against the sample data,
+    and against the records of `sample_set` if given.
+
+    The output is passed to `emit` as records (see `utils.event_sinks`).
+    The latency and token metrics of the agent run are added to `metrics`, if given.
+    Returns True or False if the result was checked against an expected result, otherwise None.
+    """
+    def write(text):
+        emit(text_record(text))
+
+    write(f"\n{'='*50}\nDescription: {description}\n{'='*50}")
+
+    content = types.Content(role='user', parts=[types.Part(text=description)])
+
+    def check_rule(rule):
+        write(f"\nGenerated JSONLogic rule:")
+        write(json.dumps(rule, indent=2))
+
+        # Test the rule against sample data
+        result = JSONLogicUtils.test_rule(rule, sample_data)
+        write(f"\nTest result against sample data: {result}")
+
+        # Validate against expected results if available
+        if expected_results and description in expected_results:
+            expected = expected_results[description]
+            if result == expected:
+                write(f"✅ PASS - Result matches expected outcome: {expected}")
+                return True
+            write(f"❌ FAIL - Result {result} doesn't match expected outcome: {expected}")
+            return False
+
+        return None
+
+    async def handle_final_response(response_text):
+        try:
+            rule = await extract_rule(response_text)
+            passed = check_rule(rule)
+            # Only cache rules that could be tested against the sample data
+            if rule_cache:
+                rule_cache.put(description, schema_digest, rule_cache_model(agent, session), rule)
+        except ValueError as e:
+            write(f"Error processing response: {e}")
+            return None
+        await test_sample_set(rule, sample_set, write)
+        return passed
+
+    cached_rule = rule_cache.get(description, schema_digest, rule_cache_model(agent, session)) if rule_cache else None
+    if cached_rule is not None:
+        write("\nUsing cached rule (agent run skipped)")
+        try:
+            passed = check_rule(cached_rule)
+        except ValueError as e:
+            write(f"Error processing cached rule: {e}")
+            return None
+        await test_sample_set(cached_rule, sample_set, write)
+        return passed
+
+    request_metrics = RequestMetrics(description, session.id)
+    passed = await process_agent_response(runner, session.user_id, session.id, content, on_final_response=handle_final_response,
+                                          emit=emit, metrics=request_metrics, streaming=streaming)
+    if metrics:
+        metrics.record(request_metrics)
+    write(request_metrics.describe())
+    return passed
+
+async def process_in_request_session(runner, agent, session, session_service, artifact_service, description, sample_data, **kwargs):
+    """Run `process_description` in a new session with the state and schema of `session`, deleted afterwards."""
+    request_session = await create_request_session(session_service, artifact_service, session)
+    try:
+        return await process_description(runner, agent, request_session, description, sample_data, **kwargs)
+    finally:
+        await session_service.delete_session(app_name=request_session.app_name, user_id=request_session.user_id,
+                                             session_id=request_session.id)
+
+async def process_descriptions(agent, session, session_service, artifact_service, descriptions, sample_data, expected_results=None, rule_cache=None, schema_digest=None, concurrency=1, metrics=None, streaming=False, events=None, sample_set=None):
+    """
+    Process a list of descriptions and generate JSONLogic rules for each.
+
+    With a concurrency above 1, up to that many descriptions are processed at the
+    same time, each in its own session. The output of each description is printed
+    as a block, in input order. With the "fresh" session policy, each description
+    also gets its own session when processed one at a time.
+
+    The metrics of the agent runs are added to `metrics`, if given. The output goes
+    to the sinks of the `events` pipeline, by default to the console.
+    """
+    pipeline = events or EventPipeline([ConsoleSink()])
     runner = Runner(agent=agent, app_name=session.app_name, session_service=session_service, artifact_service=artifact_service)
+    fresh = concurrency > 1 or session.state.get("session_policy") == "fresh"
+    metrics = MetricsRecorder() if metrics is None else metrics
+    first_run = len(metrics.requests)
 
-    for description in descriptions:
-        total_count += 1
-        print(f"\n{'='*50}\nDescription: {description}\n{'='*50}")
-        
-        content = types.Content(role='user', parts=[types.Part(text=description)])
+    async def process(description, emit=pipeline.emit):
+        if not fresh:
+            return await process_description(runner, agent, session, description, sample_data, expected_results,
+                                             rule_cache, schema_digest, emit=emit, metrics=metrics, streaming=streaming,
+                                             sample_set=sample_set)
+        return await process_in_request_session(runner, agent, session, session_service, artifact_service, description,
+                                                sample_data, expected_results=expected_results, rule_cache=rule_cache,
+                                                schema_digest=schema_digest, emit=emit, metrics=metrics, streaming=streaming,
+                                                sample_set=sample_set)
 
-        async def handle_final_response(response_text):
-            nonlocal success_count
-            
-            try:
-                rule = await extract_json_from_response(response_text)
-                print(f"\nGenerated JSONLogic rule:")
-                print(json.dumps(rule, indent=2))
-                
-                # Test the rule against sample data
-                result = JSONLogicUtils.test_rule(rule, sample_data)
-                print(f"\nTest result against sample data: {result}")
-                
-                # Validate against expected results if available
-                if expected_results and description in expected_results:
-                    expected = expected_results[description]
-                    if result == expected:
-                        print(f"✅ PASS - Result matches expected outcome: {expected}")
-                        success_count += 1
-                    else:
-                        print(f"❌ FAIL - Result {result} doesn't match expected outcome: {expected}")
-                
-                return rule, result
-            except ValueError as e:
-                print(f"Error processing response: {e}")
-                return None, None
-            
-        await process_agent_response(runner, session.user_id, session.id, content, on_final_response=handle_final_response)
+    if concurrency <= 1:
+        results = []
+        for description in descriptions:
+            results.append(await process(description))
+    else:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def process_buffered(description):
+            output = []
+            async with semaphore:
+                passed = await process(description, emit=output.append)
+            return passed, output
+
+        tasks = [asyncio.create_task(process_buffered(description)) for description in descriptions]
+        results = []
+        try:
+            for task in tasks:
+                passed, output = await task
+                for record in output:
+                    pipeline.emit(record)
+                results.append(passed)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    success_count = sum(1 for passed in results if passed)
+    total_count = len(descriptions)
+
+    # Cached rules skip the agent run and record no metrics
+    agent_runs = metrics.requests[first_run:]
+    if agent_runs:
+        prompt_tokens = sum(run.prompt_tokens for run in agent_runs)
+        output_tokens = sum(run.output_tokens for run in agent_runs)
+        pipeline.write(f"\n\nTokens: {prompt_tokens} prompt, {output_tokens} output over {len(agent_runs)} agent runs "
+                       f"({prompt_tokens / len(agent_runs):.0f} prompt tokens per run)")
 
     # Print summary
     if expected_results:
-        print(f"\n\nValidation summary: {success_count}/{total_count} rules matched expected results")
-        return success_count, total_count
-    
-    return None
+        pipeline.write(f"\n\nValidation summary: {success_count}/{total_count} rules matched expected results")
+    if events is None:
+        await pipeline.close()
+
+    return (success_count, total_count) if expected_results else None
+
+
+async def interactive_mode(agent, session, session_service, artifact_service, sample_data, rule_cache=None, schema_digest=None, metrics=None, streaming=False, events=None, concurrency=1,
+                           sample_set=None):
+    """
+    Run an interactive session allowing users to input descriptions.
 
+    Input is read without blocking the event loop, so output and other tasks keep
+    running while waiting for the user. With a concurrency above 1, descriptions
+    are pipelined (see `pipelined_interactive_mode`).
 
-async def interactive_mode(agent, session, session_service, artifact_service, sample_data):
-    """Run an interactive session allowing users to input descriptions."""
+    With streaming, each rule is shown as soon as the model has written it. The
+    output goes to the sinks of the `events` pipeline, by default to the console,
+    and is flushed before each prompt.
+    """
+    pipeline = events or EventPipeline([ConsoleSink()])
     runner = Runner(agent=agent, app_name=session.app_name, session_service=session_service, artifact_service=artifact_service)
+    reader = AsyncLineReader()
 
-    print(f"\n\n{'='*50}\nInteractive Mode\n{'='*50}\nType your rule description (or 'exit' to quit):")
+    if concurrency > 1:
+        pipeline.write(f"\n\n{'='*50}\nInteractive Mode\n{'='*50}\nType rule descriptions, one per line (or 'exit' to quit). "
+                       f"Up to {concurrency} run at the same time and results are shown as they finish:")
+        await pipelined_interactive_mode(runner, agent, session, session_service, artifact_service, reader, sample_data,
+                                         concurrency, pipeline, rule_cache, schema_digest, metrics, streaming, sample_set)
+        if events is None:
+            await pipeline.close()
+        return
+
+    pipeline.write(f"\n\n{'='*50}\nInteractive Mode\n{'='*50}\nType your rule description (or 'exit' to quit):")
     
     while True:
-        user_input = input("> ")
-        if user_input.lower() in ['exit', 'quit']:
+        await pipeline.flush()
+        user_input = await reader.readline("> ")
+        if user_input is None or user_input.lower() in ['exit', 'quit']:
             break
 
         content = types.Content(role='user', parts=[types.Part(text=user_input)])
 
+        def check_rule(rule):
+            pipeline.write(f"\nGenerated JSONLogic rule:")
+            pipeline.write(json.dumps(rule, indent=2))
+            
+            # Test the rule against sample data
+            result = JSONLogicUtils.test_rule(rule, sample_data)
+            pipeline.write(f"\nTest result against sample data: {result}")
+            
+            return rule, result
+
         async def handle_final_response(response_text):
             try:
-                rule = await extract_json_from_response(response_text)
-                print(f"\nGenerated JSONLogic rule:")
-                print(json.dumps(rule, indent=2))
-                
-                # Test the rule against sample data
-                result = JSONLogicUtils.test_rule(rule, sample_data)
-                print(f"\nTest result against sample data: {result}")
-                
-                return rule, result
+                rule = await extract_rule(response_text)
+                checked = check_rule(rule)
+                # Only cache rules that could be tested against the sample data
+                if rule_cache:
+                    rule_cache.put(user_input, schema_digest, rule_cache_model(agent, session), rule)
             except Exception as e:
-                print(f"Error processing response: {e}")
+                pipeline.write(f"Error processing response: {e}")
                 return None, None
+            await test_sample_set(rule, sample_set, pipeline.write)
+            return checked
+
+        cached_rule = rule_cache.get(user_input, schema_digest, rule_cache_model(agent, session)) if rule_cache else None
+        if cached_rule is not None:
+            pipeline.write("\nUsing cached rule (agent run skipped)")
+            try:
+                check_rule(cached_rule)
+            except Exception as e:
+                pipeline.write(f"Error processing cached rule: {e}")
+                continue
+            await test_sample_set(cached_rule, sample_set, pipeline.write)
+            continue
+
+        if session.state.get("session_policy") == "fresh":
+            request_session = await create_request_session(session_service, artifact_service, session)
+            request_metrics = RequestMetrics(user_input, request_session.id)
+            try:
+                await process_agent_response(runner, request_session.user_id, request_session.id, content,
+                                             on_final_response=handle_final_response, metrics=request_metrics, streaming=streaming,
+                                             emit=pipeline.emit)
+            finally:
+                await session_service.delete_session(app_name=request_session.app_name, user_id=request_session.user_id,
+                                                     session_id=request_session.id)
+        else:
+            request_metrics = RequestMetrics(user_input, session.id)
+            await process_agent_response(runner, session.user_id, session.id, content, on_final_response=handle_final_response,
+                                         metrics=request_metrics, streaming=streaming, emit=pipeline.emit)
+        if metrics:
+            metrics.record(request_metrics)
+        pipeline.write(request_metrics.describe())
+
+    if events is None:
+        await pipeline.close()
+
+
+async def pipelined_interactive_mode(runner, agent, session, session_service, artifact_service, reader, sample_data, concurrency,
+                                    pipeline, rule_cache=None, schema_digest=None, metrics=None, streaming=False,
+                                    sample_set=None):
+    """
+    Start each description as soon as it is entered, while earlier ones are still running.
+
+    Descriptions are numbered in input order and up to `concurrency` of them run at
+    the same time, each in its own session. The output of a description is shown
+    as one block when it finishes, tagged with its number and text, and its
+    records carry the number as `request`. After 'exit' or the end of the input,
+    the descriptions still running are finished before returning.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def process(number, description):
+        output = []
+        async with semaphore:
+            await process_in_request_session(runner, agent, session, session_service, artifact_service, description,
+                                             sample_data, rule_cache=rule_cache, schema_digest=schema_digest,
+                                             emit=output.append, metrics=metrics, streaming=streaming,
+                                             sample_set=sample_set)
+        pipeline.write(f"\n[{number}] Finished: {description}")
+        for record in output:
+            record["request"] = number
+            pipeline.emit(record)
+
+    number = 0
+    try:
+        while True:
+            user_input = await reader.readline()
+            if user_input is None or user_input.lower() in ['exit', 'quit']:
+                break
+            if not user_input.strip():
+                continue
 
-        await process_agent_response(runner, session.user_id, session.id, content, on_final_response=handle_final_response)
+            number += 1
+            pipeline.write(f"[{number}] Queued: {user_input}")
+            task = asyncio.create_task(process(number, user_input))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 def load_test_data_module(module_name):
@@ -112,40 +380,108 @@ def load_test_data_module(module_name):
         raise ImportError(f"Test data module '{module_name}' not found. Available options: {available}")
 
 
-async def main_async(data_type):
-    """Main async function that orchestrates the example."""
+async def main_async(data_type, cache_path=None, cache_ttl=None, cache_size=None, operator_mode="portable", concurrency=1,
+                     session_policy="shared", history_turns=DEFAULT_HISTORY_TURNS, metrics_path=None, model=None,
+                     streaming=False, events_path=None, samples_path=None, samples_mmap=False, logging_options=None,
+                     fast_path=False):
+    """
+    Main async function that orchestrates the example.
+
+    `model` replaces the model of the agent, e.g. with a `RecordingLlm` or `ReplayLlm`.
+    The output is printed, and also appended to `events_path` as JSON lines if given.
+    Each rule is also tested against the records in `samples_path`, if given.
+    `logging_options` are passed to `setup_logging`, e.g. to queue and rotate the log.
+    With `fast_path`, the agent gets the schema fields in its instruction and validates rules locally.
+    """
+    agent = create_fast_path_agent() if fast_path else root_agent
+    agent = agent.clone(update={"model": model}) if model else agent
+
     # Set up logging
-    setup_logging()
+    setup_logging(**(logging_options or {}))
 
     APP_NAME = "jsonlogic_generator"
     USER_ID = "user_1"
     SESSION_ID = "session_001"
 
-    artifact_service = InMemoryArtifactService()
-    session_service = InMemorySessionService()
-    session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
-    
-    # Load data from JSON files
+    # Load data from JSON files, parsed once for all four sections
     schema = get_schema(data_type)
     sample_data = get_sample_data(data_type)
     descriptions = get_descriptions(data_type)
     expected_results = get_expected_results(data_type)
     
     print(f"Using test data from {data_type}.json")
+    sample_set = SampleSet(samples_path, use_mmap=samples_mmap) if samples_path else None
+    if sample_set:
+        print(f"Testing rules against the records in {samples_path}")
+
+    # Index the schema fields before the first request, so neither the tools nor the
+    # fast-path instruction have to load the schema artifact
+    schema_text = json.dumps(schema)
+    registry_digest, _ = schema_registry.register(schema_text, _extract_field_info)
+
+    artifact_service = InMemoryArtifactService()
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(
+        app_name=APP_NAME,
+        user_id=USER_ID,
+        session_id=SESSION_ID,
+        state={"operator_mode": operator_mode, "session_policy": session_policy, "history_turns": history_turns,
+               "schema_hash": registry_digest}
+    )
     
-    artifact_service.save_artifact(
+    await artifact_service.save_artifact(
         app_name=session.app_name, 
         user_id=session.user_id, 
         session_id=session.id,
         filename="schema.json", 
-        artifact=types.Part(text=json.dumps(schema))
+        artifact=types.Part(text=schema_text)
     )
     
-    # Process all descriptions with expected results
-    await process_descriptions(root_agent, session, session_service, artifact_service, descriptions, sample_data, expected_results)
-    
-    # Run interactive mode
-    await interactive_mode(root_agent, session, session_service, artifact_service, sample_data)
+    # Rules generated for this schema and model can be reused across runs
+    rule_cache = RuleCache(cache_path, ttl_seconds=cache_ttl, max_entries=cache_size) if cache_path else None
+    schema_digest = schema_hash(schema)
+
+    # Latency and token metrics of every agent run, optionally written as JSON lines
+    metrics = MetricsRecorder(open(metrics_path, 'a') if metrics_path else None)
+
+    # Output and agent events are written by a background task, so slow sinks never hold up the agent
+    sinks = [ConsoleSink()] + ([JsonlSink(events_path)] if events_path else [])
+    async with EventPipeline(sinks) as events:
+        # Process all descriptions with expected results
+        await process_descriptions(agent, session, session_service, artifact_service, descriptions, sample_data, expected_results, rule_cache, schema_digest, concurrency, metrics, streaming, events, sample_set)
+
+        # Run interactive mode
+        await interactive_mode(agent, session, session_service, artifact_service, sample_data, rule_cache, schema_digest, metrics, streaming, events, concurrency, sample_set)
+
+    if rule_cache:
+        stats = rule_cache.stats()
+        print(f"Rule cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} cached rules")
+        rule_cache.close()
+
+    if metrics.requests:
+        print(f"\nAgent run metrics:\n{metrics.format_summary()}")
+    if metrics.stream:
+        metrics.stream.close()
+
+
+def evaluate_mode(rule_file, input_file, output_file=None, id_field=None, workers=None, chunk_size=10_000):
+    """Evaluate a saved rule against a JSONL dataset, streaming results to a file or stdout."""
+    with open(rule_file, 'r') as f:
+        rule = json.load(f)
+
+    output_stream = open(output_file, 'w') if output_file else sys.stdout
+    start = time.perf_counter()
+    try:
+        with open(input_file, 'rb') as input_stream:
+            stats = evaluate_jsonl(rule, input_stream, output_stream, id_field=id_field, workers=workers, chunk_size=chunk_size)
+    finally:
+        if output_file:
+            output_stream.close()
+
+    elapsed = time.perf_counter() - start
+    # Report on stderr so stdout only carries the results
+    print(f"Evaluated {stats['records']} records, {stats['matches']} matched "
+          f"({stats['records'] / elapsed if elapsed else 0:,.0f} records/s)", file=sys.stderr)
 
 
 def main():    
@@ -160,9 +496,127 @@ def main():
         default='userdata',
         help='Test data type to use'
     )
+    parser.add_argument(
+        '--evaluate',
+        metavar='RULE_FILE',
+        help='Evaluate the JSONLogic rule in RULE_FILE against --input instead of running the agent'
+    )
+    parser.add_argument('--input', help='JSONL file with one record per line, used with --evaluate')
+    parser.add_argument('--output', help='File for the evaluation results (default: stdout)')
+    parser.add_argument(
+        '--id-field',
+        help='Dot-notation path of the record ID; outputs IDs of matching records instead of a true/false line per record'
+    )
+    parser.add_argument('--workers', type=int, help='Number of worker processes for --evaluate (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=10_000, help='Records per work unit for --evaluate')
+    parser.add_argument(
+        '--cache',
+        nargs='?',
+        const=DEFAULT_CACHE_PATH,
+        metavar='PATH',
+        help=f'Reuse rules generated for the same description, schema and model (default path: {DEFAULT_CACHE_PATH})'
+    )
+    parser.add_argument('--cache-ttl', type=float, default=7 * 24 * 60 * 60, help='Seconds before a cached rule expires')
+    parser.add_argument('--cache-size', type=int, default=10_000, help='Maximum number of cached rules')
+    parser.add_argument(
+        '--operators',
+        choices=OPERATOR_MODES,
+        default='portable',
+        help='Generate standard JSONLogic (portable) or use native length and string operations (extended)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Number of descriptions to process at the same time, each in its own session. '
+             'In interactive mode, descriptions are started as they are entered and shown as they finish'
+    )
+    parser.add_argument(
+        '--session-policy',
+        choices=SESSION_POLICIES,
+        default='shared',
+        help='History sent with each request: all of it (shared), none (fresh), the last turns (window), '
+             'or the last turns and a summary of older ones (summarize)'
+    )
+    parser.add_argument(
+        '--history-turns',
+        type=int,
+        default=DEFAULT_HISTORY_TURNS,
+        help='Number of earlier requests kept in full by the window and summarize session policies'
+    )
+    parser.add_argument(
+        '--metrics',
+        metavar='PATH',
+        help='Append the latency and token metrics of each agent run to PATH as JSON lines'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream model responses and show each rule as soon as its JSON is complete'
+    )
+    parser.add_argument(
+        '--samples',
+        metavar='PATH',
+        help='Also test each rule against the records in PATH (JSONL, one record per line, or a JSON array), '
+             'read lazily so large files fit'
+    )
+    parser.add_argument('--samples-mmap', action='store_true', help='Memory-map the --samples JSONL file instead of reading it through a buffer')
+    parser.add_argument(
+        '--events',
+        metavar='PATH',
+        help='Append the output and agent events (planning, reasoning, tool calls and results) to PATH as JSON lines'
+    )
+    parser.add_argument('--log-queue', action='store_true', help='Write the log from a background thread, so logging never waits on the disk')
+    rotation = parser.add_mutually_exclusive_group()
+    rotation.add_argument('--log-max-bytes', type=int, default=0, help='Rotate the log file when it reaches this size')
+    rotation.add_argument('--log-rotate', metavar='WHEN', help='Rotate the log file at this interval, e.g. midnight or H (hourly)')
+    parser.add_argument('--log-backups', type=int, default=5, help='Number of rotated log files to keep')
+    parser.add_argument(
+        '--log-json',
+        action='store_true',
+        help='Write the log as JSON lines with the request and session IDs, which match those in --metrics'
+    )
+    parser.add_argument(
+        '--fast-path',
+        action='store_true',
+        help='Give the agent the schema fields up front and validate rule fields locally, '
+             'taking one model turn per rule instead of about four'
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--record', metavar='PATH', help='Append every model request and response of the run to PATH')
+    replay.add_argument('--replay', metavar='PATH', help='Answer model requests from a file written by --record, without a network')
+    parser.add_argument('--replay-latency', type=float, default=0.0, help='Seconds added to every replayed model call')
+    parser.add_argument(
+        '--replay-latency-scale',
+        type=float,
+        default=0.0,
+        help='Factor applied to the recorded duration of every replayed model call, e.g. 1 for the recorded latency'
+    )
     args = parser.parse_args()
 
-    asyncio.run(main_async(args.data))
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.history_turns < 0:
+        parser.error('--history-turns must not be negative')
+
+    if args.evaluate:
+        if not args.input:
+            parser.error('--evaluate requires --input')
+        evaluate_mode(args.evaluate, args.input, args.output, args.id_field, args.workers, args.chunk_size)
+        return
+
+    model = None
+    if args.record:
+        model = RecordingLlm(inner=root_agent.canonical_model, path=args.record)
+    elif args.replay:
+        model = ReplayLlm.from_file(args.replay, latency=args.replay_latency, latency_scale=args.replay_latency_scale)
+
+    asyncio.run(main_async(args.data, args.cache, args.cache_ttl, args.cache_size, args.operators, args.concurrency,
+                           args.session_policy, args.history_turns, args.metrics, model,
+                           args.stream, args.events, args.samples, args.samples_mmap,
+                           {"queued": args.log_queue, "max_bytes": args.log_max_bytes, "when": args.log_rotate,
+                            "backup_count": args.log_backups, "json_format": args.log_json},
+                           args.fast_path))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,18 +5,109 @@ from google.adk.tools import ToolContext
 from google.genai.types import Part
 from google.genai import types
 
-def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any]:
+from utils.field_index import build_field_index, usable_fields, validate_paths
+from utils.schema_registry import schema_registry
+from utils.schema_fields import extract_field_info, SchemaSource
+from utils.jsonlogic_optimizer import optimize_rule
+from utils.jsonlogic_operations import OPERATOR_MODES
+from utils.jsonlogic_utils import JSONLogicUtils
+
+def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any], tool_context: ToolContext) -> Any:
     """
     Convert the parsed intent structure to a JSONLogic rule.
     
+    The session's `operator_mode` state selects between standard JSONLogic
+    ("portable", the default) and native length and string operations ("extended").
+    
+    Args:
+        parsed_intent: The structured representation from the LLM
+        tool_context: Tool context with the session state, provided by ADK when the model calls the tool
+        
+    Returns:
+        A JSONLogic rule as a dictionary, simplified and with cheap conditions first,
+        or a dictionary with `status` "error" if the conditions contradict each other
+        or always hold, so the rule would not depend on the data
+        
+    Example:
+        >>> create_jsonlogic_from_intent({"operation": "AND", "conditions": [{"field": "age", "operator": "greaterThan", "value": 18}]},
+        ...                              tool_context)
+        {">": [{"var": "age"}, 18]}
+    """
+    operator_mode = tool_context.state.get("operator_mode", "portable")
+    rule = optimize_rule(intent_to_jsonlogic(parsed_intent, operator_mode))
+    if not isinstance(rule, dict):
+        # The optimizer reduced the whole rule to a constant, which is not a usable JSONLogic rule
+        outcome = "matches every record" if rule else "never matches any record"
+        return {
+            "status": "error",
+            "message": f"The conditions of this intent do not depend on the data: the rule {outcome}. "
+                       "Check the description for conditions that contradict each other or always hold, "
+                       "and explain this to the user instead of returning a rule.",
+            "constant_result": rule,
+        }
+    return rule
+
+async def create_validated_jsonlogic_from_intent(parsed_intent: Dict[str, Any], tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Convert the parsed intent structure to a JSONLogic rule and validate its fields against the schema.
+    
+    The `var` paths of the rule are validated locally, so the model does not need
+    separate turns to get and validate the fields. When all fields are valid, the
+    rule is the final response of the agent and the model is not called again.
+    
+    Args:
+        parsed_intent: The structured representation from the LLM
+        tool_context: Tool context with the session state and the schema artifact, provided by ADK
+        
+    Returns:
+        `{"status": "success", "rule": rule}` if all fields of the rule exist in the schema,
+        otherwise a dictionary with `status` "error", e.g. with the invalid fields and
+        suggested replacements. The rule is always wrapped, so ADK never wraps a
+        non-dictionary result and the caller can tell the rule from an error.
+        
+    Example:
+        >>> await create_validated_jsonlogic_from_intent({"field": "user.age", "operator": "greaterThan", "value": 18}, tool_context)
+        {"status": "success", "rule": {">": [{"var": "user.age"}, 18]}}
+        >>> await create_validated_jsonlogic_from_intent({"field": "user.agee", "operator": "greaterThan", "value": 18}, tool_context)
+        {
+            "status": "error",
+            "message": "Fields not in the schema: user.agee. Correct the intent and call this tool again.",
+            "invalid_fields": ["user.agee"],
+            "suggestions": {"user.agee": ["user.age"]}
+        }
+    """
+    rule = create_jsonlogic_from_intent(parsed_intent, tool_context)
+    if rule.get("status") == "error":
+        return rule
+
+    validation = validate_paths(await _load_field_index(tool_context), JSONLogicUtils.var_paths(rule))
+    if not validation["is_valid"]:
+        return {
+            "status": "error",
+            "message": f"Fields not in the schema: {', '.join(validation['invalid_fields'])}. "
+                       "Correct the intent and call this tool again.",
+            "invalid_fields": validation["invalid_fields"],
+            "suggestions": validation["suggestions"],
+        }
+    
+    # The tool result is the final response, without another model turn to repeat it
+    tool_context.actions.skip_summarization = True
+    return {"status": "success", "rule": rule}
+
+def intent_to_jsonlogic(parsed_intent: Dict[str, Any], operator_mode: str = "portable") -> Dict[str, Any]:
+    """
+    Translate the parsed intent structure to a JSONLogic rule of the same shape, without optimizing it.
+    
     Args:
         parsed_intent: The structured representation from the LLM
+        operator_mode: "portable" to use only standard JSONLogic operations, or "extended"
+            to use the native `length`, `starts_with`, `ends_with` and `is_empty` operations
         
     Returns:
         A JSONLogic rule as a dictionary
         
     Example:
-        >>> create_jsonlogic_from_intent({"operation": "AND", "conditions": [{"field": "age", "operator": "greaterThan", "value": 18}]})
+        >>> intent_to_jsonlogic({"operation": "AND", "conditions": [{"field": "age", "operator": "greaterThan", "value": 18}]})
         {"and": [{">": [{"var": "age"}, 18]}]}
     """
     # Map our standard intent operator names directly to JSONLogic operators
@@ -58,8 +149,14 @@ def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any
         "contains": "contains",
     }
     
+    if operator_mode not in OPERATOR_MODES:
+        raise ValueError(f"Unknown operator mode: {operator_mode} (expected one of {', '.join(OPERATOR_MODES)})")
+    extended = operator_mode == "extended"
+    
     # Helper function to create array length logic
     def create_length_logic(field):
+        if extended:
+            return {"length": {"var": field}}
         return {"reduce": [
             {"var": field},
             {"+": [1, {"var": "accumulator"}]},
@@ -97,8 +194,12 @@ def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any
                 
                 raise ValueError(f"BetweenOrEqual operation requires lower and upper bounds: {node}")
             elif jsonlogic_op == "empty":
+                if extended:
+                    return {"is_empty": {"var": field}}
                 return {"==": [{"var": field}, []]}
             elif jsonlogic_op == "notEmpty":
+                if extended:
+                    return {"!": {"is_empty": {"var": field}}}
                 return {"!=": [{"var": field}, []]}
             elif jsonlogic_op == "length":
                 # Just calculate array length
@@ -114,6 +215,8 @@ def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any
                 return {"<": [create_length_logic(field), value]}
             elif jsonlogic_op == "startsWith":
                 # Check if a string starts with a prefix
+                if extended:
+                    return {"starts_with": [{"var": field}, value]}
                 prefix = value
                 return {"and": [
                     {"var": field},  # Ensure field exists
@@ -124,6 +227,8 @@ def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any
                 ]}
             elif jsonlogic_op == "endsWith":
                 # Check if a string ends with a suffix
+                if extended:
+                    return {"ends_with": [{"var": field}, value]}
                 suffix = value
                 suffix_len = len(str(suffix))
                 return {"and": [
@@ -213,7 +318,7 @@ def create_jsonlogic_from_intent(parsed_intent: Dict[str, Any]) -> Dict[str, Any
         else:
             raise ValueError(f"Could not interpret parsed intent as JSONLogic: {parsed_intent}")
 
-def get_available_fields_from_schema(tool_context: ToolContext, filter_usable: bool = True) -> Dict[str, Any]:
+async def get_available_fields_from_schema(tool_context: ToolContext, filter_usable: bool = True) -> Dict[str, Any]:
     """
     Get all available fields from the data schema with their descriptions when available.
     
@@ -224,7 +329,7 @@ def get_available_fields_from_schema(tool_context: ToolContext, filter_usable: b
         Dictionary with status and a list of field information objects
         
     Example:
-        >>> get_available_fields_from_schema()
+        >>> await get_available_fields_from_schema(tool_context)
         {
             "status": "success", 
             "fields": [
@@ -243,156 +348,80 @@ def get_available_fields_from_schema(tool_context: ToolContext, filter_usable: b
             ]
         }
     """
-    field_info = tool_context.state.get("field_info", [])
-    if not field_info:
-        schema_artifact = tool_context.load_artifact("schema.json")
-        if schema_artifact and schema_artifact.text:
-            field_info = _extract_field_info(schema_artifact.text)
-            tool_context.state["field_info"] = field_info
+    field_index = await _load_field_index(tool_context)
     
     if filter_usable:
-        # Filter the field list to include only those usable in JSONLogic operations
-        usable_fields = []
-        for field in field_info:
-            # Skip fields that are objects without value-related properties
-            if field.get("type") == "object" and not any(k in field for k in ["values", "range"]):
-                continue
-                
-            # Skip fields with a wildcard in the name (these are usually container patterns)
-            if ".*" in field.get("name", ""):
-                continue
-                
-            # Skip parent object paths (e.g., "questions.productUsage" when "questions.productUsage.usageFrequency" exists)
-            is_parent_path = False
-            for other_field in field_info:
-                if other_field["name"] != field["name"] and other_field["name"].startswith(field["name"] + "."):
-                    is_parent_path = True
-                    break
-                    
-            if not is_parent_path:
-                # This appears to be a leaf field or terminal value
-                usable_fields.append(field)
-        
+        # Only fields that can be used directly in JSONLogic operations, precomputed by the index
         return {
             "status": "success",
-            "fields": usable_fields
+            "fields": usable_fields(field_index)
         }
     
     # Return all fields if not filtering
     return {
         "status": "success",
-        "fields": field_info
+        "fields": field_index["fields"]
     }
 
-def validate_fields_from_jsonlogic(fields: List[str], tool_context: ToolContext) -> Dict[str, Any]:
+async def validate_fields_from_jsonlogic(fields: List[str], tool_context: ToolContext) -> Dict[str, Any]:
     """
     Validate that JSONLogic 'var' fields exist in the schema.
     
+    Array indices may appear at any depth (e.g., orders.0.items.2.price) and are
+    matched against the array item fields of the schema.
+    
     Args:
         fields: List of fields to validate
         
     Returns:
-        Dictionary with validation results
+        Dictionary with validation results and suggested replacements for invalid fields
+        
+    Example:
+        >>> await validate_fields_from_jsonlogic(["questions.satisfaction.overalSatisfaction.response"], tool_context)
+        {
+            "is_valid": False,
+            "invalid_fields": ["questions.satisfaction.overalSatisfaction.response"],
+            "suggestions": {
+                "questions.satisfaction.overalSatisfaction.response": ["questions.satisfaction.overallSatisfaction.response"]
+            }
+        }
     """
-    field_info = tool_context.state.get("field_info", [])
-    if not field_info:
-        schema_artifact = tool_context.load_artifact("schema.json")
-        if schema_artifact and schema_artifact.text:
-            field_info = _extract_field_info(schema_artifact.text)
-            tool_context.state["field_info"] = field_info
-    
-    # Extract field names and their types for validation
-    available_fields = {field["name"]: field.get("type", "") for field in field_info}
+    field_index = await _load_field_index(tool_context)
+    return validate_paths(field_index, fields)
 
-    invalid_fields = []
-    for field in fields:
-        # Handle array indexing with dot notation (e.g., object.array.0)
-        if '.' in field:
-            # Split by dots to handle nested paths
-            parts = field.split('.')
-            
-            # Check if last part is a numeric index
-            if parts[-1].isdigit():
-                # Remove the index and check if the base path exists and is an array
-                base_field = '.'.join(parts[:-1])
-                if base_field in available_fields and available_fields[base_field] == "array":
-                    continue
-            
-        # If it's not a valid array index reference, do a regular check
-        if field not in available_fields:
-            invalid_fields.append(field)
-            
-    return {
-        "is_valid": len(invalid_fields) == 0,
-        "invalid_fields": invalid_fields
-    }
-
-def _extract_field_info(schema: str) -> List[Dict[str, Any]]:
+async def _load_field_index(tool_context: ToolContext) -> Dict[str, Any]:
     """
-    Extract field information including names, descriptions, and types from the schema.
+    Get the field index for the session schema from the shared schema registry.
+    
+    The session state only holds the schema hash. The schema artifact is loaded
+    and parsed only when no session has registered the same schema yet.
     
     Args:
-        schema: JSON schema as a string
+        tool_context: Tool context with the session state and the schema artifact
         
     Returns:
-        List of field information objects with name, description, and type
+        Field index as built by `build_field_index`
     """
-    field_info = []  # List to store field information objects
-    
-    def extract_fields(schema, path=""):
-        if not isinstance(schema, dict):
-            return
+    digest = tool_context.state.get("schema_hash")
+    field_index = schema_registry.get(digest) if digest else None
+    if field_index is None:
+        schema_artifact = await tool_context.load_artifact("schema.json")
+        if not (schema_artifact and schema_artifact.text):
+            return build_field_index([])
         
-        # Extract field description and other metadata
-        field_data = {
-            "name": path
-        }
-        
-        # Add description if available
-        if "description" in schema:
-            field_data["description"] = schema["description"]
-            
-        # Add type information
-        if "type" in schema:
-            field_data["type"] = schema["type"]
-            
-        # Add enum values if available
-        if "enum" in schema:
-            field_data["values"] = schema["enum"]
-            
-        # Add range for numeric types
-        if "minimum" in schema and "maximum" in schema:
-            field_data["range"] = [schema["minimum"], schema["maximum"]]
-            
-        # Add the field info if we have a path (skip the root)
-        if path:
-            field_info.append(field_data)
-        
-        # Process properties
-        if "properties" in schema:
-            for prop_name, prop_schema in schema["properties"].items():
-                field_path = f"{path}.{prop_name}" if path else prop_name
-                extract_fields(prop_schema, field_path)
-        
-        # Handle object without properties
-        if schema.get("type") == "object" and "properties" not in schema:
-            field_info.append({
-                "name": f"{path}.*",
-                "description": "Dynamic object with arbitrary properties",
-                "type": "object"
-            })
-        
-        # Handle arrays
-        if schema.get("type") == "array" and "items" in schema:
-            # Add the array field itself
-            field_data["type"] = "array"
-            
-            # If array items have properties, process them
-            if isinstance(schema["items"], dict):
-                if "properties" in schema["items"]:
-                    extract_fields(schema["items"], f"{path}.*")
+        digest, field_index = schema_registry.register(schema_artifact.text, _extract_field_info)
+        tool_context.state["schema_hash"] = digest
+    return field_index
 
-    schema_dict = json.loads(schema)
-    extract_fields(schema_dict)
+def _extract_field_info(schema: SchemaSource) -> List[Dict[str, Any]]:
+    """
+    Extract field information including names, descriptions, and types from the schema.
     
-    return sorted(field_info, key=lambda x: x["name"])
+    Args:
+        schema: JSON schema as text or bytes, a file path (a string not starting with `{`, or an
+            `os.PathLike`), a readable stream, or a parsed dictionary
+        
+    Returns:
+        List of field information objects with name, description, and type
+    """
+    return extract_field_info(schema)
@@ -0,0 +1,223 @@
+"""
+Latency and token metrics of agent runs.
+
+`process_agent_response` passes every event of a run to a `RequestMetrics`,
+which times the run from the events as they arrive:
+
+- time to first event: from sending the request to the first event
+- model turn latency: from the request, or the previous tool results, to the
+  next model response
+- tool execution time: from a model response with a function call to the event
+  with its result
+- time to rule: from the request to the final answer being handed over for
+  parsing, earlier than the end of the run when responses are streamed
+- token counts: from the usage metadata of the model responses
+
+A `MetricsRecorder` collects the metrics of all runs, optionally writes each one
+as a JSON line, and summarizes them with percentiles at the end of a CLI run.
+"""
+
+import json
+import math
+import time
+import uuid
+from typing import Any, Dict, List, Optional, TextIO
+
+from google.adk.events import Event
+
+# Metrics summarized by MetricsRecorder, with their unit
+SUMMARY_METRICS = {
+    "total_seconds": "s",
+    "first_event_seconds": "s",
+    "rule_seconds": "s",
+    "model_turn_seconds": "s",
+    "tool_seconds": "s",
+    "model_turns": "",
+    "prompt_tokens": "",
+    "output_tokens": "",
+}
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Args:
+        values: The values, in any order
+        percent: Percentile between 0 and 100
+
+    Returns:
+        The smallest value that is greater than or equal to `percent` percent of the values
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class RequestMetrics:
+    """
+    Timings and token counts of one agent run.
+
+    Example:
+        >>> metrics = RequestMetrics("Find users over 30")
+        >>> async for event in runner.run_async(...):
+        ...     metrics.observe(event)
+        >>> metrics.finish()
+        >>> metrics.to_dict()["model_turns"]
+        3
+    """
+
+    def __init__(self, request: str, session_id: Optional[str] = None):
+        """
+        Start timing a run.
+
+        Args:
+            request: Text of the request sent to the agent
+            session_id: Session the request runs in
+        """
+        # Also set on the log records of the run (see `utils.logging.log_context`)
+        self.request_id = uuid.uuid4().hex
+        self.request = request
+        self.session_id = session_id
+        self.started = time.perf_counter()
+        self.first_event_seconds: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+        self.rule_seconds: Optional[float] = None
+        self.model_turn_seconds: List[float] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        # Start of the current model turn, and start times of tool calls waiting for their result
+        self._turn_started = self.started
+        self._pending_calls: Dict[str, float] = {}
+
+    def observe(self, event: Event):
+        """Update the metrics with an event of the run, as soon as it arrives."""
+        now = time.perf_counter()
+        if self.first_event_seconds is None:
+            self.first_event_seconds = now - self.started
+        if event.partial:
+            return
+
+        if event.usage_metadata:
+            self.prompt_tokens += event.usage_metadata.prompt_token_count or 0
+            self.output_tokens += event.usage_metadata.candidates_token_count or 0
+
+        responses = event.get_function_responses()
+        if responses:
+            for response in responses:
+                called = self._pending_calls.pop(response.id or response.name, self._turn_started)
+                self.tool_calls.append({"name": response.name, "seconds": now - called})
+            # The next model turn is sent with the tool results
+            self._turn_started = now
+        elif event.author != "user" and event.content:
+            self.model_turn_seconds.append(now - self._turn_started)
+            self._turn_started = now
+            for call in event.get_function_calls():
+                self._pending_calls[call.id or call.name] = now
+
+    def rule_ready(self):
+        """Record that the final answer is ready to be parsed."""
+        if self.rule_seconds is None:
+            self.rule_seconds = time.perf_counter() - self.started
+
+    def finish(self):
+        """Stop timing the run."""
+        self.total_seconds = time.perf_counter() - self.started
+
+    @property
+    def model_turns(self) -> int:
+        return len(self.model_turn_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Metrics as a JSON-serializable dictionary."""
+        return {
+            "request_id": self.request_id,
+            "request": self.request,
+            "session_id": self.session_id,
+            "total_seconds": self.total_seconds,
+            "first_event_seconds": self.first_event_seconds,
+            "rule_seconds": self.rule_seconds,
+            "model_turns": self.model_turns,
+            "model_turn_seconds": self.model_turn_seconds,
+            "tool_calls": self.tool_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+    def describe(self) -> str:
+        """One-line description of the run."""
+        tool_seconds = sum(call["seconds"] for call in self.tool_calls)
+        rule = f" (rule after {self.rule_seconds:.2f}s)" if self.rule_seconds is not None else ""
+        return (f"Agent run: {self.total_seconds or 0:.2f}s{rule}, {self.model_turns} model turns "
+                f"({sum(self.model_turn_seconds):.2f}s), {len(self.tool_calls)} tool calls ({tool_seconds:.2f}s), "
+                f"{self.prompt_tokens} prompt / {self.output_tokens} output tokens")
+
+class MetricsRecorder:
+    """
+    Collects the metrics of agent runs and summarizes them.
+
+    Example:
+        >>> recorder = MetricsRecorder(open("metrics.jsonl", "w"))
+        >>> recorder.record(metrics)  # writes one JSON line
+        >>> print(recorder.format_summary())
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """
+        Args:
+            stream: Text stream receiving one JSON line per recorded run, if given
+        """
+        self.stream = stream
+        self.requests: List[RequestMetrics] = []
+
+    def record(self, metrics: RequestMetrics):
+        """Add the metrics of a finished run."""
+        self.requests.append(metrics)
+        if self.stream:
+            line = dict(metrics.to_dict(), timestamp=time.time())
+            self.stream.write(json.dumps(line) + "\n")
+            self.stream.flush()
+
+    def summary(self, requests: Optional[List[RequestMetrics]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Percentiles of each metric in `SUMMARY_METRICS`.
+
+        Model turn and tool latencies are summarized per turn and per tool call,
+        the other metrics per run.
+
+        Args:
+            requests: Runs to summarize. Defaults to all recorded runs.
+
+        Returns:
+            For each metric with at least one value, its count, p50, p95 and p99
+        """
+        requests = self.requests if requests is None else requests
+        values = {
+            "total_seconds": [metrics.total_seconds for metrics in requests if metrics.total_seconds is not None],
+            "first_event_seconds": [metrics.first_event_seconds for metrics in requests if metrics.first_event_seconds is not None],
+            "rule_seconds": [metrics.rule_seconds for metrics in requests if metrics.rule_seconds is not None],
+            "model_turn_seconds": [seconds for metrics in requests for seconds in metrics.model_turn_seconds],
+            "tool_seconds": [call["seconds"] for metrics in requests for call in metrics.tool_calls],
+            "model_turns": [metrics.model_turns for metrics in requests],
+            "prompt_tokens": [metrics.prompt_tokens for metrics in requests],
+            "output_tokens": [metrics.output_tokens for metrics in requests],
+        }
+
+        return {
+            name: {
+                "count": len(metric_values),
+                "p50": percentile(metric_values, 50),
+                "p95": percentile(metric_values, 95),
+                "p99": percentile(metric_values, 99),
+            }
+            for name, metric_values in values.items() if metric_values
+        }
+
+    def format_summary(self, requests: Optional[List[RequestMetrics]] = None) -> str:
+        """Summary of the recorded runs as a text table."""
+        summary = self.summary(requests)
+        lines = [f"{'metric':<22} {'count':>6} {'p50':>10} {'p95':>10} {'p99':>10}"]
+        for name, stats in summary.items():
+            unit = SUMMARY_METRICS[name]
+            cells = [f"{stats[key]:.3f}{unit}" if unit else f"{stats[key]:.0f}" for key in ("p50", "p95", "p99")]
+            lines.append(f"{name:<22} {stats['count']:>6} " + " ".join(f"{cell:>10}" for cell in cells))
+        return "\n".join(lines)
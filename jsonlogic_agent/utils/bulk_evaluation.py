@@ -0,0 +1,114 @@
+"""
+Utilities for evaluating a JSONLogic rule against large JSONL datasets.
+
+Records are streamed from the input one line at a time and grouped into chunks.
+Chunks are evaluated in a process pool, with only a bounded number of chunks in
+flight, so memory use does not depend on the size of the input.
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, TextIO
+
+from json_logic.builtins import to_bool
+
+from utils.jsonlogic_compiler import compile_rule, compile_var_path
+from utils.jsonlogic_optimizer import optimize_rule
+
+# Rule and ID getter compiled once per worker process by `_init_worker`
+_worker_rule = None
+_worker_id = None
+
+def read_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[List[bytes]]:
+    """
+    Lazily split a JSONL stream into chunks of record lines.
+
+    Args:
+        stream: A binary stream with one JSON record per line
+        chunk_size: Maximum number of lines per chunk
+
+    Returns:
+        An iterator over lists of non-blank lines
+    """
+    lines = (line for line in stream if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def evaluate_jsonl(rule: Dict[str, Any],
+                   input_stream: BinaryIO,
+                   output_stream: TextIO,
+                   *,
+                   id_field: Optional[str] = None,
+                   workers: Optional[int] = None,
+                   chunk_size: int = 10_000) -> Dict[str, int]:
+    """
+    Evaluate a rule against every record of a JSONL stream.
+
+    With `id_field`, the ID of each matching record is written to the output, one
+    per line. Otherwise `true` or `false` is written for every record, in input order.
+
+    Args:
+        rule: The JSONLogic rule to evaluate
+        input_stream: A binary stream with one JSON record per line
+        output_stream: Text stream for the results
+        id_field: Dot-notation path of the record ID to output for matches
+        workers: Number of worker processes (default: CPU count)
+        chunk_size: Number of records sent to a worker at a time
+
+    Returns:
+        Dictionary with the number of records evaluated and matched
+    """
+    workers = workers or os.cpu_count() or 1
+    # Enough chunks in flight to keep every worker busy while results are written
+    max_in_flight = workers * 2
+
+    stats = {"records": 0, "matches": 0}
+    pending = deque()
+
+    def write_next():
+        count, matches, lines = pending.popleft().result()
+        stats["records"] += count
+        stats["matches"] += matches
+        output_stream.writelines(lines)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rule, id_field)) as executor:
+        for chunk in read_chunks(input_stream, chunk_size):
+            if len(pending) >= max_in_flight:
+                write_next()
+            pending.append(executor.submit(_evaluate_chunk, chunk))
+
+        while pending:
+            write_next()
+
+    output_stream.flush()
+    return stats
+
+def _init_worker(rule: Dict[str, Any], id_field: Optional[str]):
+    global _worker_rule, _worker_id
+    # Only the truth value of the rule is used to select records
+    _worker_rule = compile_rule(optimize_rule(rule, as_condition=True))
+    _worker_id = compile_var_path(id_field) if id_field else None
+
+def _evaluate_chunk(lines: List[bytes]):
+    """Evaluate one chunk of record lines, returning the record count, match count and output lines."""
+    matches = 0
+    output = []
+
+    for line in lines:
+        record = json.loads(line)
+        matched = to_bool(_worker_rule(record))
+        matches += matched
+
+        if _worker_id is None:
+            output.append("true\n" if matched else "false\n")
+        elif matched:
+            record_id = _worker_id(record)
+            output.append(f"{record_id if isinstance(record_id, str) else json.dumps(record_id)}\n")
+
+    return len(lines), matches, output
@@ -1,30 +1,62 @@
-"""Utilities for loading test data from JSON files"""
+"""
+Utilities for loading test data from JSON files
+
+Each data file is parsed once and the parsed data is shared by all getters, so
+loading the schema, sample data, descriptions and expected results of a data
+type reads the file once. A file is parsed again only when it changes on disk.
+The returned values are shared: copy them before modifying.
+
+Large sample sets are read from external files with `SampleSet`, which iterates
+the records lazily instead of holding them in memory.
+"""
 import json
+import mmap
 import os
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+# Parsed data files by path, with the modification time they were parsed at
+_parsed: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_parsed_lock = threading.Lock()
+
+def data_path(data_type: str) -> str:
+    """Path of the JSON file of a data type in the data folder"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(current_dir), "data")
+    return os.path.join(data_dir, f"{data_type}.json")
 
 def load_test_data(data_type: str) -> Dict[str, Any]:
     """
-    Load test data from a JSON file
-    
+    Load test data from a JSON file, parsing it only on the first call or after it changed
+
     Args:
         data_type: The type of data to load (e.g., "userdata", "survey")
-        
+
     Returns:
-        A dictionary containing the test data
+        A dictionary containing the test data, shared by all callers
     """
-    # Determine path to JSON file
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(os.path.dirname(current_dir), "data")
-    json_path = os.path.join(data_dir, f"{data_type}.json")
-    
+    json_path = data_path(data_type)
+
     # Check if file exists
-    if not os.path.exists(json_path):
+    try:
+        modified = os.stat(json_path).st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(f"Test data file not found: {json_path}")
-    
-    # Load and return the data
-    with open(json_path, 'r') as f:
-        return json.load(f)
+
+    with _parsed_lock:
+        cached = _parsed.get(json_path)
+        if cached and cached[0] == modified:
+            return cached[1]
+
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        _parsed[json_path] = (modified, data)
+        return data
+
+def clear_test_data_cache():
+    """Forget all parsed data files, e.g. after changing them within the same second"""
+    with _parsed_lock:
+        _parsed.clear()
 
 def get_schema(data_type: str) -> Dict[str, Any]:
     """Get schema from test data"""
@@ -41,4 +73,65 @@ def get_descriptions(data_type: str) -> list:
 def get_expected_results(data_type: str, named_set="primary") -> Optional[Dict[str, Any]]:
     """Get expected results from test data if available"""
     data = load_test_data(data_type)
-    return data.get("expected_results", {}).get(named_set, {})
\ No newline at end of file
+    return data.get("expected_results", {}).get(named_set, {})
+
+class SampleSet:
+    """
+    Records of an external sample file, read lazily on each iteration.
+
+    JSONL files (one record per line) are streamed, so their size is not limited
+    by memory. With `use_mmap`, the file is memory-mapped and lines are sliced
+    from the mapping, leaving the buffering to the operating system's page cache,
+    which keeps repeated passes over the same large file fast. Other files are
+    parsed as JSON: an array of records, or a single record.
+
+    Example:
+        >>> samples = SampleSet("users.jsonl", use_mmap=True)
+        >>> sum(1 for record in samples if record["user"]["age"] > 30)
+        18213
+    """
+
+    def __init__(self, path: str, use_mmap: bool = False):
+        """
+        Args:
+            path: Path of a .jsonl/.ndjson file, or a .json file
+            use_mmap: Whether to memory-map JSONL files instead of reading them through a buffer
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Sample file not found: {path}")
+        self.path = path
+        self.use_mmap = use_mmap
+        self.is_jsonl = os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson")
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self.is_jsonl:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return iter(data if isinstance(data, list) else [data])
+        return self._iter_mmap() if self.use_mmap else self._iter_lines()
+
+    def _iter_lines(self) -> Iterator[Any]:
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _iter_mmap(self) -> Iterator[Any]:
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be mapped
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = 0
+                size = len(mapped)
+                while start < size:
+                    end = mapped.find(b"\n", start)
+                    if end < 0:
+                        end = size
+                    line = mapped[start:end]
+                    if line.strip():
+                        yield json.loads(line)
+                    start = end + 1
@@ -1,15 +1,25 @@
 import json
-import re
 import logging
-from typing import Callable, Awaitable, TypeVar, Optional, Dict, Any
+from typing import Callable, Awaitable, TypeVar, Optional, Dict, Any, List
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
 from google.genai import types
 
+from utils.agent_metrics import RequestMetrics
+from utils.event_sinks import Record, event_records, format_record, text_record
+from utils.json_extract import extract_json, StreamingJsonExtractor
+from utils.logging import log_context
+
 T = TypeVar('T')  # Return type for the final response processor
 
+_PENDING = object()  # No final response has been processed yet
+
 async def extract_json_from_response(response: str) -> dict:
     """
     Extract JSON from LLM response with improved error handling
+
+    The response is scanned once for balanced JSON objects, preferring the
+    `/*FINAL_ANSWER*/` section and code fences (see `utils.json_extract`).
     
     Args:
         response: The raw text response from the agent
@@ -21,26 +31,7 @@ async def extract_json_from_response(response: str) -> dict:
         ValueError: If no valid JSON could be extracted
     """
     try:
-        # First try parsing as full JSON if possible
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Look for code block with JSON content
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response)
-            if json_match:
-                return json.loads(json_match.group(1))
-            
-            # Look for JSON wrapped in FINAL_ANSWER markers
-            final_answer_match = re.search(r'/\*FINAL_ANSWER\*/\s*([\s\S]*?)\s*(?:/\*END\*/|$)', response)
-            if final_answer_match:
-                return json.loads(final_answer_match.group(1))
-            
-            # Try to extract any JSON-like structure
-            json_match = re.search(r'({[\s\S]*?})', response)
-            if json_match:
-                return json.loads(json_match.group(1))
-            
-            raise ValueError("No valid JSON found in response")
+        return extract_json(response)
     except Exception as e:
         logging.error(f"Failed to parse response: {response}")
         raise ValueError(f"Failed to parse JSON from agent response: {e}\nResponse: {response}")
@@ -52,7 +43,11 @@ async def process_agent_response(
     session_id: str,
     content: types.Content,
     on_final_response: Callable[[str], Awaitable[T]],
-    verbose: bool = True
+    verbose: bool = True,
+    write: Callable[[str], Any] = print,
+    metrics: Optional[RequestMetrics] = None,
+    streaming: bool = False,
+    emit: Optional[Callable[[Record], Any]] = None
 ) -> Optional[T]:
     """
     Process agent responses with a callback for the final response
@@ -64,53 +59,114 @@ async def process_agent_response(
         content: Content to send to the agent
         on_final_response: Callback for processing the final text response
         verbose: Whether to print event processing information
+        write: Function that prints a line of output, e.g. to buffer the output of concurrent runs
+        metrics: Metrics that observe every event of the run, finished when the run ends
+        streaming: Whether to stream the model responses, and call on_final_response with the
+            JSON object of the final answer as soon as it is complete. The rest of the run is still
+            consumed, so the session keeps the whole response.
+        emit: Function receiving the output as records (see `utils.event_sinks`), e.g.
+            `EventPipeline.emit`. Defaults to formatting the records and passing them to `write`.
         
     Returns:
         The result from on_final_response callback
     """
-    try:
-        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
-            # Handle planning thoughts (if verbose)
-            if verbose and event.content and event.content.parts:
-                response_thought_raw = "".join([
-                    part.text for part in event.content.parts 
-                    if hasattr(part, 'text') and part.text and part.text.strip() 
-                    and hasattr(part, 'thought') and part.thought
-                ])
-                planning_match = re.search(r'/\*(RE)?PLANNING\*/(.+?)/\*ACTION\*/', response_thought_raw, re.DOTALL)
-                if planning_match:
-                    planning_thought = planning_match.group(2).strip()
-                    print(f"  Planning:\n{planning_thought}\n")
-            
-                reasoning_match = re.search(r'/\*REASONING\*/(.+?)/\*ACTION\*/', response_thought_raw, re.DOTALL)
-                if reasoning_match:
-                    reasoning_thought = reasoning_match.group(1).strip()
-                    print(f"  Reasoning:\n{reasoning_thought}\n")
-
-            # Handle tool calls (if verbose)
-            if verbose and event.get_function_calls():
-                func_calls = event.get_function_calls()
-                print(f"  Tool Call: {func_calls[0].name}({func_calls[0].args})\n")
-            elif verbose and event.get_function_responses():
-                func_responses = event.get_function_responses()
-                print(f"  Tool Result: {func_responses[0].name} -> {func_responses[0].response})\n")
-                
-            # Process final response
-            if event.is_final_response() and event.content and event.content.parts:
-                response_text = "".join([
-                    part.text for part in event.content.parts 
-                    if hasattr(part, 'text') and part.text and part.text.strip()
-                ])
+    if emit is None:
+        emit = lambda record: write(format_record(record))
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE) if streaming else None
+    extractor = StreamingJsonExtractor() if streaming else None
+    result = _PENDING
+
+    # Log records of the run carry its request and session IDs
+    with log_context(request_id=metrics.request_id if metrics else None, session_id=session_id):
+        try:
+            async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content, run_config=run_config):
+                if metrics:
+                    metrics.observe(event)
+
+                # Parse partial responses as they arrive; everything else waits for the complete response
+                if event.partial:
+                    if extractor and result is _PENDING and event.content and event.content.parts:
+                        answer_text = feed_parts(extractor, event.content.parts)
+                        if answer_text is not None:
+                            if metrics:
+                                metrics.rule_ready()
+                            result = await on_final_response(answer_text)
+                    continue
+                if extractor and result is _PENDING:
+                    extractor.reset()
+
+                # Report planning, reasoning, tool calls and tool results (if verbose)
+                if verbose:
+                    for record in event_records(event):
+                        emit(record)
+
+                # Process final response
+                if event.is_final_response() and event.content and event.content.parts:
+                    if metrics:
+                        metrics.finish()
+                    if result is not _PENDING:
+                        return result
+
+                    response_text = "".join([
+                        part.text for part in event.content.parts 
+                        if hasattr(part, 'text') and part.text and part.text.strip()
+                    ])
+                    if not response_text.strip() and event.get_function_responses():
+                        # A tool that skips summarization answers with its result, e.g. the fast-path agent
+                        response_text = json.dumps(tool_answer(event.get_function_responses()[0].response))
                 
-                return await on_final_response(response_text.strip())
+                    if metrics:
+                        metrics.rule_ready()
+                    return await on_final_response(response_text.strip())
         
-        # If we get here, no final response was received
-        if verbose:
-            print("Warning: No final response received from agent")
-        return None
+            # If we get here, no final response was received
+            if metrics:
+                metrics.finish()
+            if result is not _PENDING:
+                return result
+            if verbose:
+                emit(text_record("Warning: No final response received from agent"))
+            return None
         
-    except Exception as e:
-        logging.error(f"Error during agent response processing: {e}")
-        if verbose:
-            print(f"❌ ERROR: {e}")
-        return None
\ No newline at end of file
+        except Exception as e:
+            logging.error(f"Error during agent response processing: {e}")
+            if metrics:
+                metrics.finish()
+            if verbose:
+                emit(text_record(f"❌ ERROR: {e}"))
+            return None
+
+def feed_parts(extractor: StreamingJsonExtractor, parts: List[types.Part]) -> Optional[str]:
+    """
+    Feed the text parts of a partial response to a streaming extractor.
+
+    A planner may split `/*FINAL_ANSWER*/` out of the text, leaving the answer as a
+    text part right after a thought part, so that also starts the answer.
+
+    Returns:
+        The text of the answer object once it is complete, otherwise None
+    """
+    previous_thought = False
+    for part in parts:
+        if not part.text:
+            continue
+        answer_text = extractor.feed(part.text, answer=previous_thought and not part.thought)
+        if answer_text is not None:
+            return answer_text
+        previous_thought = bool(part.thought)
+    return None
+
+def tool_answer(response: Any) -> Any:
+    """
+    The answer in the result of a tool that ends the run, e.g. `create_validated_jsonlogic_from_intent`.
+
+    The rule of a `{"status": "success", "rule": ...}` result is returned. ADK wraps
+    results that are not dictionaries as `{"result": ...}`, and the wrapped value is
+    returned instead of the wrapper. Other results, such as errors, are returned as they are.
+    """
+    if isinstance(response, dict):
+        if response.get("status") == "success" and "rule" in response:
+            return response["rule"]
+        if list(response) == ["result"]:
+            return response["result"]
+    return response
@@ -0,0 +1,234 @@
+"""
+Event records of agent runs and the sinks that receive them.
+
+`process_agent_response` turns the events of a run into records: plain
+dictionaries with a `kind` ("text", "planning", "reasoning", "tool_call" or
+"tool_result") and the fields of that kind. Records are passed to an
+`EventPipeline`, which queues them and hands them to its sinks in batches, in a
+worker thread, so a slow terminal or disk never stalls the event loop running
+the agent.
+
+Sinks:
+
+- `ConsoleSink`: prints records as the CLI always has
+- `JsonlSink`: appends records to a file as JSON lines
+- `CollectorSink`: keeps records in memory, e.g. for tests or notebooks
+
+Example:
+    >>> async with EventPipeline([ConsoleSink(), JsonlSink("events.jsonl")]) as pipeline:
+    ...     await process_agent_response(runner, user_id, session_id, content, on_final_response, emit=pipeline.emit)
+    ...     pipeline.write("Done")
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from google.adk.events import Event
+
+Record = Dict[str, Any]
+
+# Section markers of PlanReAct thoughts, found in one pass over the thought text
+_SECTION_MARKER = re.compile(r'/\*(PLANNING|REPLANNING|REASONING|ACTION|FINAL_ANSWER)\*/')
+# Sections reported as records, each up to the /*ACTION*/ marker that ends it
+THOUGHT_SECTIONS = {"PLANNING": "planning", "REPLANNING": "planning", "REASONING": "reasoning"}
+
+def text_record(text: str) -> Record:
+    """Record of a line of output text."""
+    return {"kind": "text", "text": text, "timestamp": time.time()}
+
+def parse_thought_sections(thought: str) -> List[Record]:
+    """
+    Find the planning and reasoning sections of a PlanReAct thought.
+
+    The markers are matched once, left to right, and each section is the text
+    between its marker and the `/*ACTION*/` marker right after it. The first
+    section of each kind is returned.
+
+    Args:
+        thought: Text of the thought parts of a model response
+
+    Returns:
+        Records of kind "planning" and "reasoning", in order of their position
+
+    Example:
+        >>> parse_thought_sections("/*PLANNING*/\\n1. Get the fields\\n/*ACTION*/\\n")
+        [{'kind': 'planning', 'text': '1. Get the fields'}]
+    """
+    if "/*" not in thought:
+        return []
+
+    sections: Dict[str, str] = {}
+    markers = list(_SECTION_MARKER.finditer(thought))
+    for marker, next_marker in zip(markers, markers[1:]):
+        kind = THOUGHT_SECTIONS.get(marker.group(1))
+        if kind and kind not in sections and next_marker.group(1) == "ACTION":
+            text = thought[marker.end():next_marker.start()].strip()
+            if text:
+                sections[kind] = text
+    return [{"kind": kind, "text": text} for kind, text in sections.items()]
+
+def event_records(event: Event) -> List[Record]:
+    """
+    Records of the thoughts, tool calls and tool results of an event.
+
+    Args:
+        event: A complete (not partial) event of an agent run
+
+    Returns:
+        The records, each with the author, invocation ID and timestamp of the event
+    """
+    records = []
+    parts = event.content.parts if event.content and event.content.parts else []
+    thought = "".join(part.text for part in parts if part.thought and part.text)
+    if thought:
+        records.extend(parse_thought_sections(thought))
+
+    calls = event.get_function_calls()
+    if calls:
+        records.extend({"kind": "tool_call", "name": call.name, "args": call.args} for call in calls)
+    else:
+        records.extend({"kind": "tool_result", "name": response.name, "response": response.response}
+                       for response in event.get_function_responses())
+
+    for record in records:
+        record.update(author=event.author, invocation_id=event.invocation_id, timestamp=event.timestamp)
+    return records
+
+def format_record(record: Record) -> str:
+    """Console text of a record."""
+    kind = record["kind"]
+    if kind == "planning":
+        return f"  Planning:\n{record['text']}\n"
+    if kind == "reasoning":
+        return f"  Reasoning:\n{record['text']}\n"
+    if kind == "tool_call":
+        return f"  Tool Call: {record['name']}({record['args']})\n"
+    if kind == "tool_result":
+        return f"  Tool Result: {record['name']} -> {record['response']})\n"
+    return record["text"]
+
+def print_record(record: Record):
+    """Print a record right away, without a pipeline."""
+    print(format_record(record))
+
+class EventSink:
+    """Receives batches of records in the worker thread of an `EventPipeline`."""
+
+    def handle(self, records: List[Record]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class ConsoleSink(EventSink):
+    """Prints records to a text stream, stdout by default."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def handle(self, records: List[Record]):
+        stream = self.stream or sys.stdout
+        stream.write("".join(format_record(record) + "\n" for record in records))
+        stream.flush()
+
+class JsonlSink(EventSink):
+    """Appends records to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stream = open(path, "a", encoding="utf-8")
+
+    def handle(self, records: List[Record]):
+        # Tool arguments and results may hold values JSON has no type for
+        self.stream.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+class CollectorSink(EventSink):
+    """Keeps every record in `records`."""
+
+    def __init__(self):
+        self.records: List[Record] = []
+
+    def handle(self, records: List[Record]):
+        self.records.extend(records)
+
+class EventPipeline:
+    """
+    Queue of records delivered to sinks by a background task.
+
+    `emit` only puts the record on a queue and returns. A task started on the
+    first record takes everything queued so far and hands the batch to the sinks
+    in a worker thread, so the event loop keeps running while they write. Records
+    reach the sinks in the order they were emitted.
+    """
+
+    def __init__(self, sinks: Iterable[EventSink]):
+        """
+        Args:
+            sinks: Sinks receiving every record
+        """
+        self.sinks = list(sinks)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def emit(self, record: Record):
+        """Queue a record for the sinks. Must be called from the event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._deliver())
+        self._queue.put_nowait(record)
+
+    def write(self, text: str):
+        """Queue a line of output text."""
+        self.emit(text_record(text))
+
+    async def flush(self):
+        """Wait until every queued record has been handled by the sinks."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Handle the queued records, stop the background task and close the sinks."""
+        if self._task is not None:
+            await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sink in self.sinks:
+            sink.close()
+
+    async def __aenter__(self) -> "EventPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _deliver(self):
+        while True:
+            records = [await self._queue.get()]
+            while not self._queue.empty():
+                records.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._handle, records)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _handle(self, records: List[Record]):
+        for sink in self.sinks:
+            try:
+                sink.handle(records)
+            except Exception as e:
+                # One failing sink should not keep the records from the others
+                logging.error(f"Event sink {type(sink).__name__} failed: {e}")
@@ -0,0 +1,201 @@
+"""
+Prefix-tree index over the dot-notation field paths of a schema.
+
+The index is built once from the output of `_extract_field_info` and answers the
+questions the tools ask on every call without scanning the whole field list:
+which fields are usable leaves, what the children of a path are, and whether a
+path is an array. It is made of plain dictionaries and lists so it can be kept
+in session state.
+
+Paths are validated against the index with array item patterns (`x.*.y`)
+matching any numeric index, so `x.0.y` and `x.12.y` resolve to the same field.
+"""
+
+import difflib
+from typing import Any, Dict, Iterable, List, Optional
+
+def build_field_index(field_info: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a field index from a list of field information objects.
+
+    Args:
+        field_info: Field information objects as returned by `_extract_field_info`
+
+    Returns:
+        Dictionary with the original `fields`, the path `trie`, and the positions of the `usable` fields
+    """
+    root = _new_node()
+    nodes = []
+
+    for position, field in enumerate(field_info):
+        node = root
+        for segment in field["name"].split("."):
+            node = node["children"].setdefault(segment, _new_node())
+        node["field"] = position
+        nodes.append(node)
+
+    usable = [
+        position for position, (field, node) in enumerate(zip(field_info, nodes))
+        if _is_usable(field, node)
+    ]
+
+    return {
+        "fields": field_info,
+        "trie": root,
+        "usable": usable,
+    }
+
+def usable_fields(field_index: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the fields that can be used directly in JSONLogic operations, in schema order."""
+    fields = field_index["fields"]
+    return [fields[position] for position in field_index["usable"]]
+
+def get_field(field_index: Dict[str, Any], path: str) -> Optional[Dict[str, Any]]:
+    """Get the field information for a path, or None if the schema has no such field."""
+    node = _find_node(field_index, path)
+    if node is None or node["field"] is None:
+        return None
+    return field_index["fields"][node["field"]]
+
+def children_of(field_index: Dict[str, Any], path: str) -> List[Dict[str, Any]]:
+    """Get the fields directly below a path, e.g. the properties of an object."""
+    node = _find_node(field_index, path)
+    if node is None:
+        return []
+
+    fields = field_index["fields"]
+    return [fields[child["field"]] for child in node["children"].values() if child["field"] is not None]
+
+def is_array(field_index: Dict[str, Any], path: str) -> bool:
+    """Check whether a path is an array field."""
+    field = get_field(field_index, path)
+    return field is not None and field.get("type") == "array"
+
+def resolve_path(field_index: Dict[str, Any], path: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the field information for a data path, matching numeric indices against array item patterns.
+
+    A numeric segment matches the `*` item pattern of an array at any depth, and
+    a trailing index into an array of scalars matches the array itself. Any key
+    matches the `*` pattern of a dynamic object.
+
+    Example:
+        >>> resolve_path(field_index, "orders.3.items.0.price")["name"]
+        'orders.*.items.*.price'
+    """
+    fields = field_index["fields"]
+    node = field_index["trie"]
+    segments = path.split(".")
+
+    for position, segment in enumerate(segments):
+        children = node["children"]
+        child = children.get(segment)
+        if child is None and "*" in children:
+            if segment.isdigit() or not _is_array_node(fields, node):
+                child = children["*"]
+        if child is None:
+            # An index into an array of scalars refers to the array's type
+            if segment.isdigit() and position == len(segments) - 1 and _is_array_node(fields, node):
+                return fields[node["field"]]
+            return None
+        node = child
+
+    if node["field"] is None:
+        return None
+    return fields[node["field"]]
+
+def validate_paths(field_index: Dict[str, Any], paths: Iterable[str], max_suggestions: int = 3) -> Dict[str, Any]:
+    """
+    Validate a batch of data paths against the schema in one pass.
+
+    Each distinct path is resolved once. Invalid paths get suggestions built by
+    correcting the first segment that does not match the schema.
+
+    Args:
+        field_index: Field index as built by `build_field_index`
+        paths: Dot-notation data paths, as used in JSONLogic `var` operations
+        max_suggestions: Maximum number of suggestions per invalid path
+
+    Returns:
+        Dictionary with `is_valid`, the `invalid_fields` in input order, and `suggestions` per invalid field
+    """
+    invalid_fields = []
+    suggestions = {}
+    seen = set()
+
+    for path in paths:
+        if path in seen:
+            continue
+        seen.add(path)
+
+        if resolve_path(field_index, path) is None:
+            invalid_fields.append(path)
+            suggestions[path] = suggest_paths(field_index, path, max_suggestions)
+
+    return {
+        "is_valid": not invalid_fields,
+        "invalid_fields": invalid_fields,
+        "suggestions": suggestions,
+    }
+
+def suggest_paths(field_index: Dict[str, Any], path: str, max_suggestions: int = 3) -> List[str]:
+    """
+    Suggest valid paths for a misspelled one.
+
+    The path is matched segment by segment until the first unknown segment,
+    which is replaced with the closest keys at that level of the schema. Only the
+    keys of one node are compared, so this stays fast on very large schemas.
+    """
+    fields = field_index["fields"]
+    node = field_index["trie"]
+    segments = path.split(".")
+
+    for position, segment in enumerate(segments):
+        children = node["children"]
+        if segment in children:
+            node = children[segment]
+            continue
+        if "*" in children and (segment.isdigit() or not _is_array_node(fields, node)):
+            node = children["*"]
+            continue
+
+        prefix = segments[:position]
+        rest = segments[position + 1:]
+        candidates = difflib.get_close_matches(segment, [key for key in children if key != "*"], n=max_suggestions)
+
+        # Prefer corrections after which the rest of the path resolves too
+        corrected = [".".join(prefix + [candidate] + rest) for candidate in candidates]
+        resolved = [candidate for candidate in corrected if resolve_path(field_index, candidate) is not None]
+        if resolved:
+            return resolved
+        return [".".join(prefix + [candidate]) for candidate in candidates]
+
+    # Every segment exists, but the path names a container rather than a field
+    return [f"{path}.{key}" for key, child in node["children"].items()
+            if key != "*" and child["field"] is not None][:max_suggestions]
+
+def _new_node() -> Dict[str, Any]:
+    return {"field": None, "children": {}}
+
+def _is_array_node(fields: List[Dict[str, Any]], node: Dict[str, Any]) -> bool:
+    return node["field"] is not None and fields[node["field"]].get("type") == "array"
+
+def _find_node(field_index: Dict[str, Any], path: str) -> Optional[Dict[str, Any]]:
+    node = field_index["trie"]
+    for segment in path.split("."):
+        node = node["children"].get(segment)
+        if node is None:
+            return None
+    return node
+
+def _is_usable(field: Dict[str, Any], node: Dict[str, Any]) -> bool:
+    # Skip fields that are objects without value-related properties
+    if field.get("type") == "object" and not any(k in field for k in ["values", "range"]):
+        return False
+
+    # Skip fields with a wildcard in the name (these are usually container patterns)
+    if ".*" in field.get("name", ""):
+        return False
+
+    # Skip parent object paths (e.g., "questions.productUsage" when "questions.productUsage.usageFrequency" exists)
+    return not node["children"]
@@ -0,0 +1,252 @@
+"""
+Find JSON objects embedded in agent responses.
+
+Responses mix planning text, code fences and the final answer, so the rule has
+to be found before it can be parsed. `find_json_objects` scans the text once,
+tracking brace depth and skipping string literals (including escaped quotes and
+braces inside strings), and returns the outermost balanced `{...}` spans. Unlike
+a regular expression it handles any nesting depth, in linear time for text
+whose braces are balanced.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FINAL_ANSWER_MARKER = "/*FINAL_ANSWER*/"
+END_MARKER = "/*END*/"
+CODE_FENCE = "```"
+
+# Inside an object: a brace, or a whole string literal (possibly unterminated) skipped in one match
+_TOKEN = re.compile(r'[{}]|"[^"\\]*(?:\\.[^"\\]*)*"?', re.DOTALL)
+_NOT_FOUND = object()
+
+def find_json_objects(text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Find the outermost balanced `{...}` spans in a text.
+
+    Braces inside JSON strings are ignored. When an opening brace is never
+    closed, e.g. because prose after it has an unmatched quote that the scan took
+    for the start of a string, scanning starts again from the next brace after
+    it, so the complete objects after it are still found.
+
+    Args:
+        text: The text to scan
+        start: Index where scanning starts
+        end: Index where scanning stops, defaults to the end of the text
+
+    Returns:
+        (start, end) index pairs of the spans, in order of their position
+
+    Example:
+        >>> text = 'Rule: {"and": [{"var": "a"}, {"==": [{"var": "b"}, "}"]}]} done'
+        >>> [text[start:end] for start, end in find_json_objects(text)]
+        ['{"and": [{"var": "a"}, {"==": [{"var": "b"}, "}"]}]}']
+        >>> text = 'text { unclosed "quote and then {"a":1}'
+        >>> [text[start:end] for start, end in find_json_objects(text)]
+        ['{"a":1}']
+    """
+    end = len(text) if end is None else end
+    spans = []
+    # End of the object opened by each brace seen by a scan that ended unbalanced, None if it never closed.
+    # A scan from one of these braces would read the same tokens, so it is not repeated
+    scanned: Dict[int, Optional[int]] = {}
+    pos = start
+
+    while pos < end:
+        pos = text.find("{", pos, end)
+        if pos < 0:
+            break
+        if pos in scanned:
+            if scanned[pos] is None:
+                pos += 1
+            else:
+                spans.append((pos, scanned[pos]))
+                pos = scanned[pos]
+            continue
+
+        # Positions of the open braces
+        stack = [pos]
+        for match in _TOKEN.finditer(text, pos + 1, end):
+            token = match.group()
+            if token == "{":
+                stack.append(match.start())
+            elif token == "}":
+                opened = stack.pop()
+                if not stack:
+                    spans.append((opened, match.end()))
+                    # Outside objects, quotes are prose and not strings, so go back to looking for a brace
+                    break
+                scanned[opened] = match.end()
+        else:
+            # The text ended inside the object, so look for objects again from the next brace after it
+            for opened in stack:
+                scanned[opened] = None
+            pos += 1
+            continue
+        pos = spans[-1][1]
+
+    return spans
+
+def extract_json(response: str) -> Any:
+    """
+    Parse the JSON value an agent response answers with.
+
+    Tries, in order: the whole response as JSON, the text after the last
+    `/*FINAL_ANSWER*/` marker (up to `/*END*/`), code fences, and finally the
+    whole response. Each section is parsed as a whole first, then its first
+    complete object that parses is returned. In the whole response, the last
+    object is tried first: planning text comes before the answer.
+
+    Args:
+        response: The raw text response from the agent
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        ValueError: If no valid JSON could be found
+    """
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        pass
+
+    for start, end in _sections(response):
+        try:
+            return json.loads(response[start:end])
+        except json.JSONDecodeError:
+            pass
+
+        value = _first_object(response, find_json_objects(response, start, end))
+        if value is not _NOT_FOUND:
+            return value
+
+    value = _first_object(response, reversed(find_json_objects(response)))
+    if value is not _NOT_FOUND:
+        return value
+
+    raise ValueError("No valid JSON found in response")
+
+def _sections(response: str) -> Iterator[Tuple[int, int]]:
+    """Spans of the response to search for the answer, most specific first."""
+    marker = response.rfind(FINAL_ANSWER_MARKER)
+    if marker >= 0:
+        start = marker + len(FINAL_ANSWER_MARKER)
+        end = response.find(END_MARKER, start)
+        yield start, len(response) if end < 0 else end
+
+    fence = response.find(CODE_FENCE)
+    while fence >= 0:
+        start = fence + len(CODE_FENCE)
+        end = response.find(CODE_FENCE, start)
+        if end < 0:
+            break
+        yield start, end
+        fence = response.find(CODE_FENCE, end + len(CODE_FENCE))
+
+def _first_object(text: str, spans: Iterable[Tuple[int, int]]) -> Any:
+    for span_start, span_end in spans:
+        try:
+            return json.loads(text[span_start:span_end])
+        except json.JSONDecodeError:
+            continue
+    return _NOT_FOUND
+
+class StreamingJsonExtractor:
+    """
+    Find the answer object in a response whose text arrives in chunks.
+
+    Text is scanned once the `/*FINAL_ANSWER*/` marker has been seen, even when
+    it is split across chunks, or once the caller marks the start of the answer.
+    The first complete object after that point that parses is returned as soon
+    as its closing brace arrives, whatever text follows it.
+
+    Example:
+        >>> extractor = StreamingJsonExtractor()
+        >>> extractor.feed('/*PLANNING*/ ... /*FINAL_')
+        >>> extractor.feed('ANSWER*/ {"==": [{"var": "a"},')
+        >>> extractor.feed(' 1]} This rule')
+        '{"==": [{"var": "a"}, 1]}'
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget the text seen so far, e.g. at the start of a new model response."""
+        self.before = ""
+        self.answer: Optional[str] = None
+        self.value = None
+        self.done = False
+        self._scanned = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str, answer: bool = False) -> Optional[str]:
+        """
+        Add the next chunk of the response.
+
+        Args:
+            text: The chunk
+            answer: Whether the answer starts with this chunk, e.g. when a planner removed the marker
+
+        Returns:
+            The text of the answer object when it completes with this chunk, otherwise None
+        """
+        if self.done:
+            return None
+
+        if self.answer is None:
+            if answer:
+                self.answer = ""
+            else:
+                # Look for the marker only where it could end in this chunk
+                search_from = max(0, len(self.before) - len(FINAL_ANSWER_MARKER) + 1)
+                self.before += text
+                marker = self.before.find(FINAL_ANSWER_MARKER, search_from)
+                if marker < 0:
+                    return None
+                text = self.before[marker + len(FINAL_ANSWER_MARKER):]
+                self.before = ""
+                self.answer = ""
+
+        self.answer += text
+        return self._scan()
+
+    def _scan(self) -> Optional[str]:
+        answer = self.answer
+        for index in range(self._scanned, len(answer)):
+            char = answer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = index
+                self._depth += 1
+            elif self._depth == 0:
+                # Quotes outside objects are prose
+                continue
+            elif char == '"':
+                self._in_string = True
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = answer[self._start:index + 1]
+                    try:
+                        self.value = json.loads(candidate)
+                    except json.JSONDecodeError:
+                        continue
+                    self.done = True
+                    self._scanned = index + 1
+                    return candidate
+
+        self._scanned = len(answer)
+        return None
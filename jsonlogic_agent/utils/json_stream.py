@@ -0,0 +1,198 @@
+"""
+Iterative JSON parsing for large or deeply nested documents.
+
+`json.load` reads the whole stream into one string before decoding, and the C
+decoder recurses once per nesting level, so it raises RecursionError on very
+deep documents. `load_json_stream` reads a stream in fixed-size chunks and
+builds the document with an explicit stack, so memory is bounded by the size
+of the parsed result plus one chunk, and nesting depth is unlimited.
+"""
+
+import codecs
+import io
+import re
+from json.decoder import scanstring
+from typing import Any, IO
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_CONSTANTS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+
+# Parser states
+_VALUE, _FIRST_ITEM, _FIRST_KEY, _KEY, _COLON, _AFTER_VALUE, _DONE = range(7)
+
+def loads_iterative(text: str) -> Any:
+    """Parse JSON text without recursion, for documents nested too deeply for `json.loads`."""
+    return load_json_stream(io.StringIO(text))
+
+def load_json_stream(stream: IO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Any:
+    """
+    Parse one JSON document from a text or binary stream, reading it in chunks.
+
+    Args:
+        stream: A readable stream; binary streams are decoded as UTF-8
+        chunk_size: Number of characters or bytes to read at a time
+
+    Returns:
+        The parsed document, equal to what `json.load` returns
+
+    Raises:
+        ValueError: If the stream does not contain exactly one valid JSON document
+    """
+    return _StreamParser(stream, chunk_size).parse()
+
+class _StreamParser:
+    def __init__(self, stream: IO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = None
+        self.buffer = ""
+        self.pos = 0
+        # Characters dropped from the front of the buffer, for error offsets
+        self.offset = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        """Append the next chunk to the buffer, dropping what has been parsed. Returns False at end of stream."""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        if isinstance(chunk, bytes):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+            chunk = self.decoder.decode(chunk, final=self.eof)
+
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def error(self, message: str):
+        raise ValueError(f"{message}: char {self.offset + self.pos}")
+
+    def next_token(self):
+        """Get the next token as (kind, value), where kind is a structural character, "string", "value" or ""."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                break
+            if not self.read_more():
+                return "", None
+
+        char = self.buffer[self.pos]
+        if char in "{}[]:,":
+            self.pos += 1
+            return char, None
+
+        if char == '"':
+            while True:
+                try:
+                    value, end = scanstring(self.buffer, self.pos + 1, True)
+                    self.pos = end
+                    return "string", value
+                except ValueError:
+                    # The string may continue in the next chunk
+                    if not self.read_more():
+                        self.error("Invalid or unterminated string")
+
+        while True:
+            match = _NUMBER.match(self.buffer, self.pos)
+            if match:
+                # A number near the end of the buffer may continue in the next chunk,
+                # e.g. "1e" followed by "-5", so keep room for an exponent or fraction marker
+                if match.end() + 2 < len(self.buffer) or self.eof:
+                    self.pos = match.end()
+                    if match.group(1) or match.group(2):
+                        return "value", float(match.group())
+                    return "value", int(match.group())
+            else:
+                for literal, value in _CONSTANTS.items():
+                    if self.buffer.startswith(literal, self.pos):
+                        self.pos += len(literal)
+                        return "value", value
+
+                # Only a literal cut off by the end of the buffer is worth reading more for
+                if len(self.buffer) - self.pos >= len("-Infinity"):
+                    self.error("Expecting value")
+
+            if not self.read_more():
+                self.error("Expecting value")
+
+    def parse(self) -> Any:
+        root = None
+        # Open containers, each as [container, pending key]
+        stack = []
+        state = _VALUE
+
+        while True:
+            kind, value = self.next_token()
+
+            if state == _DONE:
+                if kind:
+                    self.error("Extra data")
+                return root
+
+            if state in (_VALUE, _FIRST_ITEM):
+                if kind == "]" and state == _FIRST_ITEM:
+                    stack.pop()
+                    state = _AFTER_VALUE if stack else _DONE
+                    continue
+
+                if kind == "{":
+                    value = {}
+                elif kind == "[":
+                    value = []
+                elif kind not in ("string", "value"):
+                    self.error("Expecting value")
+
+                if not stack:
+                    root = value
+                elif isinstance(stack[-1][0], dict):
+                    stack[-1][0][stack[-1][1]] = value
+                else:
+                    stack[-1][0].append(value)
+
+                if kind == "{":
+                    stack.append([value, None])
+                    state = _FIRST_KEY
+                elif kind == "[":
+                    stack.append([value, None])
+                    state = _FIRST_ITEM
+                else:
+                    state = _AFTER_VALUE if stack else _DONE
+
+            elif state in (_FIRST_KEY, _KEY):
+                if kind == "}" and state == _FIRST_KEY:
+                    stack.pop()
+                    state = _AFTER_VALUE if stack else _DONE
+                elif kind == "string":
+                    stack[-1][1] = value
+                    state = _COLON
+                else:
+                    self.error("Expecting property name enclosed in double quotes")
+
+            elif state == _COLON:
+                if kind != ":":
+                    self.error("Expecting ':' delimiter")
+                state = _VALUE
+
+            else:
+                container = stack[-1][0]
+                if kind == ",":
+                    state = _KEY if isinstance(container, dict) else _VALUE
+                elif kind == ("}" if isinstance(container, dict) else "]"):
+                    stack.pop()
+                    state = _AFTER_VALUE if stack else _DONE
+                else:
+                    self.error("Expecting ',' delimiter")
@@ -0,0 +1,409 @@
+"""
+Compile JSONLogic rules into reusable Python closures.
+
+`json_logic.jsonLogic` walks the rule dictionary and looks up every operator
+each time it is called. For rules that are applied to many records, `compile_rule`
+does that work once and returns a callable that only evaluates the parts of the
+rule that depend on the data. Results follow the panzi `json_logic` library,
+including its type coercion and short-circuit behavior.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from json_logic.builtins import BUILTINS, op_add, op_var, to_bool, not_
+
+from utils.jsonlogic_operations import OPERATIONS
+
+CompiledRule = Callable[[Any], Any]
+
+def compile_rule(rule: Any, operations: Dict[str, Any] = OPERATIONS) -> CompiledRule:
+    """
+    Compile a JSONLogic rule into a callable that evaluates it against data.
+
+    Args:
+        rule: A JSONLogic rule, e.g. the output of `create_jsonlogic_from_intent`
+        operations: Operation table, same as the `operations` argument of `json_logic.jsonLogic`
+
+    Returns:
+        A function taking a data record and returning the same value as
+        `json_logic.jsonLogic(rule, data, operations)`
+
+    Example:
+        >>> is_adult = compile_rule({">": [{"var": "user.age"}, 18]})
+        >>> is_adult({"user": {"age": 35}})
+        True
+    """
+    return _Compiler(operations).compile(rule)
+
+def is_constant(logic: Any) -> bool:
+    """
+    Check whether a JSONLogic node evaluates to itself.
+
+    Lists are not constant: `json_logic` builds a new list on every evaluation.
+    """
+    return not isinstance(logic, list) and (not isinstance(logic, dict) or len(logic) != 1)
+
+def rule_key(logic: Any) -> str:
+    """Canonical JSON form of a rule, so identical subexpressions can be recognized."""
+    return json.dumps(logic, sort_keys=True, default=str)
+
+def split_operation(logic: Dict[str, Any]):
+    """Split a single-key JSONLogic node into its operator and argument list."""
+    op = next(iter(logic))
+    args = logic[op]
+    if not isinstance(args, list):
+        args = [args]
+    return op, args
+
+def compile_var_path(key: str, default: Any = None) -> CompiledRule:
+    """
+    Build a getter for a constant dot-notation `var` path.
+
+    The path is split, and array indexes are parsed, once instead of on every lookup.
+    Lookups behave exactly like `json_logic.builtins.op_var`.
+    """
+    if key == "":
+        return lambda data: data
+
+    steps = [(prop, _parse_index(prop)) for prop in key.split(".")]
+
+    def var(data):
+        for prop, index in steps:
+            if isinstance(data, dict):
+                data = data.get(prop)
+            elif isinstance(data, (list, str)):
+                if prop == "length":
+                    # emulate JavaScript behavior
+                    return len(data)
+                if index is None or index >= len(data):
+                    return default
+                data = data[index]
+            else:
+                return default
+
+        if data is None:
+            return default
+        return data
+
+    return var
+
+def is_count_reducer(sublogic: Any, operations: Dict[str, Any]) -> bool:
+    """
+    Check whether a `reduce` body only counts items, i.e. `{"+": [1, {"var": "accumulator"}]}`.
+
+    This is the pattern `create_jsonlogic_from_intent` emits for array length checks.
+    """
+    if operations.get("+") is not op_add or operations.get("var") is not op_var:
+        return False
+    if not isinstance(sublogic, dict) or len(sublogic) != 1 or "+" not in sublogic:
+        return False
+
+    args = sublogic["+"]
+    if not isinstance(args, list) or len(args) != 2:
+        return False
+
+    # An int step keeps the count an int, exactly like repeated op_add calls
+    steps = [arg for arg in args if type(arg) is int and arg == 1]
+    return len(steps) == 1 and {"var": "accumulator"} in args
+
+def _parse_index(prop: str) -> Optional[int]:
+    """Return the array index for a path segment, or None if `op_var` would not treat it as one."""
+    try:
+        index = int(prop, 10)
+    except ValueError:
+        return None
+
+    if prop != str(index) or index < 0:
+        return None
+    return index
+
+def _constant(value: Any) -> CompiledRule:
+    return lambda data: value
+
+def _unrecognized(message: str, args: List[CompiledRule]) -> CompiledRule:
+    def fail(data):
+        # json_logic evaluates the arguments before looking up the operation
+        for arg in args:
+            arg(data)
+        raise ReferenceError(message)
+
+    return fail
+
+class _Compiler:
+    """Translate one JSONLogic node at a time into a closure over its compiled children."""
+
+    def __init__(self, operations: Dict[str, Any]):
+        self.operations = operations
+        self.special_forms = {
+            "if": self.compile_if,
+            "?:": self.compile_if,
+            "and": self.compile_and,
+            "or": self.compile_or,
+            "filter": self.compile_filter,
+            "reduce": self.compile_reduce,
+            "map": self.compile_map,
+            "all": self.compile_all,
+            "some": self.compile_some,
+            "none": self.compile_none,
+        }
+
+    def compile(self, logic: Any) -> CompiledRule:
+        if isinstance(logic, list):
+            items = [self.compile(item) for item in logic]
+            return lambda data: [item(data) for item in items]
+
+        if is_constant(logic):
+            return _constant(logic)
+
+        op, args = split_operation(logic)
+        special_form = self.special_forms.get(op)
+        if special_form:
+            return special_form(args)
+
+        return self.compile_operation(op, args)
+
+    def compile_scope(self, sublogic: Any) -> CompiledRule:
+        """Compile the per-item logic of an array operation, which is evaluated with each item as the data."""
+        return self.compile(sublogic)
+
+    def compile_operation(self, op: str, args: List[Any]) -> CompiledRule:
+        fn = self.operations.get(op)
+        if fn is None:
+            fn, message = self.resolve_dotted(op)
+            if fn is None:
+                return _unrecognized(message, [self.compile(arg) for arg in args])
+
+        if fn is op_var:
+            return self.compile_var(args)
+        if fn is BUILTINS["!"] and len(args) >= 1:
+            return self.compile_unary(not_, args)
+        if fn is BUILTINS["!!"] and len(args) >= 1:
+            return self.compile_unary(to_bool, args)
+
+        compiled = [self.compile(arg) for arg in args]
+        if len(args) == 1:
+            a, = compiled
+            return lambda data: fn(data, a(data))
+
+        if len(args) == 2:
+            a, b = compiled
+            if is_constant(args[1]):
+                b_value = args[1]
+                return lambda data: fn(data, a(data), b_value)
+            if is_constant(args[0]):
+                a_value = args[0]
+                return lambda data: fn(data, a_value, b(data))
+            return lambda data: fn(data, a(data), b(data))
+
+        if len(args) == 3:
+            a, b, c = compiled
+            if is_constant(args[0]) and is_constant(args[2]):
+                # Range checks such as {"<": [lower, {"var": field}, upper]}
+                a_value, c_value = args[0], args[2]
+                return lambda data: fn(data, a_value, b(data), c_value)
+            return lambda data: fn(data, a(data), b(data), c(data))
+
+        return lambda data: fn(data, *[arg(data) for arg in compiled])
+
+    def resolve_dotted(self, op: str):
+        """Look up a dotted operation name in nested operation tables, like `json_logic.jsonLogic`."""
+        if "." not in op:
+            return None, f"Unrecognized operation: {op!r}"
+
+        props = op.split(".")
+        ops = self.operations
+        for index, prop in enumerate(props):
+            if isinstance(ops, dict) and prop not in ops:
+                return None, f"Unrecognized operation: {'.'.join(props[:index + 1])!r}"
+            ops = ops[prop]
+        return ops, None
+
+    def compile_unary(self, fn: Callable[[Any], Any], args: List[Any]) -> CompiledRule:
+        compiled = [self.compile(arg) for arg in args]
+        if len(compiled) == 1:
+            a, = compiled
+            return lambda data: fn(a(data))
+
+        def unary(data):
+            values = [arg(data) for arg in compiled]
+            return fn(values[0])
+
+        return unary
+
+    def compile_var(self, args: List[Any]) -> CompiledRule:
+        if len(args) <= 2 and all(is_constant(arg) for arg in args):
+            key = args[0] if args else None
+            default = args[1] if len(args) > 1 else None
+            if key is None or key == "":
+                return lambda data: data
+            if isinstance(key, str):
+                return compile_var_path(key, default)
+
+        compiled = [self.compile(arg) for arg in args]
+        return lambda data: op_var(data, *[arg(data) for arg in compiled])
+
+    def compile_if(self, args: List[Any]) -> CompiledRule:
+        compiled = [self.compile(arg) for arg in args]
+        argc = len(compiled)
+        last_index = argc - 1
+
+        def if_(data):
+            index = 0
+            while index < last_index:
+                if to_bool(compiled[index](data)):
+                    return compiled[index + 1](data)
+                index += 2
+
+            if index >= argc:
+                return None
+            return compiled[index](data)
+
+        return if_
+
+    def compile_and(self, args: List[Any]) -> CompiledRule:
+        compiled = [self.compile(arg) for arg in args]
+        if not compiled:
+            return _constant(None)
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def and_(data):
+            current = None
+            for arg in compiled:
+                current = arg(data)
+                if current is True:
+                    continue
+                if current is False or not_(current):
+                    return current
+            return current
+
+        return and_
+
+    def compile_or(self, args: List[Any]) -> CompiledRule:
+        compiled = [self.compile(arg) for arg in args]
+        if not compiled:
+            return _constant(None)
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def or_(data):
+            current = None
+            for arg in compiled:
+                current = arg(data)
+                if current is False:
+                    continue
+                if current is True or to_bool(current):
+                    return current
+            return current
+
+        return or_
+
+    def compile_filter(self, args: List[Any]) -> CompiledRule:
+        if len(args) < 2:
+            return lambda data: []
+
+        items_of = self.compile(args[0])
+        sublogic = self.compile_scope(args[1])
+
+        def filter_(data):
+            items = items_of(data)
+            if not isinstance(items, list):
+                return []
+            return [item for item in items if to_bool(sublogic(item))]
+
+        return filter_
+
+    def compile_reduce(self, args: List[Any]) -> CompiledRule:
+        if not args:
+            return _constant(None)
+
+        items_of = self.compile(args[0])
+        # The initial value is passed through as-is, it is not evaluated
+        init = args[2] if len(args) > 2 else None
+
+        if len(args) > 1 and type(init) is int and is_count_reducer(args[1], self.operations):
+            # Counting items needs no per-item evaluation
+            def count(data):
+                items = items_of(data)
+                if not isinstance(items, list):
+                    return init
+                return init + len(items)
+
+            return count
+
+        sublogic = self.compile_scope(args[1] if len(args) > 1 else None)
+
+        def reduce_(data):
+            items = items_of(data)
+            if not isinstance(items, list):
+                return init
+
+            context = {"accumulator": init}
+            for item in items:
+                context["current"] = item
+                context["accumulator"] = sublogic(context)
+            return context["accumulator"]
+
+        return reduce_
+
+    def compile_map(self, args: List[Any]) -> CompiledRule:
+        if not args:
+            return lambda data: []
+
+        items_of = self.compile(args[0])
+        sublogic = self.compile_scope(args[1] if len(args) > 1 else None)
+
+        def map_(data):
+            items = items_of(data)
+            if not isinstance(items, list):
+                return []
+            return [sublogic(item) for item in items]
+
+        return map_
+
+    def compile_all(self, args: List[Any]) -> CompiledRule:
+        if len(args) < 2:
+            return _constant(False)
+
+        items_of = self.compile(args[0])
+        sublogic = self.compile_scope(args[1])
+
+        def all_(data):
+            items = items_of(data)
+            # JsonLogic defines that all of an empty list is False
+            if not isinstance(items, list) or not items:
+                return False
+            return all(to_bool(sublogic(item)) for item in items)
+
+        return all_
+
+    def compile_some(self, args: List[Any]) -> CompiledRule:
+        if len(args) < 2:
+            return _constant(False)
+
+        items_of = self.compile(args[0])
+        sublogic = self.compile_scope(args[1])
+
+        def some(data):
+            items = items_of(data)
+            if not isinstance(items, list):
+                return False
+            return any(to_bool(sublogic(item)) for item in items)
+
+        return some
+
+    def compile_none(self, args: List[Any]) -> CompiledRule:
+        if len(args) < 2:
+            return _constant(True)
+
+        items_of = self.compile(args[0])
+        sublogic = self.compile_scope(args[1])
+
+        def none(data):
+            items = items_of(data)
+            if not isinstance(items, list):
+                return True
+            return not any(to_bool(sublogic(item)) for item in items)
+
+        return none
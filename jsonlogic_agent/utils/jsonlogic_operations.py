@@ -0,0 +1,48 @@
+"""
+Native operations for the extended operator mode.
+
+Standard JSONLogic has no operations for array length or string prefixes, so in
+the default "portable" mode `create_jsonlogic_from_intent` expands them into
+`reduce` and `substr` expressions that any JSONLogic implementation can evaluate.
+In "extended" mode it emits the operations below instead, which run in constant
+time (`length`, `is_empty`) or as a single string method call.
+
+`OPERATIONS` is the panzi `json_logic` builtin table with these operations
+added. It is the default for `compile_rule`, `optimize_rule` and
+`JSONLogicUtils.test_rule`, so rules from either mode can be evaluated.
+Extended rules can only be evaluated by evaluators with the same operations
+registered.
+"""
+
+from json_logic.builtins import BUILTINS, not_, to_string
+
+OPERATOR_MODES = ("portable", "extended")
+
+def op_length(data=None, value=None, *_ignored) -> int:
+    """Number of items in an array, 0 for anything else (like the portable `reduce` expansion)."""
+    return len(value) if isinstance(value, list) else 0
+
+def op_starts_with(data=None, string=None, prefix=None, *_ignored) -> bool:
+    """Check whether a value starts with a prefix, comparing their string forms. Missing and empty values never match."""
+    if not_(string):
+        return False
+    return to_string(string).startswith(to_string(prefix))
+
+def op_ends_with(data=None, string=None, suffix=None, *_ignored) -> bool:
+    """Check whether a value ends with a suffix, comparing their string forms. Missing and empty values never match."""
+    if not_(string):
+        return False
+    return to_string(string).endswith(to_string(suffix))
+
+def op_is_empty(data=None, value=None, *_ignored) -> bool:
+    """Check whether a value is missing or an empty array, string or object."""
+    return value is None or (isinstance(value, (list, str, dict)) and not value)
+
+NATIVE_OPERATIONS = {
+    "length": op_length,
+    "starts_with": op_starts_with,
+    "ends_with": op_ends_with,
+    "is_empty": op_is_empty,
+}
+
+OPERATIONS = {**BUILTINS, **NATIVE_OPERATIONS}
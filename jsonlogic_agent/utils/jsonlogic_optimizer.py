@@ -0,0 +1,461 @@
+"""
+Simplify JSONLogic rules without changing what they evaluate to.
+
+`create_jsonlogic_from_intent` mirrors the shape of the intent tree, so its
+rules can contain nested `and`/`or` operations, repeated conditions, and
+expensive array predicates ahead of cheap comparisons. `optimize_rule` rewrites
+a rule bottom-up:
+
+- nested `and`/`or` operations are flattened into their parent
+- constant subexpressions are evaluated once, and constant conditions are
+  removed from `and`/`or`/`if`
+- repeated conditions are removed
+- `and` operations with contradictory conditions (e.g. `x == 1` and `x == 2`,
+  or `x > 5` and `x < 3`) become `false`, and `or` operations with a condition
+  and its negation become `true`
+- the conditions of `and`/`or` are ordered by estimated cost, so short-circuit
+  evaluation skips the expensive ones whenever possible
+
+`json_logic` returns the deciding operand of `and`/`or` rather than a boolean,
+and evaluation stops at the first deciding operand. Rewrites that could change
+the returned value are only applied when every operand is boolean-valued, or
+where only the truth value is used (conditions, array predicates, and rules
+optimized with `as_condition`). Rewrites that skip evaluating an operand are
+only applied when the operand cannot raise. Optimized rules therefore return the
+same value as the original for every record.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_logic import jsonLogic
+from json_logic.builtins import not_, to_bool, to_number
+
+from utils.jsonlogic_compiler import is_constant, split_operation, rule_key
+from utils.jsonlogic_operations import OPERATIONS
+
+# Operations that always return True or False
+BOOLEAN_OPERATIONS = {"==", "!=", "===", "!==", "<", ">", "<=", ">=", "!", "!!", "in", "some", "all", "none",
+                      "starts_with", "ends_with", "is_empty"}
+
+# Operations that can raise on JSON data (division by zero, infinite substring
+# indexes) or have side effects
+UNSAFE_OPERATIONS = {"/", "%", "substr", "log"}
+
+# Operations whose result depends on the data record
+DATA_OPERATIONS = {"var", "missing", "missing_some"}
+
+# Operations that evaluate their second argument once per array item
+ARRAY_OPERATIONS = {"filter", "map", "reduce", "all", "some", "none"}
+
+COMPARISONS = {"<", "<=", ">", ">="}
+
+# Assumed number of array items when estimating the cost of array operations
+ITEMS_ESTIMATE = 10
+
+# Assumed probability that a condition is true when estimating short-circuit costs
+PASS_PROBABILITY = 0.5
+
+def optimize_rule(rule: Any, operations: Dict[str, Any] = OPERATIONS, as_condition: bool = False) -> Any:
+    """
+    Optimize a JSONLogic rule for evaluation speed.
+
+    Args:
+        rule: A JSONLogic rule, e.g. the output of `create_jsonlogic_from_intent`
+        operations: Operation table the rule will be evaluated with
+        as_condition: True if only the truth value of the result is used, e.g. when
+            the rule selects records. `and`/`or` operands are then reordered even
+            when they are not boolean-valued.
+
+    Returns:
+        An equivalent rule that returns the same value as the original for any data,
+        or the same truth value if `as_condition` is set
+
+    Example:
+        >>> optimize_rule({"and": [{"some": [{"var": "tags"}, {"==": [{"var": ""}, "a"]}]},
+        ...                        {"and": [{"==": [{"var": "age"}, 30]}, {"==": [{"var": "age"}, 30]}]}]})
+        {"and": [{"==": [{"var": "age"}, 30]}, {"some": [{"var": "tags"}, {"==": [{"var": ""}, "a"]}]}]}
+    """
+    return _Optimizer(operations).optimize(rule, as_condition)
+
+def estimate_cost(rule: Any) -> float:
+    """
+    Estimate the relative cost of evaluating a rule against one record.
+
+    Every operation counts as one unit. Array operations count their body once
+    per assumed array item, and the operands of `and`/`or` are weighted by the
+    probability that evaluation reaches them.
+    """
+    if isinstance(rule, list):
+        return sum(estimate_cost(item) for item in rule)
+    if is_constant(rule):
+        return 0.0
+
+    op, args = split_operation(rule)
+
+    if op in ("and", "or"):
+        cost, reached = 0.0, 1.0
+        for arg in args:
+            cost += reached * estimate_cost(arg)
+            reached *= PASS_PROBABILITY
+        return cost
+
+    if op in ("if", "?:"):
+        conditions = args[:-1:2]
+        values = args[1::2] + ([args[-1]] if len(args) % 2 else [])
+        value_cost = sum(estimate_cost(value) for value in values) / len(values) if values else 0.0
+        return sum(estimate_cost(condition) for condition in conditions) + value_cost
+
+    if op in ARRAY_OPERATIONS:
+        items_cost = estimate_cost(args[0]) if args else 0.0
+        body_cost = estimate_cost(args[1]) if len(args) > 1 else 0.0
+        return 1.0 + items_cost + ITEMS_ESTIMATE * (1.0 + body_cost)
+
+    return 1.0 + sum(estimate_cost(arg) for arg in args)
+
+def _is_literal(logic: Any) -> bool:
+    """Check whether a node evaluates to a value that does not depend on the data."""
+    if isinstance(logic, list):
+        return all(_is_literal(item) for item in logic)
+    return is_constant(logic)
+
+def _is_scalar(value: Any) -> bool:
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return value is None or isinstance(value, (bool, int, str))
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+class _Optimizer:
+    def __init__(self, operations: Dict[str, Any]):
+        self.operations = operations
+
+    def is_builtin(self, op: str) -> bool:
+        """Check whether an operation is a known builtin or native operation, not a custom override."""
+        return op in OPERATIONS and self.operations.get(op) is OPERATIONS[op]
+
+    def is_boolean(self, logic: Any) -> bool:
+        """Check whether a node always evaluates to True or False."""
+        if isinstance(logic, bool):
+            return True
+        if isinstance(logic, list) or is_constant(logic):
+            return False
+
+        op, args = split_operation(logic)
+        if op in ("and", "or"):
+            return bool(args) and all(self.is_boolean(arg) for arg in args)
+        return op in BOOLEAN_OPERATIONS and (op in ARRAY_OPERATIONS or self.is_builtin(op))
+
+    def is_safe(self, logic: Any) -> bool:
+        """Check whether a node can neither raise on JSON data nor have side effects."""
+        if isinstance(logic, list):
+            return all(self.is_safe(item) for item in logic)
+        if is_constant(logic):
+            return True
+
+        op, args = split_operation(logic)
+        if op in UNSAFE_OPERATIONS:
+            return False
+        if op not in ("and", "or", "if", "?:") and op not in ARRAY_OPERATIONS and not self.is_builtin(op):
+            # Unknown or custom operations may raise
+            return False
+        if op == "var" and args and not _is_literal(args[0]):
+            # Paths computed from the data can be of any type
+            return False
+        if op == "reduce":
+            # The initial value is returned as-is, never evaluated
+            args = args[:2]
+        return all(self.is_safe(arg) for arg in args)
+
+    def is_pure(self, logic: Any) -> bool:
+        """Check whether evaluating a node twice gives the same result, so a repeat can be dropped."""
+        if isinstance(logic, list):
+            return all(self.is_pure(item) for item in logic)
+        if is_constant(logic):
+            return True
+
+        op, args = split_operation(logic)
+        if op == "log" or (op not in ("and", "or", "if", "?:") and op not in ARRAY_OPERATIONS and not self.is_builtin(op)):
+            return False
+        return all(self.is_pure(arg) for arg in args)
+
+    def optimize(self, logic: Any, truthy: bool = False) -> Any:
+        """
+        Optimize a node. `truthy` is set when only the truth value of the node is used,
+        as for conditions, array predicates, and operands of `and`/`or` in such a position.
+        """
+        if isinstance(logic, list):
+            return [self.optimize(item) for item in logic]
+        if is_constant(logic):
+            return logic
+
+        op, args = split_operation(logic)
+
+        if op in ("and", "or"):
+            args = [self.optimize(arg, truthy) for arg in args]
+        elif op in ("if", "?:"):
+            # Conditions are at even positions, except for a trailing else value
+            args = [self.optimize(arg, truthy or (index % 2 == 0 and index < len(args) - 1))
+                    for index, arg in enumerate(args)]
+        elif op in ("!", "!!"):
+            args = [self.optimize(arg, True) for arg in args]
+        elif op in ("filter", "all", "some", "none"):
+            args = [self.optimize(arg, index == 1) for index, arg in enumerate(args)]
+        elif op == "reduce":
+            # The initial value is returned as-is, never evaluated
+            args = [self.optimize(arg) for arg in args[:2]] + args[2:]
+        else:
+            args = [self.optimize(arg) for arg in args]
+
+        if op in ("and", "or"):
+            return self.optimize_logical(op, args, truthy)
+        if op in ("if", "?:"):
+            return self.optimize_if(op, args)
+        if op in ("!", "!!") and args:
+            simplified = self.optimize_not(op, args[0], truthy)
+            if simplified is not None:
+                return simplified
+
+        # Keep the single-argument shorthand, e.g. {"var": "x"}
+        node = {op: args if isinstance(logic[op], list) or len(args) != 1 else args[0]}
+        return self.fold(op, args, node)
+
+    def fold(self, op: str, args: List[Any], node: Dict[str, Any]) -> Any:
+        """Evaluate an operation on literal arguments once, at optimization time."""
+        if op in DATA_OPERATIONS or op == "log" or op in ARRAY_OPERATIONS or not self.is_builtin(op):
+            return node
+        if not all(_is_literal(arg) for arg in args):
+            return node
+
+        try:
+            value = jsonLogic(node, None, self.operations)
+        except Exception:
+            # Leave the error to evaluation time
+            return node
+
+        # Lists and dictionaries would be evaluated again as rules, so only scalars are inlined
+        return value if _is_scalar(value) else node
+
+    def optimize_not(self, op: str, arg: Any, truthy: bool) -> Optional[Any]:
+        """Simplify negations, returning None if nothing applies."""
+        if isinstance(arg, dict) and len(arg) == 1:
+            inner_op, inner_args = split_operation(arg)
+            if inner_op == "!!" and inner_args and self.is_builtin("!!"):
+                # Truthiness is applied by the outer operation anyway
+                return {op: [inner_args[0]]}
+            if op == "!" and inner_op == "!" and inner_args and self.is_builtin("!"):
+                return {"!!": [inner_args[0]]}
+            if op == "!" and inner_op in ("==", "!=") and self.is_builtin("==") and self.is_builtin("!="):
+                return {"!=" if inner_op == "==" else "==": inner_args}
+
+        if op == "!!" and (truthy or self.is_boolean(arg)):
+            return arg
+        return None
+
+    def optimize_if(self, op: str, args: List[Any]) -> Any:
+        """Drop branches whose condition is a constant."""
+        kept = []
+        index = 0
+        while index < len(args) - 1:
+            condition, value = args[index], args[index + 1]
+            index += 2
+            if not _is_literal(condition):
+                kept += [condition, value]
+            elif to_bool(jsonLogic(condition)):
+                # Later branches are unreachable, this value becomes the else branch
+                kept.append(value)
+                break
+        else:
+            if index < len(args):
+                kept.append(args[index])
+
+        if len(kept) <= 1:
+            # Only an else branch (or nothing) is left
+            return kept[0] if kept else None
+        return {op: kept}
+
+    def optimize_logical(self, op: str, args: List[Any], truthy: bool) -> Any:
+        """Flatten, simplify and reorder the operands of an `and` or `or`."""
+        # `and` stops at the first falsy operand, `or` at the first truthy one
+        stops = not_ if op == "and" else to_bool
+
+        flattened = []
+        for arg in args:
+            if isinstance(arg, dict) and len(arg) == 1 and op in arg:
+                inner_args = split_operation(arg)[1]
+                if inner_args:
+                    flattened.extend(inner_args)
+                    continue
+            flattened.append(arg)
+
+        operands = []
+        for position, arg in enumerate(flattened):
+            if is_constant(arg):
+                if stops(arg):
+                    # Operands after a deciding constant are never evaluated
+                    operands.append(arg)
+                    break
+                if position < len(flattened) - 1:
+                    # A constant that does not decide the result is skipped over
+                    continue
+            operands.append(arg)
+
+        # Drop repeated operands: a repeat passes whenever the first one did. A repeat
+        # in last position decides the result, which is only the same value if every
+        # operand is boolean.
+        last_interchangeable = truthy or all(self.is_boolean(arg) for arg in operands)
+        seen = set()
+        deduplicated = []
+        for position, arg in enumerate(operands):
+            key = rule_key(arg)
+            if key in seen and self.is_pure(arg) and (position < len(operands) - 1 or last_interchangeable):
+                continue
+            seen.add(key)
+            deduplicated.append(arg)
+        operands = deduplicated
+
+        # Whether operands can be treated as truth values: reordered, or replaced with a constant
+        interchangeable = truthy or all(self.is_boolean(arg) for arg in operands[:-1])
+
+        if len(operands) > 1 and isinstance(operands[-1], bool) and interchangeable:
+            others = operands[:-1]
+            if stops(operands[-1]):
+                if all(self.is_safe(arg) for arg in others):
+                    # e.g. {"and": [x, false]} is false whatever x is
+                    return operands[-1]
+            else:
+                # e.g. {"and": [x, true]} is x when x is boolean
+                operands = others
+
+        interchangeable = truthy or all(self.is_boolean(arg) for arg in operands)
+        if len(operands) > 1 and interchangeable and all(self.is_safe(arg) for arg in operands):
+            if op == "and" and self.is_contradiction(operands):
+                return False
+            if op == "or" and self.is_tautology(operands):
+                return True
+            # Only the truth value of the operands matters, so any order gives the same result
+            operands = sorted(operands, key=estimate_cost)
+
+        if len(operands) == 1:
+            return operands[0]
+        return {op: operands}
+
+    def polarity(self, logic: Any) -> Tuple[str, bool]:
+        """Split a condition into the key of its positive form and whether it is negated."""
+        if isinstance(logic, dict) and len(logic) == 1:
+            op, args = split_operation(logic)
+            if op == "!" and args:
+                return rule_key(args[0]), True
+            if op == "!=" and self.is_builtin("!="):
+                return rule_key({"==": args}), True
+        return rule_key(logic), False
+
+    def has_negation_pair(self, operands: List[Any]) -> bool:
+        polarities = {}
+        for operand in operands:
+            key, negated = self.polarity(operand)
+            if polarities.setdefault(key, negated) != negated:
+                return True
+        return False
+
+    def is_tautology(self, operands: List[Any]) -> bool:
+        """Check whether one of the operands of an `or` is the negation of another."""
+        return self.has_negation_pair(operands)
+
+    def is_contradiction(self, operands: List[Any]) -> bool:
+        """Check whether the operands of an `and` can never all be true."""
+        if self.has_negation_pair(operands):
+            return True
+
+        # Constraints on each compared expression, keyed by its canonical form
+        equals: Dict[str, List[Any]] = {}
+        bounds: Dict[str, List[Tuple[str, float]]] = {}
+
+        for operand in operands:
+            for subject, op, value in self.constraints(operand):
+                if op == "==":
+                    equals.setdefault(subject, []).append(value)
+                else:
+                    bounds.setdefault(subject, []).append((op, value))
+
+        for subject, values in equals.items():
+            for other in values[1:]:
+                if _never_both_equal(values[0], other):
+                    return True
+
+        for subject in set(equals) | set(bounds):
+            numbers = [value for value in equals.get(subject, []) if _is_number(value)]
+            if _empty_range(bounds.get(subject, []), numbers):
+                return True
+
+        return False
+
+    def constraints(self, logic: Any) -> List[Tuple[str, str, Any]]:
+        """
+        Get (subject, operator, literal) constraints from a comparison.
+
+        Comparisons with a number compare the number with `to_number(subject)` for
+        every JSON value, so numeric bounds on the same subject can be combined.
+        """
+        if not isinstance(logic, dict) or len(logic) != 1:
+            return []
+        op, args = split_operation(logic)
+        if not self.is_builtin(op):
+            return []
+
+        if op == "==" and len(args) == 2:
+            subject, value = args
+            if _is_literal(subject) and not _is_literal(value):
+                subject, value = value, subject
+            if not _is_literal(subject) and (_is_number(value) or isinstance(value, str)):
+                return [(rule_key(subject), "==", value)]
+            return []
+
+        if op not in COMPARISONS:
+            return []
+
+        if len(args) == 3:
+            # Between: {"<": [low, x, high]}
+            low, subject, high = args
+            if _is_number(low) and _is_number(high) and not _is_literal(subject):
+                lower = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}[op]
+                return [(rule_key(subject), lower, low), (rule_key(subject), op, high)]
+            return []
+
+        if len(args) == 2:
+            subject, value = args
+            if _is_number(value) and not _is_literal(subject):
+                return [(rule_key(subject), op, value)]
+            if _is_number(subject) and not _is_literal(value):
+                # {"<": [5, x]} bounds x from below
+                flipped = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}[op]
+                return [(rule_key(value), flipped, subject)]
+        return []
+
+def _never_both_equal(a: Any, b: Any) -> bool:
+    """Check whether no value is loosely equal to both literals."""
+    if _is_number(a) and _is_number(b):
+        return a != b
+    if isinstance(a, str) and isinstance(b, str):
+        # Numbers are compared with strings after conversion, so "1" and "1.0" can both match 1
+        return a != b and to_number(a) != to_number(b)
+    return False
+
+def _empty_range(bounds: List[Tuple[str, float]], equals: List[float]) -> bool:
+    """Check whether numeric bounds and equalities leave no possible value."""
+    low, low_strict = -math.inf, False
+    high, high_strict = math.inf, False
+
+    for op, value in bounds:
+        if op in (">", ">="):
+            if value > low or (value == low and op == ">"):
+                low, low_strict = value, op == ">"
+        elif value < high or (value == high and op == "<"):
+            high, high_strict = value, op == "<"
+
+    for value in equals:
+        if value < low or value > high or (value == low and low_strict) or (value == high and high_strict):
+            return True
+
+    return low > high or (low == high and (low_strict or high_strict))
@@ -0,0 +1,391 @@
+"""
+Find the rules that match a record without evaluating every rule.
+
+`RuleIndex` looks for a guard in each rule: comparisons of a `var` lookup with
+constants that must hold for the rule to be truthy, such as one condition of an
+`and`. Guards are indexed by the `var` path, or array length, they compare:
+
+- `==` with a constant goes into hash buckets, with keys that follow the loose
+  equality of `json_logic` (`"30"`, `30` and `30.0` share a bucket)
+- `<`, `<=`, `>`, `>=` and range checks with numeric bounds go into an interval
+  tree over the numeric value of the field
+- `in` with a list of constants goes into a membership set, and `in` on an array
+  field ("contains") into a set of the constants looked for
+
+For a record, each indexed field is evaluated once, and only the rules whose
+guard can hold, plus the rules without a guard, are evaluated. A rule is only
+skipped when its guard proves it evaluates to a falsy value without raising, so
+`matching` returns exactly the rules for which `JSONLogicUtils.test_rule` is truthy.
+"""
+
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+from json_logic.builtins import BUILTINS, to_bool, to_number, to_string
+
+from utils.jsonlogic_compiler import CompiledRule, compile_rule, is_constant, is_count_reducer, rule_key, split_operation
+from utils.jsonlogic_operations import OPERATIONS, op_length
+from utils.jsonlogic_optimizer import _Optimizer
+from utils.jsonlogic_ruleset import RuleSet
+
+# A guard is (kind, field, parameters), see _GuardFinder.predicate. The field is a
+# `var` lookup or the length of one, and is evaluated once per record for all guards on it
+Guard = Tuple[str, Dict[str, Any], Any]
+
+# Guards with a lower rank usually let fewer records through, so they are preferred within an `and`
+GUARD_RANKS = {"equals": 0, "in": 1, "range": 2, "contains": 3, "equals_bool": 4}
+
+RANGE_OPERATIONS = {"<", "<=", ">", ">="}
+
+INFINITY = float("inf")
+
+class RuleIndex:
+    """
+    Rules indexed by the constants they compare record fields with.
+
+    Example:
+        >>> index = RuleIndex({
+        ...     "US users": {"==": [{"var": "user.address.country"}, "US"]},
+        ...     "adults": {">=": [{"var": "user.age"}, 18]},
+        ... })
+        >>> index.matching({"user": {"age": 35, "address": {"country": "UK"}}})
+        ['adults']
+    """
+
+    def __init__(self, rules: Union[Mapping[str, Any], Sequence[Any]], operations: Dict[str, Any] = OPERATIONS):
+        """
+        Args:
+            rules: Rules by name, or a list of rules named by their position
+            operations: Operation table, same as the `operations` argument of `json_logic.jsonLogic`
+        """
+        # Candidate rules are evaluated together, sharing their common subexpressions
+        self._rule_set = RuleSet(rules, operations)
+        self.names = self._rule_set.names
+        rules = list(rules.values()) if isinstance(rules, Mapping) else list(rules)
+
+        self._fields: Dict[str, _FieldIndex] = {}
+        self._unindexed: List[int] = []
+
+        finder = _GuardFinder(operations)
+        for position, rule in enumerate(rules):
+            guards = finder.guards(rule)
+            if guards is None:
+                self._unindexed.append(position)
+                continue
+            for kind, field_logic, parameters in guards:
+                key = rule_key(field_logic)
+                field = self._fields.get(key)
+                if field is None:
+                    field = self._fields[key] = _FieldIndex(compile_rule(field_logic, operations))
+                field.add(kind, parameters, position)
+
+        for field in self._fields.values():
+            field.build()
+
+        self.indexed_count = len(rules) - len(self._unindexed)
+
+    def candidates(self, data: Any) -> List[int]:
+        """Get the positions of the rules that may match a record, in rule order."""
+        positions: Set[int] = set(self._unindexed)
+        for field in self._fields.values():
+            field.candidates(data, positions)
+        return sorted(positions)
+
+    def matching(self, data: Any) -> List[Any]:
+        """Get the names of the rules whose result is truthy for a record, in rule order."""
+        return self._rule_set.matching(data, self.candidates(data))
+
+    def __len__(self) -> int:
+        return len(self._rule_set)
+
+class _GuardFinder:
+    """Find indexable conditions that must hold for a rule to be truthy."""
+
+    def __init__(self, operations: Dict[str, Any]):
+        self.operations = operations
+        self.optimizer = _Optimizer(operations)
+
+    def guards(self, logic: Any) -> Optional[List[Guard]]:
+        """
+        Get guards such that if none of them holds, the rule evaluates to a falsy
+        value without raising. Returns None if there are none.
+        """
+        if isinstance(logic, list):
+            return None
+        if is_constant(logic):
+            return None if to_bool(logic) else []
+
+        op, args = split_operation(logic)
+        if op == "and":
+            best = None
+            for arg in args:
+                guards = self.guards(arg)
+                if guards is not None and (best is None or _rank(guards) < _rank(best)):
+                    best = guards
+                # Operands after one that may raise are only reached if it did not
+                if not self.optimizer.is_safe(arg):
+                    break
+            return best
+
+        if op == "or":
+            if not args:
+                return []
+            guards = []
+            for arg in args:
+                arg_guards = self.guards(arg)
+                if arg_guards is None:
+                    return None
+                guards.extend(arg_guards)
+            return guards
+
+        guard = self.predicate(op, args)
+        return None if guard is None else [guard]
+
+    def predicate(self, op: str, args: List[Any]) -> Optional[Guard]:
+        """Translate a comparison of a field with constants into a guard."""
+        if self.operations.get(op) is not BUILTINS.get(op):
+            return None
+
+        if op == "==" and len(args) == 2:
+            field, value = self.field_and_constant(args)
+            if field is None or not _is_scalar(value):
+                return None
+            return ("equals_bool" if isinstance(value, bool) else "equals", field, value)
+
+        if op in RANGE_OPERATIONS and len(args) in (2, 3):
+            return self.range(op, args)
+
+        if op == "in" and len(args) == 2:
+            needle, haystack = args
+            if self.is_field(needle) and isinstance(haystack, list) and haystack and all(_is_scalar(item) for item in haystack):
+                return ("in", needle, frozenset(haystack))
+            if self.is_field(haystack) and _is_scalar(needle):
+                return ("contains", haystack, needle)
+
+        return None
+
+    def range(self, op: str, args: List[Any]) -> Optional[Guard]:
+        """Translate a numeric comparison into the interval (low, high, low inclusive, high inclusive) of field values."""
+        inclusive = op in ("<=", ">=")
+        if op in (">", ">="):
+            # a > b > c is c < b < a
+            args = args[::-1]
+
+        if len(args) == 2:
+            left, right = args
+            if self.is_field(left) and _is_number(right):
+                return ("range", left, (-INFINITY, right, True, inclusive))
+            if _is_number(left) and self.is_field(right):
+                return ("range", right, (left, INFINITY, inclusive, True))
+            return None
+
+        low, field, high = args
+        if self.is_field(field) and _is_number(low) and _is_number(high):
+            return ("range", field, (low, high, inclusive, inclusive))
+        return None
+
+    def field_and_constant(self, args: List[Any]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        left, right = args
+        if self.is_field(left) and is_constant(right):
+            return left, right
+        if self.is_field(right) and is_constant(left):
+            return right, left
+        return None, None
+
+    def is_field(self, logic: Any) -> bool:
+        """Check whether a node is a `var` lookup of a constant path, or the length of one. Neither can raise."""
+        if not isinstance(logic, dict) or len(logic) != 1:
+            return False
+        op, args = split_operation(logic)
+
+        if op == "reduce" and len(args) == 3:
+            # Length checks of the portable operator mode
+            items, reducer, init = args
+            return type(init) is int and is_count_reducer(reducer, self.operations) and self.is_field(items)
+        if op == "length" and self.operations.get(op) is op_length:
+            return len(args) >= 1 and all(self.optimizer.is_safe(arg) for arg in args) and self.is_field(args[0])
+
+        if op != "var" or self.operations.get("var") is not BUILTINS["var"]:
+            return False
+        return len(args) <= 2 and all(is_constant(arg) for arg in args) and (not args or _is_scalar(args[0]))
+
+class _FieldIndex:
+    """Guards on one field."""
+
+    def __init__(self, getter: CompiledRule):
+        self.getter = getter
+        self.equals: Dict[Tuple[str, Any], List[int]] = {}
+        self.members: Dict[Any, List[int]] = {}
+        self.contains: Dict[Any, List[int]] = {}
+        self.contains_all: List[int] = []
+        self.intervals: List[Tuple[float, float, bool, bool, int]] = []
+        self.tree: Optional[_IntervalTree] = None
+
+    def add(self, kind: str, parameters: Any, position: int):
+        if kind in ("equals", "equals_bool"):
+            for key in _constant_keys(parameters):
+                self.equals.setdefault(key, []).append(position)
+        elif kind == "in":
+            for value in parameters:
+                self.members.setdefault(value, []).append(position)
+        elif kind == "contains":
+            self.contains.setdefault(parameters, []).append(position)
+            self.contains_all.append(position)
+        else:
+            low, high, low_inclusive, high_inclusive = parameters
+            # Empty ranges, e.g. from bounds in the wrong order, never hold
+            if low < high or (low == high and low_inclusive and high_inclusive):
+                self.intervals.append((*parameters, position))
+
+    def build(self):
+        if self.intervals:
+            self.tree = _IntervalTree(self.intervals)
+        # Rules can be listed twice under one key, e.g. `in` with both 1 and 1.0
+        for buckets in (self.equals, self.members):
+            for key, positions in buckets.items():
+                buckets[key] = list(dict.fromkeys(positions))
+
+    def candidates(self, data: Any, positions: Set[int]):
+        value = self.getter(data)
+        known = _is_json(value)
+
+        if self.equals:
+            keys = _value_keys(value) if known else None
+            if keys is None:
+                positions.update(position for bucket in self.equals.values() for position in bucket)
+            else:
+                for key in keys:
+                    positions.update(self.equals.get(key, ()))
+
+        if self.members and not isinstance(value, (list, dict)):
+            # Arrays and objects never equal the scalar constants of the list
+            if not known:
+                positions.update(position for bucket in self.members.values() for position in bucket)
+            else:
+                positions.update(self.members.get(value, ()))
+
+        if self.contains:
+            if isinstance(value, list):
+                for item in value:
+                    if not isinstance(item, (list, dict)):
+                        positions.update(self.contains.get(item, ()))
+            elif isinstance(value, str) or not known:
+                # `in` on a string is a substring check
+                positions.update(self.contains_all)
+
+        if self.tree is not None:
+            number = _number_of(value) if known else None
+            if number is None:
+                positions.update(interval[4] for interval in self.intervals)
+            else:
+                self.tree.stab(number, positions)
+
+class _IntervalTree:
+    """
+    Static centered interval tree, for finding the intervals that contain a value.
+
+    Each node keeps the intervals that contain its center, sorted by their low
+    and by their high end. Intervals entirely below or above the center go to the
+    left or right subtree.
+    """
+
+    def __init__(self, intervals: List[Tuple[float, float, bool, bool, int]]):
+        # The median end leaves less than half of the intervals to each subtree
+        ends = sorted(end for interval in intervals for end in interval[:2])
+        self.center = ends[len(ends) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        self.by_low = sorted(here, key=lambda interval: interval[0])
+        self.by_high = sorted(here, key=lambda interval: interval[1], reverse=True)
+        self.left = _IntervalTree(left) if left else None
+        self.right = _IntervalTree(right) if right else None
+
+    def stab(self, value: float, positions: Set[int]):
+        """Add the positions of the intervals containing a value."""
+        node = self
+        while node is not None:
+            if value < node.center:
+                for interval in node.by_low:
+                    if interval[0] > value:
+                        break
+                    if _contains(interval, value):
+                        positions.add(interval[4])
+                node = node.left
+            elif value > node.center:
+                for interval in node.by_high:
+                    if interval[1] < value:
+                        break
+                    if _contains(interval, value):
+                        positions.add(interval[4])
+                node = node.right
+            else:
+                for interval in node.by_low:
+                    if _contains(interval, value):
+                        positions.add(interval[4])
+                return
+
+def _contains(interval: Tuple[float, float, bool, bool, int], value: float) -> bool:
+    low, high, low_inclusive, high_inclusive, _ = interval
+    return (low < value or (low_inclusive and low == value)) and (value < high or (high_inclusive and value == high))
+
+def _rank(guards: List[Guard]) -> Tuple[int, int]:
+    return (max((GUARD_RANKS[guard[0]] for guard in guards), default=-1), len(guards))
+
+def _is_scalar(value: Any) -> bool:
+    """Check whether a value is a JSON scalar that `==` and `in` compare by value."""
+    if isinstance(value, float):
+        return not math.isnan(value)
+    return value is None or isinstance(value, (str, int))
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not math.isnan(value)
+
+def _is_json(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, list, dict))
+
+def _number_of(value: Any) -> Optional[float]:
+    """Numeric value used by `<` and friends with a numeric bound, or None if it cannot be computed safely."""
+    try:
+        return to_number(value)
+    except (TypeError, RecursionError):
+        return None
+
+# Equality keys: `==` from json_logic is true for a record value and a constant
+# only if one of the keys of the value is one of the keys of the constant.
+
+def _constant_keys(value: Any) -> List[Tuple[str, Any]]:
+    if value is None:
+        # null == 0 and null == false, through to_number(null)
+        return [("null", None), ("number", 0)]
+    if isinstance(value, str):
+        keys = [("string", value)]
+        number = to_number(value)
+        if not math.isnan(number):
+            keys.append(("number", number))
+        return keys
+    # Numbers and booleans, True is 1
+    return [("number", value)]
+
+def _value_keys(value: Any) -> Optional[List[Tuple[str, Any]]]:
+    if value is None:
+        return [("null", None), ("number", 0)]
+    if isinstance(value, (int, float)):
+        return [] if isinstance(value, float) and math.isnan(value) else [("number", value)]
+    if isinstance(value, dict):
+        return [("string", "[object Object]")]
+
+    try:
+        keys = [("string", value if isinstance(value, str) else to_string(value))]
+        number = to_number(value)
+    except (TypeError, RecursionError):
+        return None
+    if not math.isnan(number):
+        keys.append(("number", number))
+    return keys
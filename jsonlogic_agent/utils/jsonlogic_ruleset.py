@@ -0,0 +1,192 @@
+"""
+Evaluate many JSONLogic rules against a record in one pass.
+
+Rules generated for the same schema repeat the same `var` lookups and often the
+same comparisons. `RuleSet` compiles all rules together. It gives every distinct
+subexpression one shared closure, and caches each subexpression's value per record,
+so it is computed at most once no matter how many rules use it. Dotted `var`
+paths share their prefixes too: `user.age` and `user.tags` both reuse the lookup
+of `user`.
+
+Values are computed lazily, so `and`, `or`, `if` and the array operations skip
+the same operands as they do when each rule is evaluated on its own. Each rule
+returns the same value as `json_logic.jsonLogic(rule, record)`.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+from json_logic.builtins import to_bool
+
+from utils.jsonlogic_compiler import CompiledRule, _Compiler, _parse_index, is_constant, rule_key
+from utils.jsonlogic_operations import OPERATIONS
+
+# Marks a subexpression that has not been computed for the current record
+_UNSET = object()
+
+class RuleSet:
+    """
+    A group of rules compiled together, sharing identical subexpressions.
+
+    A RuleSet evaluates one record at a time, so use one instance per thread.
+
+    Example:
+        >>> rules = RuleSet({
+        ...     "adults": {">=": [{"var": "user.age"}, 18]},
+        ...     "active adults": {"and": [{">=": [{"var": "user.age"}, 18]}, {"var": "user.isActive"}]},
+        ... })
+        >>> rules.evaluate({"user": {"age": 35, "isActive": False}})
+        {'adults': True, 'active adults': False}
+        >>> rules.matching({"user": {"age": 35, "isActive": False}})
+        ['adults']
+    """
+
+    def __init__(self, rules: Union[Mapping[str, Any], Sequence[Any]], operations: Dict[str, Any] = OPERATIONS):
+        """
+        Args:
+            rules: Rules by name, or a list of rules named by their position
+            operations: Operation table, same as the `operations` argument of `json_logic.jsonLogic`
+        """
+        if isinstance(rules, Mapping):
+            self.names = list(rules.keys())
+            rules = list(rules.values())
+        else:
+            rules = list(rules)
+            self.names = list(range(len(rules)))
+
+        # A first pass counts how often each subexpression occurs, so that only
+        # the shared ones pay for a cache lookup in the compiled rules
+        counter = _SharedCompiler(operations, self)
+        for rule in rules:
+            counter.compile(rule)
+
+        compiler = _SharedCompiler(operations, self, counter.counts)
+        self._rules = [compiler.compile(rule) for rule in rules]
+        self._memo: List[Any] = []
+        self._size = compiler.slots
+
+        # Distinct subexpressions, and how many repeats of them were compiled away
+        self.shared_count = len(counter.counts)
+        self.reused_count = sum(counter.counts.values()) - len(counter.counts)
+
+    def evaluate(self, data: Any) -> Dict[Any, Any]:
+        """Evaluate every rule against a record, returning the result of each rule by name."""
+        self._memo = [_UNSET] * self._size
+        return {name: rule(data) for name, rule in zip(self.names, self._rules)}
+
+    def matching(self, data: Any, positions: Optional[Iterable[int]] = None) -> List[Any]:
+        """
+        Get the names of the rules whose result is truthy for a record.
+
+        Args:
+            data: The record
+            positions: Positions of the rules to evaluate, in order. Defaults to all rules.
+        """
+        self._memo = [_UNSET] * self._size
+        if positions is None:
+            return [name for name, rule in zip(self.names, self._rules) if to_bool(rule(data))]
+
+        names = self.names
+        rules = self._rules
+        return [names[position] for position in positions if to_bool(rules[position](data))]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+class _SharedCompiler(_Compiler):
+    """Compiler that returns one closure per distinct subexpression at record scope, memoizing those used more than once."""
+
+    def __init__(self, operations: Dict[str, Any], rule_set: RuleSet, counts: Optional[Dict[str, int]] = None):
+        super().__init__(operations)
+        self.rule_set = rule_set
+        # Without counts, this compiler only counts the uses of each subexpression
+        self.counting = counts is None
+        self.counts: Dict[str, int] = {} if counts is None else counts
+        self.shared: Dict[str, CompiledRule] = {}
+        self.slots = 0
+        # Per-item logic of array operations sees each item as its data, so it is compiled without sharing
+        self.scope_compiler = _Compiler(operations)
+
+    def compile(self, logic: Any) -> CompiledRule:
+        if isinstance(logic, list) or is_constant(logic):
+            return super().compile(logic)
+
+        key = rule_key(logic)
+        shared = self.shared.get(key)
+        if shared is not None:
+            if self.counting:
+                self.counts[key] += 1
+            return shared
+
+        compiled = super().compile(logic)
+        if self.counting:
+            self.counts[key] = 1
+        elif self.counts[key] > 1:
+            compiled = self.memoize(compiled, self.returns_data(logic))
+        self.shared[key] = compiled
+        return compiled
+
+    def compile_scope(self, sublogic: Any) -> CompiledRule:
+        return self.scope_compiler.compile(sublogic)
+
+    def compile_var(self, args: List[Any]) -> CompiledRule:
+        if len(args) <= 2 and all(is_constant(arg) for arg in args) and isinstance(args[0] if args else None, str):
+            key = args[0]
+            default = args[1] if len(args) > 1 else None
+            prefix, _, prop = key.rpartition(".")
+            # op_var stops at a "length" segment of an array or string, so such prefixes cannot be reused
+            if prefix and "length" not in prefix.split("."):
+                parent = {"var": prefix}
+                if self.counting or self.counts[rule_key(parent)] > 1:
+                    return _var_step(self.compile(parent), prop, default)
+
+        return super().compile_var(args)
+
+    def returns_data(self, logic: Any) -> bool:
+        """Check whether a node is a `var` lookup, whose arrays and objects come from the record itself."""
+        if not isinstance(logic, dict) or len(logic) != 1 or "var" not in logic:
+            return False
+        args = logic["var"] if isinstance(logic["var"], list) else [logic["var"]]
+        # A default array or object would be a new one on every evaluation
+        return len(args) <= 2 and all(is_constant(arg) and not isinstance(arg, dict) for arg in args)
+
+    def memoize(self, compiled: CompiledRule, returns_data: bool) -> CompiledRule:
+        rule_set = self.rule_set
+        slot = self.slots
+        self.slots += 1
+
+        def memoized(data):
+            memo = rule_set._memo
+            value = memo[slot]
+            if value is _UNSET:
+                value = compiled(data)
+                # Arrays and objects built by the rule are new on every evaluation, and
+                # `==` compares them by identity, so they are not shared between uses
+                if returns_data or not isinstance(value, (list, dict)):
+                    memo[slot] = value
+            return value
+
+        return memoized
+
+def _var_step(parent: CompiledRule, prop: str, default: Any) -> CompiledRule:
+    """Resolve the last segment of a `var` path from the value of its parent path, like `op_var`."""
+    index = _parse_index(prop)
+
+    def var(data):
+        value = parent(data)
+        if isinstance(value, dict):
+            value = value.get(prop)
+        elif isinstance(value, (list, str)):
+            if prop == "length":
+                # emulate JavaScript behavior
+                return len(value)
+            if index is None or index >= len(value):
+                return default
+            value = value[index]
+        else:
+            return default
+
+        if value is None:
+            return default
+        return value
+
+    return var
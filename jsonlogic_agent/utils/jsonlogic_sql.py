@@ -0,0 +1,567 @@
+"""
+Translate JSONLogic rules into SQL `WHERE` clauses for SQLite.
+
+When records are stored in SQLite, filtering them in the database avoids reading
+every row into Python just to evaluate the rule. `rule_to_sql` translates the
+rules `create_jsonlogic_from_intent` produces, in either operator mode, into a
+condition with named parameters:
+
+    where, params = rule_to_sql({">": [{"var": "user.age"}, 30]})
+    connection.execute(f"SELECT id FROM records WHERE {where}", params)
+
+Records are read from a JSON column with SQLite's JSON functions
+(`json_extract`, `json_type`, `json_each`), or, for fields listed in `columns`,
+from ordinary columns holding scalar values. Numeric path segments index arrays.
+
+The condition selects the records for which the rule is truthy in
+`json_logic.jsonLogic`. Comparisons follow its rules when a field holds a value of
+the type it is compared with, is null, or is missing (which compares like `0`
+with numbers and like `"null"` with strings). Conversions between other types,
+such as numbers stored in strings or arrays compared with numbers, are not
+reproduced: those comparisons are false. Boolean columns are compared as 0 and 1.
+
+Rules using operations without a SQL translation raise a `ValueError`.
+"""
+
+import math
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from json_logic.builtins import BUILTINS, to_bool, to_number, to_string
+
+from utils.jsonlogic_compiler import _parse_index, is_constant, is_count_reducer, split_operation
+from utils.jsonlogic_operations import OPERATIONS
+
+COMPARISONS = {"<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+NUMBER_TYPES = "('integer', 'real', 'true', 'false')"
+
+def rule_to_sql(rule: Any, json_column: str = "data", columns: Optional[Mapping[str, str]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Translate a JSONLogic rule into a SQLite condition on a table of records.
+
+    Args:
+        rule: A JSONLogic rule, e.g. the output of `create_jsonlogic_from_intent`
+        json_column: Column holding each record as JSON text
+        columns: Optional mapping from `var` paths to columns holding those fields as scalar values
+
+    Returns:
+        The condition, which is 1 for the records the rule matches and 0 otherwise,
+        and its named parameters
+
+    Raises:
+        ValueError: If the rule contains an operation that cannot be translated
+
+    Example:
+        >>> where, params = rule_to_sql({"==": [{"var": "user.address.country"}, "US"]})
+        >>> connection.execute(f"SELECT id FROM records WHERE {where}", params).fetchall()
+        [(1,), (4,)]
+    """
+    translator = _SqlTranslator(json_column, columns or {})
+    return translator.condition(rule, None), translator.params
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for SQLite."""
+    return '"' + name.replace('"', '""') + '"'
+
+def json_path(path: str) -> str:
+    """Convert a dot-notation `var` path into a SQLite JSON path, e.g. `user.tags.1` into `$."user"."tags"[1]`."""
+    if path == "":
+        return "$"
+
+    steps = []
+    for prop in path.split("."):
+        index = _parse_index(prop)
+        if index is not None:
+            steps.append(f"[{index}]")
+        elif '"' in prop:
+            raise ValueError(f"Cannot translate path with quotes to SQL: {path!r}")
+        else:
+            steps.append(f'."{prop}"')
+    return "$" + "".join(steps)
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+class _Operand:
+    """
+    A translated value.
+
+    A "field" comes from the record, and its `json_type` name (or `typeof`
+    for columns) is known only in SQL. A "number" or "text" is computed by
+    the rule and NULL when `json_logic` would not produce a comparable value.
+    A "constant" is known when translating.
+    """
+
+    def __init__(self, kind: str, value: Any, type_sql: Optional[str] = None, source: Optional[Tuple[str, str]] = None):
+        self.kind = kind
+        self.value = value
+        self.type_sql = type_sql
+        # JSON document and path of a field read from JSON, needed for array operations
+        self.source = source
+
+class _SqlTranslator:
+    """Translate one JSONLogic node at a time, collecting the parameters of constants."""
+
+    def __init__(self, json_column: str, columns: Mapping[str, str]):
+        self.json_column = quote_identifier(json_column)
+        self.columns = columns
+        self.params: Dict[str, Any] = {}
+        self.scopes = 0
+
+    def param(self, value: Any) -> str:
+        name = f"p{len(self.params)}"
+        self.params[name] = value
+        return f":{name}"
+
+    def constant(self, value: Any) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, float) and math.isnan(value):
+            return "NULL"
+        return self.param(value)
+
+    # Conditions
+
+    def condition(self, logic: Any, scope: Optional[_Operand]) -> str:
+        """Translate a node into a SQL expression that is 1 where the node is truthy and 0 otherwise."""
+        if isinstance(logic, list):
+            return "1" if logic else "0"
+        if is_constant(logic):
+            return "1" if to_bool(logic) else "0"
+
+        op, args = split_operation(logic)
+        if op == "and":
+            if not args:
+                return "0"
+            return "(" + " AND ".join(self.condition(arg, scope) for arg in args) + ")"
+        if op == "or":
+            if not args:
+                return "0"
+            return "(" + " OR ".join(self.condition(arg, scope) for arg in args) + ")"
+        if op in ("if", "?:"):
+            return self.condition_if(args, scope)
+        if op in ("some", "all", "none"):
+            return self.quantifier(op, args, scope)
+
+        self.check_builtin(op)
+        if op == "!":
+            return f"(NOT {self.condition(args[0] if args else None, scope)})"
+        if op == "!!":
+            return self.condition(args[0] if args else None, scope)
+        if op in ("==", "!="):
+            equals = self.equals(args, scope)
+            return equals if op == "==" else f"(NOT {equals})"
+        if op in COMPARISONS:
+            return self.compare(op, args, scope)
+        if op == "in":
+            return self.contains(args, scope)
+        if op in ("starts_with", "ends_with"):
+            return self.affix(op, args, scope)
+        if op == "is_empty":
+            return self.is_empty(self.operand(args[0] if args else None, scope))
+
+        return self.truth(self.operand(logic, scope))
+
+    def check_builtin(self, op: str):
+        if op not in OPERATIONS:
+            raise ValueError(f"Cannot translate operation to SQL: {op!r}")
+
+    def condition_if(self, args: List[Any], scope: Optional[_Operand]) -> str:
+        if not args:
+            return "0"
+        if len(args) == 1:
+            return self.condition(args[0], scope)
+
+        branches = []
+        index = 0
+        while index < len(args) - 1:
+            branches.append(f"WHEN {self.condition(args[index], scope)} THEN {self.condition(args[index + 1], scope)}")
+            index += 2
+        otherwise = self.condition(args[index], scope) if index < len(args) else "0"
+        return f"(CASE {' '.join(branches)} ELSE {otherwise} END)"
+
+    def quantifier(self, op: str, args: List[Any], scope: Optional[_Operand]) -> str:
+        if len(args) < 2:
+            return "1" if op == "none" else "0"
+
+        items = self.operand(args[0], scope)
+        if items.kind != "field" or items.source is None:
+            raise ValueError(f"Cannot translate {op!r} over a value that is not a JSON field: {args[0]}")
+
+        self.scopes += 1
+        alias = f"item{self.scopes}"
+        item = _Operand("field", f"{alias}.value", f"{alias}.type", (f"{alias}.value", "$"))
+        document, path = items.source
+        item_condition = self.condition(args[1], item)
+        each = f"FROM json_each({document}, {_literal(path)}) AS {alias}"
+
+        # CASE makes sure json_each only reads arrays
+        if op == "some":
+            return f"(CASE WHEN {items.type_sql} IS 'array' THEN EXISTS (SELECT 1 {each} WHERE {item_condition}) ELSE 0 END)"
+        if op == "none":
+            return f"(CASE WHEN {items.type_sql} IS 'array' THEN NOT EXISTS (SELECT 1 {each} WHERE {item_condition}) ELSE 1 END)"
+        # JsonLogic defines that all of an empty list is False
+        return (f"(CASE WHEN {items.type_sql} IS 'array' AND {items.value} != '[]' "
+                f"THEN NOT EXISTS (SELECT 1 {each} WHERE NOT {item_condition}) ELSE 0 END)")
+
+    def truth(self, operand: _Operand) -> str:
+        """SQL for `to_bool` of a value."""
+        if operand.kind == "constant":
+            return "1" if to_bool(operand.value) else "0"
+        if operand.kind == "number":
+            return f"COALESCE({operand.value} != 0, 0)"
+        if operand.kind == "text":
+            return f"COALESCE({operand.value} != '', 0)"
+
+        value, value_type = operand.value, operand.type_sql
+        return (f"(CASE WHEN {value_type} IN {NUMBER_TYPES} THEN {value} != 0 "
+                f"WHEN {value_type} = 'text' THEN {value} != '' "
+                f"WHEN {value_type} = 'array' THEN {value} != '[]' "
+                f"ELSE {value_type} IS 'object' END)")
+
+    def by_type(self, operand: _Operand, number: Optional[str], text: Optional[str], null: bool,
+                obj: Optional[bool] = None) -> str:
+        """
+        Build a condition from the type of a value: an expression for numbers and
+        for strings, and constant results for null and for objects. Types without an
+        expression, and arrays, give 0.
+        """
+        if operand.kind == "number":
+            return f"COALESCE({number}, 0)" if number else "0"
+        if operand.kind == "text":
+            return f"COALESCE({text}, 0)" if text else "0"
+
+        value_type = operand.type_sql
+        if operand.source is None and not null and not obj and bool(number) != bool(text):
+            # typeof() of a column is never NULL, so a plain AND is exact, and lets SQLite use an index on the column
+            if number:
+                return f"({number} AND {value_type} IN {NUMBER_TYPES})"
+            return f"({text} AND {value_type} = 'text')"
+
+        branches = []
+        if number:
+            branches.append(f"WHEN {value_type} IN {NUMBER_TYPES} THEN {number}")
+        if text:
+            branches.append(f"WHEN {value_type} = 'text' THEN {text}")
+        if null:
+            branches.append(f"WHEN {value_type} IS NULL OR {value_type} = 'null' THEN 1")
+        if obj:
+            branches.append(f"WHEN {value_type} = 'object' THEN 1")
+        if not branches:
+            return "0"
+        return f"COALESCE(CASE {' '.join(branches)} END, 0)"
+
+    def equals(self, args: List[Any], scope: Optional[_Operand]) -> str:
+        """SQL for `==`, the loose equality of `json_logic`, of a value and a constant."""
+        left, right = self.operands(args[:2], scope)
+        if left.kind == "constant" and right.kind == "constant":
+            return "1" if BUILTINS["=="](None, left.value, right.value) else "0"
+        if left.kind == "constant":
+            left, right = right, left
+        if right.kind != "constant":
+            raise ValueError(f"Cannot translate comparison of two computed values to SQL: {args}")
+
+        value, constant = left.value, right.value
+        # Numbers and booleans compare with the number form of the constant, strings with its string form
+        number = to_number(constant)
+        number_sql = None if math.isnan(number) else f"{value} = {self.constant(number)}"
+        text_sql = f"{value} = {self.constant(to_string(constant))}" if isinstance(constant, (str, list, dict)) else None
+        # Arrays are only ever equal to themselves, null and objects have a fixed number and string form
+        null = BUILTINS["=="](None, None, constant)
+        obj = BUILTINS["=="](None, {}, constant)
+        return self.by_type(left, number_sql, text_sql, null, obj)
+
+    def compare(self, op: str, args: List[Any], scope: Optional[_Operand]) -> str:
+        """SQL for `<`, `<=`, `>` and `>=`, including range checks with three arguments."""
+        args = list(args) + [None] * (2 - len(args))
+        operands = self.operands(args[:2], scope)
+        if len(args) > 2:
+            upper = self.operand(args[2], scope)
+            if upper.kind != "constant":
+                # A third value that is null at runtime turns the range check into a comparison
+                raise ValueError(f"Cannot translate range check with a computed bound to SQL: {args}")
+            if upper.value is not None:
+                operands.append(upper)
+
+        pairs = zip(operands, operands[1:])
+        return "(" + " AND ".join(self.compare_pair(op, left, right, args) for left, right in pairs) + ")"
+
+    def compare_pair(self, op: str, left: _Operand, right: _Operand, args: List[Any]) -> str:
+        if left.kind == "constant" and right.kind == "constant":
+            return "1" if BUILTINS[op](None, left.value, right.value) else "0"
+
+        sql_op = COMPARISONS[op]
+        if right.kind == "constant":
+            value, constant = left, right.value
+            template = "{value} " + sql_op + " {constant}"
+        elif left.kind == "constant":
+            value, constant = right, left.value
+            template = "{constant} " + sql_op + " {value}"
+        else:
+            raise ValueError(f"Cannot translate comparison of two computed values to SQL: {args}")
+
+        if not (constant is None or isinstance(constant, (str, int, float))):
+            raise ValueError(f"Cannot translate comparison with {constant!r} to SQL: {args}")
+
+        number = to_number(constant)
+        number_sql = None
+        if not math.isnan(number):
+            number_sql = template.format(value=value.value, constant=self.constant(number))
+        text_sql = None
+        if not isinstance(constant, (int, float)):
+            # Strings compare with strings, and with null as "null"
+            text_sql = template.format(value=value.value, constant=self.constant(to_string(constant)))
+        # Null and objects have a fixed number and string value
+        if right.kind == "constant":
+            null, obj = BUILTINS[op](None, None, constant), BUILTINS[op](None, {}, constant)
+        else:
+            null, obj = BUILTINS[op](None, constant, None), BUILTINS[op](None, constant, {})
+        return self.by_type(value, number_sql, text_sql, bool(null), bool(obj))
+
+    def contains(self, args: List[Any], scope: Optional[_Operand]) -> str:
+        """SQL for `in`: membership in an array, or a substring check."""
+        needle_logic = args[0] if args else None
+        haystack_logic = args[1] if len(args) > 1 else None
+
+        if isinstance(haystack_logic, list):
+            # A field compared with a list of constants
+            if not all(_is_scalar(item) for item in haystack_logic):
+                raise ValueError(f"Cannot translate 'in' with computed list items to SQL: {args}")
+            needle = self.operand(needle_logic, scope)
+            numbers = [to_number(item) for item in haystack_logic if isinstance(item, (int, float))]
+            strings = [item for item in haystack_logic if isinstance(item, str)]
+            if needle.kind == "constant":
+                return "1" if needle.value in haystack_logic else "0"
+            return self.by_type(
+                needle,
+                f"{needle.value} IN ({', '.join(self.constant(item) for item in numbers)})" if numbers else None,
+                f"{needle.value} IN ({', '.join(self.constant(item) for item in strings)})" if strings else None,
+                None in haystack_logic)
+
+        needle = self.operand(needle_logic, scope)
+        haystack = self.operand(haystack_logic, scope)
+        if haystack.kind == "constant":
+            if not isinstance(haystack.value, str):
+                return "0"
+            # A field looked up in a constant string
+            if needle.kind == "constant":
+                return "1" if to_string(needle.value) in haystack.value else "0"
+            text = self.to_text(needle)
+            return f"COALESCE(instr({self.constant(haystack.value)}, {text}) > 0, 0)"
+
+        if needle.kind != "constant" or not _is_scalar(needle.value):
+            raise ValueError(f"Cannot translate 'in' with a computed value to SQL: {args}")
+        if haystack.kind == "text":
+            return f"COALESCE(instr({haystack.value}, {self.constant(to_string(needle.value))}) > 0, 0)"
+        if haystack.kind != "field":
+            return "0"
+
+        value = needle.value
+        substring = f"instr({haystack.value}, {self.constant(to_string(value))}) > 0"
+        if haystack.source is None:
+            # Columns hold scalars, which can only contain substrings
+            return self.by_type(haystack, None, substring, null=False)
+
+        document, path = haystack.source
+        if value is None:
+            item = "element.type = 'null'"
+        elif isinstance(value, str):
+            item = f"element.type = 'text' AND element.value = {self.constant(value)}"
+        else:
+            item = f"element.type IN {NUMBER_TYPES} AND element.value = {self.constant(to_number(value))}"
+        in_array = f"EXISTS (SELECT 1 FROM json_each({document}, {_literal(path)}) AS element WHERE {item})"
+        return (f"COALESCE(CASE {haystack.type_sql} WHEN 'array' THEN {in_array} "
+                f"WHEN 'text' THEN {substring} END, 0)")
+
+    def affix(self, op: str, args: List[Any], scope: Optional[_Operand]) -> str:
+        """SQL for the native `starts_with` and `ends_with` operations."""
+        string = self.operand(args[0] if args else None, scope)
+        affix = self.operand(args[1] if len(args) > 1 else None, scope)
+        if affix.kind != "constant":
+            raise ValueError(f"Cannot translate {op!r} with a computed argument to SQL: {args}")
+
+        expected = to_string(affix.value)
+        if string.kind == "constant":
+            return "1" if BUILTINS.get(op, OPERATIONS[op])(None, string.value, affix.value) else "0"
+        if not expected:
+            return self.truth(string)
+
+        text = self.to_text(string)
+        if op == "starts_with":
+            part = f"substr({text}, 1, {len(expected)})"
+        else:
+            part = f"substr({text}, -{len(expected)})"
+        return f"({self.truth(string)} AND COALESCE(length({text}) >= {len(expected)} AND {part} = {self.constant(expected)}, 0))"
+
+    def is_empty(self, operand: _Operand) -> str:
+        """SQL for the native `is_empty` operation."""
+        if operand.kind == "constant":
+            return "1" if OPERATIONS["is_empty"](None, operand.value) else "0"
+        if operand.kind == "text":
+            return f"COALESCE({operand.value} = '', 0)"
+        if operand.kind == "number":
+            return "0"
+        value, value_type = operand.value, operand.type_sql
+        return (f"(CASE WHEN {value_type} IS NULL OR {value_type} = 'null' THEN 1 "
+                f"WHEN {value_type} = 'text' THEN {value} = '' "
+                f"WHEN {value_type} = 'array' THEN {value} = '[]' "
+                f"WHEN {value_type} = 'object' THEN {value} = '{{}}' ELSE 0 END)")
+
+    # Values
+
+    def operands(self, args: List[Any], scope: Optional[_Operand]) -> List[_Operand]:
+        return [self.operand(arg, scope) for arg in args]
+
+    def operand(self, logic: Any, scope: Optional[_Operand]) -> _Operand:
+        """Translate a node that produces a value."""
+        if isinstance(logic, list):
+            if all(is_constant(item) for item in logic):
+                return _Operand("constant", logic)
+            raise ValueError(f"Cannot translate computed list to SQL: {logic}")
+        if is_constant(logic):
+            return _Operand("constant", logic)
+
+        op, args = split_operation(logic)
+        if op == "var":
+            self.check_builtin(op)
+            return self.field(args, scope)
+        if op in ("length", "reduce"):
+            if op == "length":
+                self.check_builtin(op)
+            return self.length(op, args, scope)
+        if op in ("+", "-", "*"):
+            self.check_builtin(op)
+            return self.arithmetic(op, args, scope)
+        if op == "substr":
+            self.check_builtin(op)
+            return self.substr(args, scope)
+        if op in ("==", "!=", "<", "<=", ">", ">=", "!", "!!", "in", "some", "all", "none",
+                  "starts_with", "ends_with", "is_empty"):
+            # Operations returning a boolean, which compares like 0 or 1
+            return _Operand("number", self.condition(logic, scope))
+
+        raise ValueError(f"Cannot translate operation to SQL: {op!r}")
+
+    def field(self, args: List[Any], scope: Optional[_Operand]) -> _Operand:
+        if not all(is_constant(arg) for arg in args) or len(args) > 2:
+            raise ValueError(f"Cannot translate computed 'var' path to SQL: {args}")
+        if len(args) > 1 and args[1] is not None:
+            raise ValueError(f"Cannot translate 'var' with a default value to SQL: {args}")
+
+        key = args[0] if args else None
+        if key is None or key == "":
+            if scope is not None:
+                return scope
+            return _Operand("field", self.json_column, f"json_type({self.json_column})", (self.json_column, "$"))
+        if isinstance(key, (int, float)) and not isinstance(key, bool):
+            raise ValueError(f"Cannot translate numeric 'var' path to SQL: {key!r}")
+
+        path = to_string(key)
+        if scope is None and path in self.columns:
+            column = quote_identifier(self.columns[path])
+            return _Operand("field", column, f"typeof({column})")
+
+        if scope is None:
+            document = self.json_column
+            value = f"json_extract({document}, {_literal(json_path(path))})"
+            value_type = f"json_type({document}, {_literal(json_path(path))})"
+        else:
+            # Items that are not objects or arrays have no fields, and are not JSON text
+            document = scope.value
+            container = f"{scope.type_sql} IN ('object', 'array')"
+            value = f"(CASE WHEN {container} THEN json_extract({document}, {_literal(json_path(path))}) END)"
+            value_type = f"(CASE WHEN {container} THEN json_type({document}, {_literal(json_path(path))}) END)"
+        return _Operand("field", value, value_type, (document, json_path(path)))
+
+    def length(self, op: str, args: List[Any], scope: Optional[_Operand]) -> _Operand:
+        """Array length, from the native `length` or the counting `reduce` of the portable mode."""
+        init = 0
+        if op == "reduce":
+            init = args[2] if len(args) > 2 else None
+            if len(args) < 2 or type(init) is not int or not is_count_reducer(args[1], OPERATIONS):
+                raise ValueError(f"Cannot translate 'reduce' to SQL unless it counts items: {args}")
+
+        items = self.operand(args[0] if args else None, scope)
+        if items.kind == "constant":
+            count = len(items.value) if isinstance(items.value, list) else 0
+            return _Operand("constant", init + count)
+        if items.kind != "field" or items.source is None:
+            return _Operand("constant", init)
+
+        document, path = items.source
+        return _Operand("number", f"(CASE WHEN {items.type_sql} IS 'array' "
+                                  f"THEN {init} + json_array_length({document}, {_literal(path)}) ELSE {init} END)")
+
+    def arithmetic(self, op: str, args: List[Any], scope: Optional[_Operand]) -> _Operand:
+        operands = self.operands(args, scope)
+        if op == "-" and len(operands) >= 2 and operands[1].kind == "constant" and operands[1].value is None:
+            operands = operands[:1]
+        if op == "-" and len(operands) >= 2 and operands[1].kind == "field":
+            raise ValueError(f"Cannot translate subtraction of a field to SQL: {args}")
+
+        if all(operand.kind == "constant" for operand in operands):
+            return _Operand("constant", BUILTINS[op](None, *[operand.value for operand in operands]))
+
+        numbers = [self.to_number(operand) for operand in operands]
+        if op == "-":
+            expression = f"(-{numbers[0]})" if len(numbers) == 1 else f"({numbers[0]} - {numbers[1]})"
+        elif op == "+":
+            expression = "(" + " + ".join(numbers) + ")" if numbers else "0"
+        else:
+            expression = "(" + " * ".join(numbers) + ")" if numbers else "1"
+        return _Operand("number", expression)
+
+    def substr(self, args: List[Any], scope: Optional[_Operand]) -> _Operand:
+        """`substr` with the index and length rules of `json_logic`, where negative values count from the end."""
+        text = self.to_text(self.operand(args[0] if args else None, scope))
+        index = self.to_number(self.operand(args[1] if len(args) > 1 else None, scope))
+        length_arg = self.operand(args[2], scope) if len(args) > 2 else None
+
+        size = f"length({text})"
+        start = (f"(CASE WHEN {index} IS NULL THEN 0 "
+                 f"WHEN {index} < 0 THEN (CASE WHEN -{index} >= {size} THEN 0 ELSE {size} - CAST(-{index} AS INTEGER) END) "
+                 f"ELSE min(CAST({index} AS INTEGER), {size}) END)")
+
+        if length_arg is None or (length_arg.kind == "constant" and length_arg.value is None):
+            return _Operand("text", f"substr({text}, {start} + 1)")
+
+        length = self.to_number(length_arg)
+        end = (f"(CASE WHEN {length} IS NULL THEN {start} "
+               f"WHEN {length} < 0 THEN max({size} + CAST({length} AS INTEGER), {start}) "
+               f"ELSE {start} + CAST({length} AS INTEGER) END)")
+        return _Operand("text", f"substr({text}, {start} + 1, {end} - {start})")
+
+    def to_number(self, operand: _Operand) -> str:
+        """SQL for `to_number` of a value, NULL where it would not be a number."""
+        if operand.kind == "constant":
+            return self.constant(to_number(operand.value))
+        if operand.kind == "number":
+            return operand.value
+        if operand.kind == "text":
+            raise ValueError("Cannot translate conversion of computed text to a number to SQL")
+
+        value_type = operand.type_sql
+        return (f"(CASE WHEN {value_type} IN {NUMBER_TYPES} THEN {operand.value} "
+                f"WHEN {value_type} IS NULL OR {value_type} = 'null' THEN 0 END)")
+
+    def to_text(self, operand: _Operand) -> str:
+        """SQL for `to_string` of a value, NULL where it is not reproduced."""
+        if operand.kind == "constant":
+            return self.constant(to_string(operand.value))
+        if operand.kind == "text":
+            return operand.value
+        if operand.kind == "number":
+            raise ValueError("Cannot translate conversion of a computed number to text to SQL")
+
+        value, value_type = operand.value, operand.type_sql
+        return (f"(CASE WHEN {value_type} = 'text' THEN {value} "
+                f"WHEN {value_type} = 'integer' THEN CAST({value} AS TEXT) "
+                f"WHEN {value_type} = 'real' THEN printf('%.15g', {value}) "
+                f"WHEN {value_type} = 'true' THEN 'true' WHEN {value_type} = 'false' THEN 'false' "
+                f"WHEN {value_type} IS NULL OR {value_type} = 'null' THEN 'null' "
+                f"WHEN {value_type} = 'object' THEN '[object Object]' END)")
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float))
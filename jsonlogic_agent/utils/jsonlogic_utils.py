@@ -4,8 +4,14 @@ This module provides functions to validate and test JSONLogic rules.
 """
 
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import json_logic
+from json_logic.builtins import to_bool
+
+from utils.jsonlogic_compiler import compile_rule, CompiledRule
+from utils.jsonlogic_operations import OPERATIONS
+from utils.jsonlogic_optimizer import ARRAY_OPERATIONS
+from utils.jsonlogic_ruleset import RuleSet
 
 class JSONLogicUtils:
     @staticmethod
@@ -63,5 +69,74 @@ class JSONLogicUtils:
     def test_rule(rule: Dict[str, Any], data: Dict[str, Any]) -> Any:
         """
         Test a JSONLogic rule against data.
+        Rules may use the native operations of the extended operator mode.
+        """
+        return json_logic.jsonLogic(rule, data, OPERATIONS)
+
+    @staticmethod
+    def compile_rule(rule: Dict[str, Any]) -> CompiledRule:
+        """
+        Compile a JSONLogic rule once for testing against many records.
+        The returned callable gives the same results as `test_rule`.
+        """
+        return compile_rule(rule)
+
+    @staticmethod
+    def compile_rules(rules: Dict[str, Any]) -> RuleSet:
+        """
+        Compile rules by name for testing together against many records.
+        Subexpressions shared by the rules are evaluated once per record.
+        """
+        return RuleSet(rules)
+
+    @staticmethod
+    def count_matches(rule: Dict[str, Any], records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Compile a rule once and count the records it matches.
+        Records are consumed one at a time, so they can be streamed from a large file.
+        Returns the number of matching records and the number of records.
+        """
+        compiled = compile_rule(rule)
+        matches = 0
+        total = 0
+        for record in records:
+            matches += to_bool(compiled(record))
+            total += 1
+        return matches, total
+
+    @staticmethod
+    def var_paths(rule: Any) -> List[str]:
+        """
+        Get the data paths a rule reads with `var`, in order of first use, without duplicates.
+        Variables in the per-item logic of array operations refer to the current item
+        or the accumulator rather than the data, so they are not included.
         """
-        return json_logic.jsonLogic(rule, data)
+        paths = []
+
+        def visit(logic):
+            if isinstance(logic, list):
+                for item in logic:
+                    visit(item)
+                return
+            if not isinstance(logic, dict) or len(logic) != 1:
+                return
+
+            op, args = next(iter(logic.items()))
+            if op == "var":
+                args = args if isinstance(args, list) else [args]
+                path = args[0] if args else None
+                # An empty path is the whole record, numbers only index into arrays
+                if isinstance(path, str):
+                    if path and path not in paths:
+                        paths.append(path)
+                else:
+                    visit(path)
+                visit(args[1:])
+            elif op in ARRAY_OPERATIONS:
+                args = args if isinstance(args, list) else [args]
+                visit(args[:1])
+            else:
+                visit(args)
+
+        visit(rule)
+        return paths
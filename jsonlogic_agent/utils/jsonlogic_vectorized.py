@@ -0,0 +1,324 @@
+"""
+Column-at-a-time evaluation of JSONLogic rules over batches of records.
+
+Each `var` path in a rule is flattened into a NumPy column once per batch, and
+comparisons, ranges, `in`, `some`/`all`/`none` and `and`/`or`/`!` trees are
+evaluated as array operations. The result is a boolean mask with one entry per
+record, true where `json_logic.jsonLogic(rule, record)` is truthy.
+
+Comparisons against numeric columns run directly in NumPy. Every other operation
+on a column is evaluated once per distinct value with the `json_logic` builtins
+and broadcast back to the rows, so enum and boolean fields cost one evaluation
+per category instead of one per record. Parts of a rule that cannot be
+vectorized fall back to `compile_rule` for those records only, which keeps the
+results identical to the `json_logic` library.
+
+Flattening records into columns costs more than a single pass of the compiled
+rule saves, so column evaluation only pays off on a `ColumnBatch` that is
+already flattened or reused across rules. Plain records are evaluated with the
+compiled rule (see `benchmarks/vectorized.py`).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from json_logic.builtins import to_bool
+
+from utils.jsonlogic_compiler import compile_rule, compile_var_path, is_constant, is_count_reducer, split_operation
+from utils.jsonlogic_operations import OPERATIONS
+
+# Operators whose result depends only on their arguments, not on the data record
+PURE_OPERATIONS = {op for op in OPERATIONS if op not in ("var", "missing", "missing_some", "log")}
+
+NUMERIC_COMPARISONS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+class Column:
+    """
+    Values of one expression for every record in a batch.
+
+    The raw values are kept in an object array. Numeric and categorical views are
+    derived from them on first use and cached.
+    """
+
+    def __init__(self, values: Union[np.ndarray, Sequence[Any]]):
+        if not isinstance(values, np.ndarray) or values.dtype != object:
+            values = _object_array(values)
+        self.values = values
+        self._numbers = None
+        self._numbers_checked = False
+        self._codes = None
+        self._categories = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def numbers(self) -> Optional[np.ndarray]:
+        """
+        Get the column as a numeric array, or None if it holds non-numeric values.
+
+        Missing values become 0, which is how `json_logic` coerces null in comparisons with numbers.
+        """
+        if not self._numbers_checked:
+            self._numbers_checked = True
+            if self._codes is not None:
+                # Derived columns only need their distinct values checked
+                numbers = _to_numbers(self._categories)
+                if numbers is not None:
+                    self._numbers = numbers[self._codes]
+            else:
+                self._numbers = _to_numbers(self.values)
+        return self._numbers
+
+    def factorize(self):
+        """
+        Split the column into integer codes and the list of distinct values.
+
+        Values are keyed by type as well as value, so `1`, `1.0` and `True` stay separate categories.
+        """
+        if self._codes is None:
+            index = {}
+            categories = []
+            codes = np.empty(len(self.values), dtype=np.intp)
+            for row, value in enumerate(self.values):
+                key = _category_key(value)
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(categories)
+                    categories.append(value)
+                codes[row] = code
+            self._codes, self._categories = codes, categories
+        return self._codes, self._categories
+
+    def map(self, fn: Callable[[Any], Any]) -> "Column":
+        """Apply a pure function once per distinct value and broadcast the results to every row."""
+        codes, categories = self.factorize()
+        results = [fn(value) for value in categories]
+
+        column = Column(_object_array(results)[codes])
+        column._codes, column._categories = codes, results
+        return column
+
+    def truthy(self) -> np.ndarray:
+        """Get a boolean mask of the rows whose value is truthy for `json_logic`."""
+        if self._codes is None:
+            numbers = self.numbers()
+            if numbers is not None:
+                # NaN is falsy for json_logic, but compares unequal to 0
+                return (numbers != 0) & ~np.isnan(numbers)
+
+        codes, categories = self.factorize()
+        return np.array([to_bool(value) for value in categories], dtype=bool)[codes]
+
+class ColumnBatch:
+    """
+    A batch of records flattened into one column per dot-notation `var` path.
+
+    Columns are extracted from the records the first time a rule references
+    their path. A batch can also be built from existing columns, in which case
+    every path used by the rule must be provided and no record fallback is available.
+    """
+
+    def __init__(self, records: Optional[Sequence[Any]] = None, columns: Optional[Dict[str, Sequence[Any]]] = None):
+        self.records = records
+        self.columns = {path: Column(values) for path, values in (columns or {}).items()}
+
+        if records is not None:
+            self.size = len(records)
+        elif self.columns:
+            self.size = len(next(iter(self.columns.values())))
+        else:
+            raise ValueError("A column batch needs records or columns")
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any], paths: Sequence[str] = ()) -> "ColumnBatch":
+        """Create a batch from records, flattening the given paths up front."""
+        batch = cls(records=records)
+        for path in paths:
+            batch.column(path)
+        return batch
+
+    def column(self, path: str) -> Column:
+        """Get the column for a dot-notation path, extracting it from the records if needed."""
+        column = self.columns.get(path)
+        if column is None:
+            if self.records is None:
+                raise ValueError(f"Column batch has no column for '{path}'")
+            getter = compile_var_path(path)
+            column = self.columns[path] = Column([getter(record) for record in self.records])
+        return column
+
+def evaluate_batch(rule: Any, batch: Union[ColumnBatch, Sequence[Any]]) -> np.ndarray:
+    """
+    Evaluate a JSONLogic rule against every record of a batch.
+
+    Args:
+        rule: A JSONLogic rule, e.g. the output of `create_jsonlogic_from_intent`
+        batch: A `ColumnBatch`, evaluated a column at a time, or a sequence of records,
+            evaluated one record at a time with the compiled rule
+
+    Returns:
+        A boolean NumPy array, true for the records the rule matches
+
+    Example:
+        >>> evaluate_batch({">": [{"var": "user.age"}, 30]}, [{"user": {"age": 35}}, {"user": {"age": 20}}])
+        array([ True, False])
+    """
+    if not isinstance(batch, ColumnBatch):
+        # Flattening the records for one rule is slower than evaluating them one by one
+        compiled = compile_rule(rule)
+        return np.fromiter((to_bool(compiled(record)) for record in batch), dtype=bool, count=len(batch))
+    return _VectorEvaluator(batch).mask(rule)
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    # np.array would turn a list of lists into a 2D array
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def _to_numbers(values: Sequence[Any]) -> Optional[np.ndarray]:
+    if not all(value is None or type(value) in (int, float, bool) for value in values):
+        return None
+
+    numbers = np.array([0 if value is None else value for value in values])
+    if numbers.dtype.kind not in "biuf":
+        return None
+    return numbers
+
+def _is_literal(logic: Any) -> bool:
+    """Check whether a node evaluates to the same value for every record."""
+    if isinstance(logic, list):
+        return all(_is_literal(item) for item in logic)
+    return is_constant(logic)
+
+def _category_key(value: Any):
+    if isinstance(value, (list, dict)):
+        return (type(value), repr(value))
+    return (type(value), value)
+
+class _VectorEvaluator:
+    """Evaluate rule nodes either as masks (truthiness per row) or as value columns."""
+
+    def __init__(self, batch: ColumnBatch):
+        self.batch = batch
+
+    def mask(self, logic: Any) -> np.ndarray:
+        if is_constant(logic):
+            return np.full(self.batch.size, to_bool(logic), dtype=bool)
+        if isinstance(logic, list):
+            return self.value(logic).truthy()
+
+        op, args = split_operation(logic)
+
+        if op == "and":
+            if not args:
+                return np.zeros(self.batch.size, dtype=bool)
+            mask = self.mask(args[0])
+            for arg in args[1:]:
+                mask = mask & self.mask(arg)
+            return mask
+
+        if op == "or":
+            if not args:
+                return np.zeros(self.batch.size, dtype=bool)
+            mask = self.mask(args[0])
+            for arg in args[1:]:
+                mask = mask | self.mask(arg)
+            return mask
+
+        if op in ("!", "!!") and args:
+            mask = self.mask(args[0])
+            return ~mask if op == "!" else mask
+
+        if op in NUMERIC_COMPARISONS:
+            mask = self.numeric_comparison(op, args)
+            if mask is not None:
+                return mask
+
+        if op in ("some", "all", "none") and len(args) >= 2:
+            return self.quantifier(op, args)
+
+        return self.value(logic).truthy()
+
+    def numeric_comparison(self, op: str, args: List[Any]) -> Optional[np.ndarray]:
+        """Compare a numeric column with number literals in NumPy, or return None if that is not exact."""
+        if not 2 <= len(args) <= 3 or (op in ("==", "!=") and len(args) != 2):
+            return None
+
+        variable = [index for index, arg in enumerate(args) if not _is_literal(arg)]
+        if len(variable) != 1:
+            return None
+        if not all(type(arg) in (int, float, bool) for index, arg in enumerate(args) if index != variable[0]):
+            return None
+
+        numbers = self.value(args[variable[0]]).numbers()
+        if numbers is None:
+            return None
+
+        operands = [numbers if index == variable[0] else arg for index, arg in enumerate(args)]
+        compare = NUMERIC_COMPARISONS[op]
+        mask = compare(operands[0], operands[1])
+        if len(operands) == 3:
+            mask = mask & compare(operands[1], operands[2])
+        return mask
+
+    def quantifier(self, op: str, args: List[Any]) -> np.ndarray:
+        """Evaluate `some`/`all`/`none` by flattening every array into one batch of items."""
+        items = self.value(args[0]).values
+        is_list = np.fromiter((isinstance(value, list) for value in items), dtype=bool, count=len(items))
+        lengths = np.fromiter((len(value) if isinstance(value, list) else 0 for value in items), dtype=np.intp, count=len(items))
+
+        flat = [item for value in items[is_list] for item in value]
+        matches = np.zeros(len(items), dtype=np.intp)
+        if flat:
+            rows = np.repeat(np.arange(len(items)), lengths)
+            item_mask = _VectorEvaluator(ColumnBatch(records=flat)).mask(args[1])
+            matches = np.bincount(rows[item_mask], minlength=len(items))
+
+        if op == "some":
+            return is_list & (matches > 0)
+        if op == "all":
+            # JsonLogic defines that all of an empty list is False
+            return is_list & (lengths > 0) & (matches == lengths)
+        return ~(is_list & (matches > 0))
+
+    def value(self, logic: Any) -> Column:
+        if is_constant(logic):
+            return Column([logic] * self.batch.size)
+        if isinstance(logic, list):
+            return self.fallback(logic)
+
+        op, args = split_operation(logic)
+
+        if op == "var" and len(args) == 1 and isinstance(args[0], str):
+            return self.batch.column(args[0])
+
+        if op == "reduce" and len(args) > 2 and type(args[2]) is int and is_count_reducer(args[1], OPERATIONS):
+            init = args[2]
+            items = self.value(args[0]).values
+            return Column([init + len(value) if isinstance(value, list) else init for value in items])
+
+        if op in PURE_OPERATIONS:
+            variable = [index for index, arg in enumerate(args) if not _is_literal(arg)]
+            if len(variable) == 1:
+                # Every other argument is a literal, so the operation is a function of one column
+                fn = OPERATIONS[op]
+                position = variable[0]
+                column = self.value(args[position])
+                before, after = args[:position], args[position + 1:]
+                return column.map(lambda value: fn(None, *before, value, *after))
+
+        return self.fallback(logic)
+
+    def fallback(self, logic: Any) -> Column:
+        """Evaluate a node record by record with the compiled rule."""
+        if self.batch.records is None:
+            raise ValueError(f"Cannot vectorize {logic} without the original records")
+        compiled = compile_rule(logic)
+        return Column([compiled(record) for record in self.batch.records])
@@ -0,0 +1,71 @@
+"""
+Read lines from stdin without blocking the event loop.
+
+`input()` blocks the thread it runs in, so calling it from a coroutine stops
+every other task, such as agent runs still in flight or output being written,
+until the user presses enter. `AsyncLineReader` reads lines in a daemon thread
+and hands them to the event loop through a queue. Lines typed while earlier
+requests are still running are kept in order until they are read.
+"""
+
+import asyncio
+import sys
+import threading
+from typing import Optional, TextIO
+
+class AsyncLineReader:
+    """
+    Reads lines of a text stream from a background thread.
+
+    The thread starts on the first `readline` and reads ahead until the end of
+    the stream. It is a daemon thread, so a pending read does not keep the
+    program from exiting.
+
+    Example:
+        >>> reader = AsyncLineReader()
+        >>> while (line := await reader.readline("> ")) is not None:
+        ...     await handle(line)
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """
+        Args:
+            stream: Text stream to read, stdin by default
+        """
+        self.stream = stream
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def readline(self, prompt: str = "") -> Optional[str]:
+        """
+        Wait for the next line.
+
+        Args:
+            prompt: Text written to stdout before waiting, like the prompt of `input()`
+
+        Returns:
+            The line without its line break, or None at the end of the stream
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            thread = threading.Thread(target=self._read, args=(asyncio.get_running_loop(), self.stream or sys.stdin),
+                                      name="AsyncLineReader", daemon=True)
+            thread.start()
+
+        if prompt:
+            sys.stdout.write(prompt)
+            sys.stdout.flush()
+
+        line = await self._queue.get()
+        if line is None:
+            # Stay at the end of the stream for later reads
+            self._queue.put_nowait(None)
+        return line
+
+    def _read(self, loop: asyncio.AbstractEventLoop, stream: TextIO):
+        try:
+            for line in iter(stream.readline, ""):
+                loop.call_soon_threadsafe(self._queue.put_nowait, line.rstrip("\r\n"))
+            loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        except RuntimeError:
+            # The event loop was closed while waiting for input
+            pass
@@ -1,39 +1,177 @@
+"""
+Logging setup for the agent.
+
+By default, log records are written to a new file per process by a handler on
+the calling thread. For long-running processes, `setup_logging` can also:
+
+- queue records (`queued=True`): callers only put the record on a queue, and a
+  listener thread formats and writes it, so logging never blocks the event loop
+  on disk I/O
+- rotate the file by size (`max_bytes`) or by time (`when`), keeping `backup_count` old files.
+  Rotated files are named without the timestamp, so they are continued across restarts
+- write JSON lines (`json_format=True`) carrying the request and session IDs
+  set with `log_context`, to correlate logs with the metrics of the same request
+"""
+
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import tempfile
 import time
+from contextlib import contextmanager
+from typing import Optional
+
+# IDs of the request being processed, added to every log record made while it runs
+_request_id = contextvars.ContextVar("request_id", default=None)
+_session_id = contextvars.ContextVar("session_id", default=None)
+
+# Listener thread writing queued records, if any
+_listener: Optional[logging.handlers.QueueListener] = None
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, session_id: Optional[str] = None):
+    """
+    Add request and session IDs to the log records made inside the block.
+
+    The IDs are context variables, so concurrent requests running in different
+    asyncio tasks each log with their own IDs.
+
+    Example:
+        >>> with log_context(request_id=metrics.request_id, session_id=session.id):
+        ...     await runner.run_async(...)
+    """
+    request_token = _request_id.set(request_id)
+    session_token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(request_token)
+        _session_id.reset(session_token)
+
+class ContextFilter(logging.Filter):
+    """Sets `request_id` and `session_id` on each record from the current `log_context`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Runs on the logging thread, before a queue hands the record to the listener
+        record.request_id = _request_id.get()
+        record.session_id = _session_id.get()
+        return True
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats each record as one JSON object, with the request and session IDs of `ContextFilter`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "timestamp": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "session_id": getattr(record, "session_id", None),
+        }
+        # Queued records carry the formatted traceback in exc_text only (see `ContextQueueHandler`)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
 
-def setup_logging(level=logging.INFO, 
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a queue with their message and traceback kept apart.
+
+    `QueueHandler.prepare` folds the traceback into the message and clears
+    `exc_info`, so the listener's formatter could not tell them apart. Here the
+    message is merged with its arguments, and the traceback is formatted into
+    `exc_text`, which formatters append to the text line or, in JSON, write as `exception`.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        # The traceback object cannot be pickled by queues between processes
+        record.exc_info = None
+        return record
+
+def setup_logging(level=logging.INFO,
                  *,
-                 sub_folder: str = 'agents_log', 
-                 log_file_prefix: str = 'agent', 
-                 log_file_timestamp: str = time.strftime('%Y%m%d_%H%M%S')):
+                 sub_folder: str = 'agents_log',
+                 log_file_prefix: str = 'agent',
+                 log_file_timestamp: str = time.strftime('%Y%m%d_%H%M%S'),
+                 queued: bool = False,
+                 max_bytes: int = 0,
+                 when: Optional[str] = None,
+                 backup_count: int = 5,
+                 json_format: bool = False):
     """
     Set up logging with standardized format and location
-    
+
     Args:
         level: Logging level (default: INFO)
         sub_folder: Subfolder in the temp directory to store logs
         log_file_prefix: Prefix for the log file name
-        log_file_timestamp: Timestamp for the log file name
-        
+        log_file_timestamp: Timestamp for the log file name, not used when the file rotates
+        queued: Whether records are written by a listener thread instead of the thread that logs them
+        max_bytes: Rotate the log file when it would grow beyond this size, 0 for no size limit
+        when: Rotate the log file at this interval, as accepted by `TimedRotatingFileHandler` (e.g. "midnight", "H")
+        backup_count: Number of rotated log files to keep
+        json_format: Whether to write JSON lines with the request and session IDs instead of text lines
+
     Returns:
         str: Path to the log file
+
+    Raises:
+        ValueError: If both `max_bytes` and `when` are given
     """
+    global _listener
+
+    if max_bytes and when:
+        raise ValueError("Log files can rotate by size or by time, not both")
+
     log_dir = os.path.join(tempfile.gettempdir(), sub_folder)
-    log_filename = f'{log_file_prefix}.{log_file_timestamp}.log'
+    # Rotated files have a fixed name, so a restart appends to the same file and its backups
+    rotating = bool(max_bytes or when)
+    log_filename = f'{log_file_prefix}.log' if rotating else f'{log_file_prefix}.{log_file_timestamp}.log'
     log_filepath = os.path.join(log_dir, log_filename)
 
     os.makedirs(log_dir, exist_ok=True)
 
-    file_handler = logging.FileHandler(log_filepath, mode='w')
+    if max_bytes:
+        file_handler = logging.handlers.RotatingFileHandler(log_filepath, maxBytes=max_bytes, backupCount=backup_count)
+    elif when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(log_filepath, when=when, backupCount=backup_count)
+    else:
+        file_handler = logging.FileHandler(log_filepath, mode='w')
     file_handler.setLevel(level)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'))
+    if json_format:
+        file_handler.setFormatter(JsonLogFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'))
+
+    shutdown_logging()
+    if queued:
+        handler = ContextQueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, file_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = file_handler
+    handler.addFilter(ContextFilter())
 
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
     root_logger.handlers = []  # Clear handles to disable logging to stderr
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(handler)
 
     print(f'Log setup complete: {log_filepath}')
 
@@ -43,4 +181,15 @@ def setup_logging(level=logging.INFO,
     os.symlink(log_filepath, latest_log_link)
 
     print(f'To access latest log: tail -F {latest_log_link}')
-    return log_filepath
\ No newline at end of file
+    return log_filepath
+
+def shutdown_logging():
+    """Write the records still queued and stop the listener thread of a queued setup, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,179 @@
+"""
+Record model calls of a real agent run and replay them without a network.
+
+`RecordingLlm` wraps the model of an agent and appends every model call, the
+request and the responses, to a JSON lines file. `ReplayLlm` serves the recorded
+responses back for the same requests, with an optional artificial latency, so
+the runner, tools, response parsing and rule evaluation can be timed and tested
+offline and deterministically.
+
+Requests are matched by content: the system instruction and the conversation
+sent to the model, without the function call IDs that ADK generates on each run.
+A request that occurs several times in a recording is answered with its
+recorded responses in order.
+
+Example:
+    >>> recording_agent = root_agent.clone(update={"model": RecordingLlm(inner=root_agent.canonical_model, path="calls.jsonl")})
+    >>> replay_agent = root_agent.clone(update={"model": ReplayLlm.from_file("calls.jsonl", latency=0.5)})
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+def request_key(llm_request: LlmRequest) -> str:
+    """
+    Identify a model request by its content, so a replayed run finds the responses recorded for it.
+
+    Args:
+        llm_request: The request sent to the model
+
+    Returns:
+        Hex digest of the system instruction and contents of the request
+    """
+    config = llm_request.config
+    system_instruction = config.system_instruction if config else None
+    if system_instruction is not None and not isinstance(system_instruction, str):
+        system_instruction = _strip_ids(system_instruction.model_dump(mode="json", exclude_none=True))
+
+    contents = [_strip_ids(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents]
+    canonical = json.dumps({"system_instruction": system_instruction, "contents": contents}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _strip_ids(value: Any) -> Any:
+    """Remove the `id` of function calls and responses, which ADK generates anew on every run."""
+    if isinstance(value, list):
+        return [_strip_ids(item) for item in value]
+    if isinstance(value, dict):
+        stripped = {key: _strip_ids(item) for key, item in value.items()}
+        for key in ("function_call", "function_response"):
+            if isinstance(stripped.get(key), dict):
+                stripped[key].pop("id", None)
+        return stripped
+    return value
+
+class RecordingLlm(BaseLlm):
+    """
+    Model that forwards calls to another model and records them to a JSON lines file.
+
+    Each line holds the request key, the contents sent to the model, the
+    responses and the duration of the call. Lines are appended, so several runs
+    can be recorded into the same file.
+    """
+
+    inner: BaseLlm
+    path: str
+
+    def __init__(self, inner: BaseLlm, path: str, **kwargs):
+        """
+        Args:
+            inner: The model that answers the calls, e.g. `agent.canonical_model`
+            path: JSON lines file the calls are appended to
+        """
+        super().__init__(model=inner.model, inner=inner, path=path, **kwargs)
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return self.inner.capabilities
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        started = time.perf_counter()
+        responses = []
+        seconds = 0.0
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                # The duration only covers the model, not the time the caller spends on each response
+                seconds = time.perf_counter() - started
+                responses.append(response)
+                yield response
+                started = time.perf_counter() - seconds
+        finally:
+            # The runner may stop reading after the final response, which closes this generator
+            if responses:
+                self.record(llm_request, responses, seconds)
+
+    def record(self, llm_request: LlmRequest, responses: List[LlmResponse], seconds: float):
+        """Append one model call to the recording."""
+        call = {
+            "key": request_key(llm_request),
+            "model": self.model,
+            "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+            "responses": [response.model_dump(mode="json", exclude_none=True) for response in responses],
+            "seconds": seconds,
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(call) + "\n")
+
+class ReplayLlm(BaseLlm):
+    """
+    Model that answers requests with the responses recorded by `RecordingLlm`.
+
+    The delay before each call's responses is `latency` seconds plus
+    `latency_scale` times the recorded duration of the call, so runs can be
+    replayed with no delay, a fixed delay, or the recorded model latency.
+    """
+
+    calls: Dict[str, List[Dict[str, Any]]]
+    latency: float = 0.0
+    latency_scale: float = 0.0
+
+    _replayed: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0, latency_scale: float = 0.0) -> "ReplayLlm":
+        """
+        Load a recording.
+
+        Args:
+            path: JSON lines file written by `RecordingLlm`
+            latency: Fixed delay in seconds added to every call
+            latency_scale: Factor applied to the recorded duration of each call, e.g. 1.0 to replay at recorded speed
+
+        Returns:
+            A model named after the recorded model
+
+        Raises:
+            ValueError: If the file contains no recorded calls
+        """
+        calls: Dict[str, List[Dict[str, Any]]] = {}
+        model = None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                call = json.loads(line)
+                calls.setdefault(call["key"], []).append(call)
+                model = model or call.get("model")
+
+        if not calls:
+            raise ValueError(f"No recorded model calls in {path}")
+        return cls(model=model or "replay", calls=calls, latency=latency, latency_scale=latency_scale)
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return LlmCapabilities(output_schema_and_tools=False)
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(llm_request)
+        recorded = self.calls.get(key)
+        if not recorded:
+            raise ValueError(f"No recorded response for this model request (key {key[:12]}); record the run again")
+
+        # Repeated requests get their recorded responses in order, the last one is reused after that
+        index = self._replayed.get(key, 0)
+        self._replayed[key] = index + 1
+        call = recorded[min(index, len(recorded) - 1)]
+
+        delay = self.latency + self.latency_scale * call.get("seconds", 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        for response in call["responses"]:
+            yield LlmResponse.model_validate(response)
@@ -0,0 +1,147 @@
+"""
+Persistent cache of generated JSONLogic rules.
+
+Rules are stored in SQLite, keyed by the normalized description text, a hash of
+the schema and the model name, so a repeated description can skip the agent run
+entirely. Entries expire after a TTL, and the least recently used entries are
+evicted when the cache grows beyond its maximum size.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'agents_cache', 'jsonlogic_rules.sqlite')
+
+def schema_hash(schema: Any) -> str:
+    """
+    Hash a schema by content, independent of key order and formatting.
+
+    Args:
+        schema: The schema as a dictionary, or as JSON text
+
+    Returns:
+        Hex digest identifying the schema
+    """
+    if isinstance(schema, (str, bytes)):
+        schema = json.loads(schema)
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def normalize_description(description: str) -> str:
+    """
+    Normalize description text so whitespace differences share a cache entry.
+
+    Case is kept, since literals in the description (e.g. names or codes) are case-sensitive.
+    """
+    return re.sub(r'\s+', ' ', description).strip()
+
+class RuleCache:
+    """
+    SQLite-backed cache from rule descriptions to generated rules.
+
+    Example:
+        >>> cache = RuleCache("rules.sqlite")
+        >>> cache.put("Find users over 30", schema_digest, "gemini-2.0-flash", {">": [{"var": "user.age"}, 30]})
+        >>> cache.get("Find users  over 30", schema_digest, "gemini-2.0-flash")
+        {'>': [{'var': 'user.age'}, 30]}
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = 7 * 24 * 60 * 60, max_entries: int = 10_000):
+        """
+        Open (or create) a rule cache.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl_seconds: Age after which a cached rule is no longer used
+            max_entries: Maximum number of cached rules before the least recently used are evicted
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS rules (
+                    key TEXT PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    schema_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    rule TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._connection.execute("CREATE INDEX IF NOT EXISTS rules_created_at ON rules (created_at)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS rules_last_used ON rules (last_used)")
+
+    @staticmethod
+    def make_key(description: str, schema_digest: str, model: str) -> str:
+        """Build the cache key for a description, schema hash and model."""
+        parts = [normalize_description(description), schema_digest, model]
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, description: str, schema_digest: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached rule for a description.
+
+        Returns:
+            The cached rule, or None if there is no unexpired entry
+        """
+        key = self.make_key(description, schema_digest, model)
+        now = time.time()
+
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT rule, created_at FROM rules WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] + self.ttl_seconds < now:
+                if row is not None:
+                    self._connection.execute("DELETE FROM rules WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE rules SET last_used = ? WHERE key = ?", (now, key))
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, description: str, schema_digest: str, model: str, rule: Dict[str, Any]):
+        """Store the generated rule for a description, evicting expired and least recently used entries."""
+        key = self.make_key(description, schema_digest, model)
+        now = time.time()
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO rules (key, description, schema_hash, model, rule, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, description, schema_digest, model, json.dumps(rule), now, now)
+            )
+            self._connection.execute("DELETE FROM rules WHERE created_at < ?", (now - self.ttl_seconds,))
+
+            excess = self._connection.execute("SELECT COUNT(*) FROM rules").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    "DELETE FROM rules WHERE key IN (SELECT key FROM rules ORDER BY last_used ASC LIMIT ?)", (excess,)
+                )
+
+    def stats(self) -> Dict[str, int]:
+        """Get the hit and miss counters of this process and the number of cached rules."""
+        entries = self._connection.execute("SELECT COUNT(*) FROM rules").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        self._connection.close()
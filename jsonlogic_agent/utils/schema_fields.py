@@ -0,0 +1,193 @@
+"""
+Extract field information from JSON schemas.
+
+The schema is walked with an explicit stack instead of recursion, so deeply
+nested schemas do not hit Python's recursion limit. Local `$ref` references
+(e.g. `#/definitions/Address` or `#/$defs/Address`) are resolved, and the
+fields of each referenced subschema are extracted once and reused wherever
+the reference appears. A reference back into a subschema that is still being
+expanded is listed as a field without its children, so recursive schemas stay finite.
+
+Schema files and streams are parsed incrementally by `utils.json_stream`, which
+also handles nesting deeper than `json.loads` can.
+"""
+
+import json
+import os
+from typing import Any, Dict, IO, List, Optional, Tuple, Union
+
+from utils.json_stream import load_json_stream, loads_iterative
+
+SchemaSource = Union[str, bytes, bytearray, IO, os.PathLike, Dict[str, Any]]
+
+# Keys next to a `$ref` that change the fields below it, which rules out reusing the referenced fields
+STRUCTURAL_KEYS = {"properties", "items", "type"}
+
+# Stands in for the referencing path while the fields of a referenced subschema are extracted
+_REF_BASE = "\0"
+
+def load_schema(schema: SchemaSource) -> Dict[str, Any]:
+    """
+    Parse a schema from JSON text, bytes, a file path, or a readable stream.
+
+    A schema is a JSON object, so a string is parsed as JSON text when it starts
+    with `{` (after whitespace), and opened as a file path otherwise. Streams and
+    paths are parsed chunk by chunk, so large schema files are never held in
+    memory as text. Text falls back to the iterative parser when it is nested
+    too deeply for `json.loads`.
+    """
+    if isinstance(schema, dict):
+        return schema
+    if isinstance(schema, os.PathLike) or (isinstance(schema, str) and not schema.lstrip().startswith("{")):
+        with open(schema, "rb") as f:
+            return load_json_stream(f)
+    if isinstance(schema, (str, bytes, bytearray)):
+        try:
+            return json.loads(schema)
+        except RecursionError:
+            if not isinstance(schema, str):
+                schema = bytes(schema).decode("utf-8-sig")
+            return loads_iterative(schema)
+    if hasattr(schema, "read"):
+        return load_json_stream(schema)
+    raise TypeError(f"Unsupported schema source: {type(schema).__name__}")
+
+def extract_field_info(schema: SchemaSource) -> List[Dict[str, Any]]:
+    """
+    Extract field information including names, descriptions, and types from the schema.
+
+    Args:
+        schema: JSON schema as text or bytes, a file path (a string not starting with `{`, or an
+            `os.PathLike`), a readable stream, or a parsed dictionary
+
+    Returns:
+        List of field information objects with name, description, and type, sorted by name
+    """
+    schema_dict = load_schema(schema)
+    field_info = _FieldExtractor(schema_dict).extract(schema_dict, "")
+    return sorted(field_info, key=lambda x: x["name"])
+
+def _field_data(schema: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """Build the field information object for a single schema node."""
+    field_data = {
+        "name": path
+    }
+
+    # Add description if available
+    if "description" in schema:
+        field_data["description"] = schema["description"]
+
+    # Add type information
+    if "type" in schema:
+        field_data["type"] = schema["type"]
+
+    # Add enum values if available
+    if "enum" in schema:
+        field_data["values"] = schema["enum"]
+
+    # Add range for numeric types
+    if "minimum" in schema and "maximum" in schema:
+        field_data["range"] = [schema["minimum"], schema["maximum"]]
+
+    return field_data
+
+class _FieldExtractor:
+    """Walks one schema document, memoizing the fields of every `$ref` target."""
+
+    def __init__(self, root: Dict[str, Any]):
+        self.root = root
+        # Fields below each resolved reference, as (name suffix, field data) pairs
+        self.ref_fields: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        # References whose fields are being extracted, to stop recursive references
+        self.expanding = set()
+
+    def extract(self, schema: Any, path: str) -> List[Dict[str, Any]]:
+        field_info = []
+        # Entries are (schema node, path) to walk, or (None, field data) to emit as-is
+        stack = [(schema, path)]
+
+        while stack:
+            node, path = stack.pop()
+            if node is None:
+                field_info.append(path)
+                continue
+            if not isinstance(node, dict):
+                continue
+
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                target = self.resolve(ref)
+                if target is not None:
+                    siblings = {key: value for key, value in node.items() if key != "$ref"}
+                    node = {**target, **siblings}
+                    if path and not STRUCTURAL_KEYS & siblings.keys():
+                        field_info.append(_field_data(node, path))
+                        if ref not in self.expanding:
+                            field_info.extend({**field, "name": path + suffix} for suffix, field in self.fields_below(ref, target))
+                        continue
+
+            # Add the field info if we have a path (skip the root)
+            if path:
+                field_info.append(_field_data(node, path))
+
+            # Children are pushed in reverse so they are emitted in schema order
+            items = node.get("items")
+            if node.get("type") == "array" and isinstance(items, dict):
+                # If array items have properties, process them
+                if "properties" in (self.deref(items) or {}):
+                    stack.append((items, f"{path}.*"))
+
+            # Handle object without properties
+            if node.get("type") == "object" and "properties" not in node:
+                stack.append((None, {
+                    "name": f"{path}.*",
+                    "description": "Dynamic object with arbitrary properties",
+                    "type": "object"
+                }))
+
+            # Process properties
+            properties = node.get("properties")
+            if isinstance(properties, dict):
+                for prop_name, prop_schema in reversed(list(properties.items())):
+                    field_path = f"{path}.{prop_name}" if path else prop_name
+                    stack.append((prop_schema, field_path))
+
+        return field_info
+
+    def fields_below(self, ref: str, target: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get the fields below a referenced subschema, relative to the referencing path."""
+        fields = self.ref_fields.get(ref)
+        if fields is None:
+            self.expanding.add(ref)
+            try:
+                # The first field is the subschema itself, the rest are named "<base>.<child>"
+                extracted = self.extract(target, _REF_BASE)[1:]
+            finally:
+                self.expanding.discard(ref)
+            fields = self.ref_fields[ref] = [(field["name"][len(_REF_BASE):], field) for field in extracted]
+        return fields
+
+    def deref(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the subschema a node refers to, or the node itself if it has no resolvable `$ref`."""
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            return self.resolve(ref)
+        return node
+
+    def resolve(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Resolve a local JSON pointer reference such as `#/definitions/Address`."""
+        if not ref.startswith("#"):
+            # Only references within the same document are supported
+            return None
+
+        target = self.root
+        for token in ref[1:].split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            if isinstance(target, dict) and token in target:
+                target = target[token]
+            elif isinstance(target, list) and token.isdigit() and int(token) < len(target):
+                target = target[int(token)]
+            else:
+                return None
+
+        return target if isinstance(target, dict) else None
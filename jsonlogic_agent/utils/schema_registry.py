@@ -0,0 +1,81 @@
+"""
+Process-wide registry of parsed schemas.
+
+Field indexes are stored once per distinct schema, keyed by a hash of the schema
+content, and shared by every session that uses that schema. Sessions only keep
+the hash in their state. The least recently used schemas are evicted when the
+registry is full; a session whose schema was evicted rebuilds it on next use.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.field_index import build_field_index
+
+class SchemaRegistry:
+    """
+    LRU cache from schema content hashes to field indexes.
+
+    Example:
+        >>> digest, field_index = schema_registry.register(schema_text, _extract_field_info)
+        >>> schema_registry.get(digest) is field_index
+        True
+    """
+
+    def __init__(self, max_schemas: int = 32):
+        """
+        Args:
+            max_schemas: Maximum number of schemas to keep before evicting the least recently used
+        """
+        self.max_schemas = max_schemas
+        self._indexes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(schema_text: str) -> str:
+        """Hash the schema text, so identical schemas share one registry entry."""
+        return hashlib.sha256(schema_text.encode("utf-8")).hexdigest()
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Get the field index for a schema hash, or None if it is not registered."""
+        with self._lock:
+            field_index = self._indexes.get(digest)
+            if field_index is not None:
+                self._indexes.move_to_end(digest)
+            return field_index
+
+    def register(self, schema_text: str,
+                 extract_fields: Callable[[str], List[Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Register a schema, parsing it only if no schema with the same content is registered.
+
+        Args:
+            schema_text: JSON schema as a string
+            extract_fields: Function that extracts the field information list from the schema text
+
+        Returns:
+            Tuple of the schema hash and its field index
+        """
+        digest = self.content_hash(schema_text)
+        field_index = self.get(digest)
+        if field_index is not None:
+            return digest, field_index
+
+        # Parse outside the lock, concurrent registrations of a new schema are harmless
+        field_index = build_field_index(extract_fields(schema_text))
+
+        with self._lock:
+            field_index = self._indexes.setdefault(digest, field_index)
+            self._indexes.move_to_end(digest)
+            while len(self._indexes) > self.max_schemas:
+                self._indexes.popitem(last=False)
+
+        return digest, field_index
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+# Shared by all sessions in the process
+schema_registry = SchemaRegistry()
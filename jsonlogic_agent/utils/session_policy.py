@@ -0,0 +1,106 @@
+"""
+Limit how much conversation history is sent to the model on each request.
+
+Every request in a session resends the whole history, including the tool calls
+and field lists of earlier requests, so prompt tokens grow with each request.
+The session policy, kept in the session state as `session_policy`, decides what
+the agent sees of earlier requests:
+
+- `shared`: the full history (the default)
+- `fresh`: nothing, each request runs in a new session (handled by the CLI)
+- `window`: the last `history_turns` requests, with their tool calls
+- `summarize`: the last `history_turns` requests, plus one line per older
+  request with its description and final answer
+
+`trim_history` is registered as the agent's `before_model_callback`. It only
+changes the request sent to the model; the session keeps its full history.
+"""
+
+import json
+from typing import List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+SESSION_POLICIES = ("shared", "fresh", "window", "summarize")
+DEFAULT_HISTORY_TURNS = 2
+# Tools whose result is the final answer of a turn
+ANSWER_TOOLS = {"create_validated_jsonlogic_from_intent"}
+
+def trim_history(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    Drop or summarize older requests from the model request, following the session policy.
+
+    Args:
+        callback_context: Context of the agent run, whose state holds `session_policy` and `history_turns`
+        llm_request: The request about to be sent to the model, changed in place
+
+    Returns:
+        None, so the model is always called
+    """
+    policy = callback_context.state.get("session_policy", "shared")
+    if policy not in ("window", "summarize"):
+        return None
+
+    keep_turns = callback_context.state.get("history_turns", DEFAULT_HISTORY_TURNS)
+    turns = split_turns(llm_request.contents)
+    # The last turn is the request being answered, it is always kept
+    older, kept = turns[:-keep_turns - 1], turns[-keep_turns - 1:]
+    if not older:
+        return None
+
+    contents = [content for turn in kept for content in turn]
+    if policy == "summarize":
+        summary = summarize_turns(older)
+        first = contents[0]
+        contents[0] = types.Content(role=first.role, parts=[types.Part(text=summary)] + list(first.parts or []))
+
+    llm_request.contents = contents
+    return None
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """Group contents into turns, each starting with a user message (tool results do not start a turn)."""
+    turns = []
+    for content in contents:
+        if is_user_message(content) or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+def is_user_message(content: types.Content) -> bool:
+    """Check whether a content is text typed by the user, rather than a tool result."""
+    parts = content.parts or []
+    return content.role == "user" and any(part.text for part in parts) and not any(part.function_response for part in parts)
+
+def summarize_turns(turns: List[List[types.Content]]) -> str:
+    """Describe earlier turns in one line each, with the user message and the final answer of the agent."""
+    lines = ["Summary of earlier requests in this conversation:"]
+    for turn in turns:
+        request = " ".join(part.text.strip() for part in turn[0].parts or [] if part.text)
+        answer = final_answer(turn[1:])
+        lines.append(f"- {request} -> {answer}" if answer else f"- {request}")
+    return "\n".join(lines) + "\n\n"
+
+def final_answer(contents: List[types.Content]) -> str:
+    """Last text of the agent in a turn, without its planning and reasoning, on one line."""
+    # The fast-path agent's answer is the result of its rule tool, without a model turn after it
+    last_parts = (contents[-1].parts or []) if contents else []
+    for part in last_parts:
+        if part.function_response and part.function_response.name in ANSWER_TOOLS:
+            response = part.function_response.response
+            # The rule tool returns its rule as {"status": "success", "rule": ...}
+            if isinstance(response, dict) and "rule" in response:
+                response = response["rule"]
+            return json.dumps(response)
+
+    for content in reversed(contents):
+        if content.role != "model":
+            continue
+        text = "".join(part.text for part in content.parts or [] if part.text and not part.thought)
+        if text.strip():
+            # PlanReActPlanner marks the answer after its planning and reasoning
+            answer = text.rsplit("/*FINAL_ANSWER*/", 1)[-1]
+            return " ".join(answer.split())
+    return ""